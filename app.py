@@ -1,73 +1,192 @@
 import logging
+import math
 import os
+import time
 import uuid
 from logging.handlers import RotatingFileHandler
 
-import structlog
-from dotenv import load_dotenv
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+from flask import Flask, current_app, g, jsonify, request
+
+from common.utils.streaming import is_streaming_request
+
+CORS_ORIGINS = "*"
+CORS_METHODS = ["GET", "POST"]
+
+
+def create_app(config_object=None):
+    """
+    Build and configure the Flask application.
+    Heavy dependencies (Redis, Celery connections, the word list, NumPy)
+    are only set up when they are first used.
+    """
+    # Imported here so that importing this module stays cheap
+    from flask_cors import CORS
+
+    from common.utils.circuit_breaker import CircuitBreaker
+    from common.utils.compression import parse_levels, register_compression
+    from common.utils.cors import register_preflight
+    from common.utils.event_loop import install_event_loop
+    from common.utils.limiter import limiter
+    from common.utils.limiter_storage import node_name, parse_pins
+    from common.utils.redis_client import redis_options
+    from common.utils.usage import record_usage
+    from config import DevelopmentConfig, ProductionConfig
+    from v1.routes import base_routes
+    from v1.tasks.routes import tasks_routes
+    from v1.tools.routes import tools_routes
+
+    # Initialize the Flask application
+    app = Flask(__name__)
+
+    # Environment-based configuration
+    if config_object is not None:
+        app.config.from_object(config_object)
+    elif os.getenv("FLASK_ENV") == "development":
+        app.config.from_object(DevelopmentConfig)
+    else:
+        app.config.from_object(ProductionConfig)
 
-from common.utils.common_utils import require_api_key
-from common.utils.limiter import limiter
-from config import DevelopmentConfig, ProductionConfig
-from v1.tasks.routes import tasks_routes
-from v1.tools.routes import tools_routes
-from redis import Redis
+    # Validate critical environment variables
+    if not app.config["HOST"] or not app.config["PORT"]:
+        raise ValueError("HOST and PORT environment variables must be set.")
 
-# Load environment variables
-load_dotenv()
+    # Async views (health, task status, pending requests) run on one event
+    # loop per worker, where their redis.asyncio clients live
+    install_event_loop(app)
 
+    # Register Blueprints
+    app.register_blueprint(base_routes)
+    app.register_blueprint(tools_routes, url_prefix="/v1/tools")
+    app.register_blueprint(tasks_routes, url_prefix="/v1/tasks")
 
-# Initialize the Flask application
-app = Flask(__name__)
+    # CORS preflights are answered before any other hook runs
+    register_preflight(
+        app, origins=CORS_ORIGINS, methods=CORS_METHODS, max_age=app.config["CORS_MAX_AGE"]
+    )
 
-# Environment-based configuration
-if os.getenv("FLASK_ENV") == "development":
-    app.config.from_object(DevelopmentConfig)
-else:
-    app.config.from_object(ProductionConfig)
+    # Configure logging once at startup (not per request). Registered before
+    # the limiter so rate-limited requests are logged too.
+    app.extensions["request_logger"] = setup_logger(app.config["LOG_DIR"], config=app.config)
+    app.before_request(log_request_info)
+    app.after_request(log_request_completion)
+    # Runs after compression (hooks run in reverse), so bytes_out is what was sent
+    app.after_request(record_usage)
+
+    # Initialize Limiter (Flask-Limiter reads the storage URI from config during
+    # init_app, so it must be set beforehand for the Redis backend to take effect)
+    # Redis calls go through one circuit breaker; while it's open, limits are
+    # enforced in memory with the stricter LIMITER_FALLBACK quota
+    def breaker(name):
+        return CircuitBreaker(
+            name,
+            failure_threshold=app.config["REDIS_BREAKER_FAILURES"],
+            latency_threshold=app.config["REDIS_BREAKER_LATENCY"],
+            reset_timeout=app.config["REDIS_BREAKER_RESET"],
+        )
+
+    app.extensions["redis_breaker"] = breaker("redis")
+    if app.config["LIMITER_SHARDS"]:
+        # Limit keys spread over several nodes, each with its own breaker so
+        # one failing node doesn't cut off the others
+        nodes = [node.strip() for node in app.config["LIMITER_SHARDS"].split(",") if node.strip()]
+        pins = parse_pins(app.config["LIMITER_SHARD_PINS"])
+        shard_breakers = app.extensions["limiter_breakers"] = {
+            node: breaker(f"limiter {node_name(node)}") for node in nodes + [node for _, node in pins]
+        }
+        app.config["RATELIMIT_STORAGE_URI"] = "redis+sharded://"
+        app.config["RATELIMIT_STORAGE_OPTIONS"] = {
+            "nodes": nodes,
+            "pins": pins,
+            "node_options": {
+                node: {**redis_options(app), "breaker": node_breaker}
+                for node, node_breaker in shard_breakers.items()
+            },
+        }
+    else:
+        app.config["RATELIMIT_STORAGE_URI"] = app.config["LIMITER_STORAGE"]
+        app.config["RATELIMIT_STORAGE_OPTIONS"] = redis_options(app)
+    app.config["RATELIMIT_IN_MEMORY_FALLBACK"] = app.config["LIMITER_FALLBACK"]
+    app.config["RATELIMIT_IN_MEMORY_FALLBACK_ENABLED"] = True
+    limiter.init_app(app)
+
+    # Configure CORS
+    CORS(
+        app,
+        resources={r"/*": {"origins": CORS_ORIGINS, "methods": CORS_METHODS}},
+        supports_credentials=True,
+        max_age=app.config["CORS_MAX_AGE"],
+    )
 
+    # Negotiated gzip for large and streamed responses
+    register_compression(
+        app,
+        parse_levels(app.config["COMPRESS_LEVELS"]),
+        min_size=app.config["COMPRESS_MIN_SIZE"],
+    )
 
-# Initialize Redis client using LIMITER_STORAGE
-app.config["REDIS_CLIENT"] = Redis.from_url(app.config["LIMITER_STORAGE"])
+    register_error_handlers(app)
+    return app
 
-# Validate critical environment variables
-if not app.config["HOST"] or not app.config["PORT"]:
-    raise ValueError("HOST and PORT environment variables must be set.")
 
-# Register Blueprints
-app.register_blueprint(tools_routes, url_prefix="/v1/tools")
-app.register_blueprint(tasks_routes, url_prefix="/v1/tasks")
+def __getattr__(name):
+    # `app` is built on first access (`from app import app`, gunicorn's
+    # `app:app`), so importing this module alone doesn't pay for it
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Initialize Limiter (Flask-Limiter reads the storage URI from config during
-# init_app, so it must be set beforehand for the Redis backend to take effect)
-app.config["RATELIMIT_STORAGE_URI"] = app.config["LIMITER_STORAGE"]
-limiter.init_app(app)
 
+# Setup structured logging and rotating file handler
+def setup_logger(log_folder, log_file_name="api_logs", config=None):
+    import structlog
 
-# Configure CORS
-CORS(
-    app,
-    resources={r"/*": {"origins": "*", "methods": ["GET", "POST"]}},
-    supports_credentials=True,
-)
+    from common.utils.log_sinks import (
+        BackgroundHandler,
+        CompressingRotatingFileHandler,
+        RedisStreamHandler,
+    )
 
+    config = config or {}
 
-# Setup structured logging and rotating file handler
-def setup_logger(log_folder, log_file_name="api_logs"):
     # Ensure the log directory exists
     os.makedirs(log_folder, exist_ok=True)
 
     # Define log file path
     log_file_path = os.path.join(log_folder, f"{log_file_name}.log")
 
-    # Standard Python logger with RotatingFileHandler
+    # Standard Python logger with RotatingFileHandler (rotated files are
+    # gzip-compressed in the background unless LOG_COMPRESS_ROTATED is off)
     max_log_size = 15 * 1024 * 1024  # 15MB
-    handler = RotatingFileHandler(log_file_path, maxBytes=max_log_size, backupCount=5)
+    file_handler_class = (
+        CompressingRotatingFileHandler
+        if config.get("LOG_COMPRESS_ROTATED", True)
+        else RotatingFileHandler
+    )
+    handler = file_handler_class(log_file_path, maxBytes=max_log_size, backupCount=5)
     handler.setFormatter(
         logging.Formatter("%(message)s")
     )  # Plain format (structlog handles formatting)
+    queue_options = {
+        "flush_interval": config.get("LOG_FLUSH_INTERVAL", 1.0),
+        "max_queue": config.get("LOG_QUEUE_SIZE", 10000),
+    }
+    writers = [BackgroundHandler(handler, thread_name="log-writer", **queue_options)]
+
+    # Optional centralized collection: batched XADDs to a Redis Stream, on a
+    # thread of its own so a stalled log Redis can't hold up the file
+    if config.get("LOG_STREAM_URL"):
+        from redis import Redis
+
+        timeout = config.get("REDIS_SOCKET_TIMEOUT", 1.0)
+        stream_handler = RedisStreamHandler(
+            Redis.from_url(config["LOG_STREAM_URL"], socket_timeout=timeout, socket_connect_timeout=timeout),
+            config.get("LOG_STREAM_NAME", log_file_name),
+            maxlen=config.get("LOG_STREAM_MAXLEN", 100000),
+            batch_size=config.get("LOG_STREAM_BATCH_SIZE", 100),
+        )
+        stream_handler.setFormatter(logging.Formatter("%(message)s"))
+        writers.append(BackgroundHandler(stream_handler, thread_name="log-stream", **queue_options))
 
     # Setup structlog with RotatingFileHandler
     structlog.configure(
@@ -81,19 +200,17 @@ def setup_logger(log_folder, log_file_name="api_logs"):
         cache_logger_on_first_use=True,
     )
 
-    # Get the logger and attach RotatingFileHandler
+    # Get the logger and attach the sinks; the request thread only enqueues
+    # records, writing and rotation happen on background threads
     logger = logging.getLogger("api_logger")
     if not logger.handlers:
         logger.setLevel(logging.INFO)
-        logger.addHandler(handler)
+        for writer in writers:
+            logger.addHandler(writer)
 
     return structlog.wrap_logger(logger)
 
 
-# Configure logging once at startup (not per request)
-request_logger = setup_logger("logs")
-
-
 # Helper function to filter sensitive headers
 def filter_headers(headers):
     sensitive_keys = {"Authorization", "X-Api-Key"}
@@ -102,10 +219,10 @@ def filter_headers(headers):
     }
 
 
-@app.before_request
 def log_request_info():
+    g.request_start = time.perf_counter_ns()
     request_id = str(uuid.uuid4())
-    logger = request_logger.bind(request_id=request_id)
+    logger = current_app.extensions["request_logger"].bind(request_id=request_id)
 
     # Extract client and request details
     client_name, request_name = "", "base"
@@ -124,74 +241,40 @@ def log_request_info():
         "method": request.method,
         "path": request.path,
         "headers": filter_headers(dict(request.headers)),
-        "body": request.get_data(as_text=True),
+        # Streamed bodies are left unread so the view can consume them
+        "body": (
+            request.get_data(as_text=True)
+            if not is_streaming_request()
+            else "<streamed>"
+        ),
         "client_name": client_name,
         "request_name": request_name,
     }
 
     logger.info("Incoming Request", **request_details)
+    g.request_logger = logger.bind(
+        requester_ip=requester_ip, client_name=client_name, request_name=request_name
+    )
 
 
-# Define routes
-@app.route("/", methods=["GET"])
-def home():
-    return jsonify(message="Welcome to the CyberITEX API!")
-
-
-@app.route("/api", methods=["POST"])
-@require_api_key
-@limiter.limit("5/minute")  # Rate limiting: 5 requests per minute
-def api():
-    return jsonify(status="success", data="This is the API endpoint.")
-
-
-@app.route("/limit", methods=["GET"])
-@limiter.limit("5/minute")  # Rate limiting: 5 requests per minute
-def limit():
-    return jsonify(status="success", data="Sky is the limit")
-
-
-@app.route("/health", methods=["GET"])
-def health_check():
-    # Check dependencies
-    health_status = {
-        "status": "healthy",
-        "dependencies": {
-            "database": False,
-            "redis": False,
-        },
-    }
-
-    try:
-        # Check database connection (example using SQLAlchemy)
-        # with app.config['DB_ENGINE'].connect() as conn:
-        #     conn.execute("SELECT 1")
-        health_status["dependencies"]["database"] = True
-    except Exception:
-        health_status["status"] = "unhealthy"
-
-    try:
-        # Check Redis connection
-        if app.config["REDIS_CLIENT"].ping():
-            health_status["dependencies"]["redis"] = True
-    except Exception as e:
-        health_status["status"] = "unhealthy"
-        health_status["dependencies"]["redis"] = False
-        print(f"Redis health check failed: {e}")
-
-    # Return appropriate status code
-    if health_status["status"] == "healthy":
-        return jsonify(health_status), 200
-    else:
-        return jsonify(health_status), 500
-
-
-@app.route('/liveness', methods=['GET'])
-def liveness_check():
-    return jsonify({"status": "alive"}), 200
+def log_request_completion(response):
+    # Linked to the "Incoming Request" record by request_id
+    if "request_start" not in g:
+        return response
+    duration_ms = (time.perf_counter_ns() - g.request_start) / 1_000_000
+    g.request_logger.info(
+        "Request Completed",
+        method=request.method,
+        path=request.path,
+        route=request.url_rule.rule if request.url_rule else None,
+        status=response.status_code,
+        duration_ms=round(duration_ms, 3),
+        # None for streamed responses, whose duration also ends at the headers
+        response_size=response.content_length,
+    )
+    return response
 
 
-@app.errorhandler(400)
 def bad_request(e):
     return (
         jsonify(
@@ -205,7 +288,6 @@ def bad_request(e):
     )
 
 
-@app.errorhandler(404)
 def page_not_found(e):
     return (
         jsonify(
@@ -219,7 +301,6 @@ def page_not_found(e):
     )
 
 
-@app.errorhandler(429)
 def ratelimit_exceeded(e):
     return (
         jsonify(
@@ -233,7 +314,6 @@ def ratelimit_exceeded(e):
     )
 
 
-@app.errorhandler(405)
 def method_not_allowed(e):
     return (
         jsonify(
@@ -247,7 +327,6 @@ def method_not_allowed(e):
     )
 
 
-@app.errorhandler(415)
 def unsupported_media_type(e):
     return (
         jsonify(
@@ -261,7 +340,6 @@ def unsupported_media_type(e):
     )
 
 
-@app.errorhandler(401)
 def unauthorized_error(e):
     return (
         jsonify(
@@ -275,7 +353,31 @@ def unauthorized_error(e):
     )
 
 
-@app.errorhandler(500)
+def service_unavailable(e):
+    response = jsonify(
+        {
+            "error": "Service Unavailable",
+            "message": "A backing service is unavailable. Please try again later.",
+            "status_code": 503,
+        }
+    )
+    retry_after = getattr(e, "retry_after", None)
+    if retry_after:
+        response.headers["Retry-After"] = str(math.ceil(retry_after))
+    return response, 503
+
+
+def broker_unavailable(e):
+    # Celery gave up publishing or reaching the result backend after its own
+    # retries: open the Redis breaker so the next task requests fail fast
+    # (require_redis), and answer 503 rather than 500
+    from common.utils.circuit_breaker import CircuitOpenError
+
+    breaker = current_app.extensions["redis_breaker"]
+    breaker.trip()
+    return service_unavailable(CircuitOpenError(breaker.name, breaker.retry_after))
+
+
 def internal_server_error(e):
     return (
         jsonify(
@@ -289,6 +391,27 @@ def internal_server_error(e):
     )
 
 
+def register_error_handlers(app):
+    from kombu.exceptions import OperationalError
+
+    from common.utils.circuit_breaker import CircuitOpenError
+
+    for code, handler in [
+        (400, bad_request),
+        (401, unauthorized_error),
+        (404, page_not_found),
+        (405, method_not_allowed),
+        (415, unsupported_media_type),
+        (429, ratelimit_exceeded),
+        (500, internal_server_error),
+        (503, service_unavailable),
+        (CircuitOpenError, service_unavailable),
+        (OperationalError, broker_unavailable),
+    ]:
+        app.register_error_handler(code, handler)
+
+
 # Run the application
 if __name__ == "__main__":
+    app = create_app()
     app.run(host=app.config["HOST"], port=app.config["PORT"], debug=app.config["DEBUG"])
@@ -0,0 +1,94 @@
+"""
+Async views benchmark: sustained throughput and latency of the async
+pending requests route against a sync version (the code it replaced), at
+several levels of concurrency in one worker.
+
+    python benchmarks/async_views.py [--seconds 3] [--concurrency 1,8]
+
+Each level runs that many client threads against one app instance, like a
+gthread worker with as many threads. Needs the Redis of LIMITER_STORAGE
+and REDIS_URL; with no Celery worker running, every inspect broadcast
+waits for its full timeout, which is what GetPendingRequests pays when
+workers are slow to answer.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+from flask import jsonify
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import create_app  # noqa: E402
+from common.celery_app import celery  # noqa: E402
+
+
+def add_sync_routes(app):
+    # The sync implementation, as it was before the route became async.
+    # More concurrent requests than broker_pool_limit hang it for good.
+    def pending():
+        inspect = celery.control.inspect()
+        found = []
+        for tasks in (inspect.active() or {}, inspect.scheduled() or {}, inspect.reserved() or {}):
+            for worker_tasks in tasks.values():
+                found.extend(task["id"] for task in worker_tasks)
+        return jsonify({"response": [celery.AsyncResult(task_id).state for task_id in found]}), 200
+
+    app.add_url_rule("/sync/pending", "sync_pending", pending)
+
+
+def load(app, path, concurrency, seconds, headers):
+    latencies, lock = [], threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def run():
+        client = app.test_client()
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            client.get(path, headers=headers)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=run) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    return len(latencies) / elapsed, p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0, help="time spent on each case")
+    parser.add_argument("--concurrency", default="1,8")
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config["RATELIMIT_ENABLED"] = False
+    add_sync_routes(app)
+    headers = {"X-API-Key": "benchmark"}
+
+    print(f"{'threads':>8}{'sync req/s':>12}{'p50':>9}{'p99':>9}{'async req/s':>13}{'p50':>9}{'p99':>9}")
+    for concurrency in (int(level) for level in args.concurrency.split(",")):
+        sync = load(app, "/sync/pending", concurrency, args.seconds, headers)
+        asynchronous = load(app, "/v1/tasks/GetPendingRequests", concurrency, args.seconds, headers)
+        print(
+            f"{concurrency:>8}"
+            f"{sync[0]:>12.1f}{sync[1]:>9.1f}{sync[2]:>9.1f}"
+            f"{asynchronous[0]:>13.1f}{asynchronous[1]:>9.1f}{asynchronous[2]:>9.1f}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
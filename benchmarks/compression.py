@@ -0,0 +1,74 @@
+"""
+Compression benchmark: CPU time per request against bytes saved, for
+typical response bodies at several gzip levels.
+
+    python benchmarks/compression.py [--requests 200]
+
+Each body is served by a small app that has the same after_request hook
+as the API (common/utils/compression.py), so the numbers include the
+negotiation and header handling, not just zlib.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+from flask import Flask, Response
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common.utils.compression import register_compression  # noqa: E402
+
+
+def payloads():
+    task_ids = [str(uuid.uuid4()) for _ in range(300)]
+    return {
+        "status (tiny)": json.dumps({"task_id": task_ids[0], "state": "PENDING"}),
+        "pending listing": json.dumps({
+            "pending": [{"task_id": task_id, "state": "PENDING"} for task_id in task_ids],
+        }),
+        "add results": json.dumps({"results": [i * 1.5 for i in range(5000)]}),
+        "task result": json.dumps({"task_id": task_ids[0], "state": "SUCCESS", "result": task_ids * 20}),
+    }
+
+
+def cpu_per_request(body, level, requests):
+    app = Flask(__name__)
+    if level is not None:
+        register_compression(app, {"application/json": level}, min_size=1024)
+    app.add_url_rule("/", "body", lambda: Response(body, mimetype="application/json"))
+    client = app.test_client()
+    headers = {"Accept-Encoding": "gzip"}
+
+    size = len(client.get("/", headers=headers).data)
+    start = time.process_time()
+    for _ in range(requests):
+        client.get("/", headers=headers)
+    return (time.process_time() - start) / requests, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--levels", default="1,6,9")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",")]
+
+    print(f"{'body':<18}{'level':>6}{'bytes':>10}{'saved':>8}{'cpu us/req':>12}{'extra us':>10}")
+    for name, body in payloads().items():
+        base_cpu, base_size = cpu_per_request(body, None, args.requests)
+        print(f"{name:<18}{'off':>6}{base_size:>10}{'':>8}{base_cpu * 1e6:>12.0f}{'':>10}")
+        for level in levels:
+            cpu, size = cpu_per_request(body, level, args.requests)
+            saved = 1 - size / base_size
+            print(
+                f"{'':<18}{level:>6}{size:>10}{saved:>8.0%}"
+                f"{cpu * 1e6:>12.0f}{(cpu - base_cpu) * 1e6:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Credential generation benchmark: credentials per second for the policy
+engine (v1/tools/scripts/generator.py) against generate_passphrase and a
+secrets.choice-per-character password.
+
+    python benchmarks/credentials.py [--seconds 1]
+
+Both sides use the app's word list, so passphrases have the same shape.
+"""
+import argparse
+import os
+import secrets
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import app  # noqa: E402
+from v1.tools.scripts.generator import SYMBOLS  # noqa: E402
+from v1.tools.scripts.utils import generate_passphrase, get_generator  # noqa: E402
+
+PASSWORD_ALPHABET = string.ascii_letters + string.digits + SYMBOLS
+
+
+def naive_password(length=20):
+    password = ""
+    for _ in range(length):
+        password += secrets.choice(PASSWORD_ALPHABET)
+    return password
+
+
+def rate(function, seconds):
+    count, start = 0, time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            function()
+        count += 100
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0, help="time spent on each case")
+    args = parser.parse_args()
+
+    with app.app_context():
+        generator = get_generator()
+        cases = [
+            ("passphrase", generate_passphrase, lambda: generator.generate("passphrase")),
+            ("password (20)", naive_password, lambda: generator.generate("password")),
+            ("pin", lambda: "".join(secrets.choice(string.digits) for _ in range(6)), lambda: generator.generate("pin")),
+        ]
+        print(f"{'credential':<16}{'current /s':>14}{'engine /s':>14}{'speedup':>10}")
+        for name, current, engine in cases:
+            before, after = rate(current, args.seconds), rate(engine, args.seconds)
+            print(f"{name:<16}{before:>14,.0f}{after:>14,.0f}{after / before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
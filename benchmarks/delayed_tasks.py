@@ -0,0 +1,80 @@
+"""
+Delayed tasks benchmark: tasks completed per worker slot when every task
+waits, sleeping in the slot vs deferring with a countdown (common/utils/delayed.py).
+
+    python benchmarks/delayed_tasks.py [--tasks 40] [--wait 2] [--concurrency 2]
+
+Starts a Celery worker against REDIS_URL for each mode, submits the tasks
+and waits for all of them to finish.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common.celery_app import celery  # noqa: E402
+from common.utils.delayed import defer  # noqa: E402
+
+
+@celery.task(name="benchmarks.sleeping_wait")
+def sleeping_wait(seconds):
+    time.sleep(seconds)
+
+
+@celery.task(bind=True, name="benchmarks.deferred_wait")
+def deferred_wait(self, seconds, resume_at=None):
+    defer(self, resume_at if resume_at is not None else time.time() + seconds)
+
+
+def start_worker(concurrency):
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "celery", "-A", "benchmarks.delayed_tasks:celery", "worker",
+         "-c", str(concurrency), "-Q", "benchmarks", "--without-gossip",
+         "--without-mingle", "--loglevel=warning"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if celery.control.ping(timeout=0.5):
+            return worker
+    worker.terminate()
+    raise RuntimeError("Worker did not come up")
+
+
+def measure(task, tasks, wait, concurrency):
+    worker = start_worker(concurrency)
+    try:
+        start = time.perf_counter()
+        results = [task.apply_async(args=[wait], queue="benchmarks") for _ in range(tasks)]
+        for result in results:
+            result.get(timeout=tasks * wait + 60)
+        elapsed = time.perf_counter() - start
+    finally:
+        worker.terminate()
+        worker.wait(timeout=30)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=40)
+    parser.add_argument("--wait", type=float, default=2.0, help="seconds each task waits")
+    parser.add_argument("--concurrency", type=int, default=2, help="worker slots")
+    args = parser.parse_args()
+
+    print(f"{args.tasks} tasks waiting {args.wait}s each, {args.concurrency} worker slots")
+    print(f"{'mode':<10}{'seconds':>10}{'tasks/slot/min':>16}")
+    for name, task in [("sleep", sleeping_wait), ("defer", deferred_wait)]:
+        elapsed = measure(task, args.tasks, args.wait, args.concurrency)
+        per_slot = args.tasks / args.concurrency / elapsed * 60
+        print(f"{name:<10}{elapsed:>10.2f}{per_slot:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
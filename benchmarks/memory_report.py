@@ -0,0 +1,99 @@
+"""
+Memory report: RSS and PSS of the gunicorn master and each worker, with and
+without preload (Linux only, reads /proc).
+
+    python benchmarks/memory_report.py [--workers 4]
+
+PSS splits shared pages between the processes sharing them, so the sum of
+the PSS column is what the whole server really costs.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def memory_kb(pid):
+    # {"Rss": kB, "Pss": kB}
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ["Rss", "Pss"]:
+                usage[key] = int(value.split()[0])
+    return usage
+
+
+def wait_for(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def measure(preload, workers, requests):
+    port = free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD=str(preload))
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers),
+         "-b", f"127.0.0.1:{port}", "app:create_app()"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/liveness"
+        wait_for(url)
+        while len(children(master.pid)) < workers:
+            time.sleep(0.2)
+        for _ in range(requests):
+            urllib.request.urlopen(url).read()
+
+        rows = [("master", master.pid, memory_kb(master.pid))]
+        rows += [("worker", pid, memory_kb(pid)) for pid in children(master.pid)]
+        return rows
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    for preload in [False, True]:
+        rows = measure(preload, args.workers, args.requests)
+        print(f"\npreload={preload}")
+        print(f"{'process':<10}{'pid':>8}{'RSS MB':>10}{'PSS MB':>10}")
+        for role, pid, usage in rows:
+            print(f"{role:<10}{pid:>8}{usage['Rss'] / 1024:>10.1f}{usage['Pss'] / 1024:>10.1f}")
+        total_pss = sum(usage["Pss"] for _, _, usage in rows) / 1024
+        print(f"{'total':<18}{'':>10}{total_pss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Startup benchmark: import time, app creation time and time to the first
+request, each measured in a fresh interpreter.
+
+    python benchmarks/startup.py [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter and prints its timings as JSON
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+flask_app.test_client().get("/liveness")
+first_request = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "create_app": created - imported,
+    "first_request": first_request - created,
+    "total": first_request - start,
+}))
+"""
+
+
+def run_once():
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    print(f"{'phase':<15}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for phase in ["import", "create_app", "first_request", "total"]:
+        values = [run[phase] * 1000 for run in runs]
+        print(
+            f"{phase:<15}{statistics.median(values):>12.1f}"
+            f"{min(values):>10.1f}{max(values):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
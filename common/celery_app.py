@@ -5,11 +5,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 1.0))
 
 # Shared Celery instance for all task modules
 celery = Celery(
     "cyberitex",
-    backend=REDIS_URL,
+    # Compresses large results and spills very large ones to disk
+    backend=f"common.result_backend:TieredRedisBackend+{REDIS_URL}",
     broker=REDIS_URL,
     include=[
         "v1.tasks.routes",
@@ -17,9 +19,46 @@ celery = Celery(
     ]
 )
 
+# Fire-and-forget tasks never write to the result backend
+IGNORE_RESULT_TASKS = [
+    name.strip()
+    for name in os.getenv("CELERY_IGNORE_RESULT_TASKS", "").split(",")
+    if name.strip()
+]
+
 celery.conf.update(
     task_serializer="json",
     result_serializer="json",
     accept_content=["json"],
-    result_expires=86400,  # 24 hours
+    result_expires=86400,  # 24 hours (tasks may override with result_expires=...)
+    task_annotations={name: {"ignore_result": True} for name in IGNORE_RESULT_TASKS},
+    # Tiered result storage (see common/result_backend.py)
+    result_compress_threshold=int(os.getenv("RESULT_COMPRESS_THRESHOLD", 1024)),
+    result_compress_level=int(os.getenv("RESULT_COMPRESS_LEVEL", 6)),
+    result_disk_threshold=int(os.getenv("RESULT_DISK_THRESHOLD", 512 * 1024)),
+    # Must be shared storage when the API and workers run on different hosts
+    result_disk_path=os.getenv("RESULT_DISK_PATH", "results"),
+    # Tasks write progress (common/utils/progress.py) at most this often (seconds)
+    task_progress_interval=float(os.getenv("TASK_PROGRESS_INTERVAL", 2.0)),
+    # Result memoization defaults for @memoize tasks (common/utils/memoize.py)
+    task_memo_ttl=int(os.getenv("MEMO_TTL", 3600)),
+    task_memo_max_entries=int(os.getenv("MEMO_MAX_ENTRIES", 10000)),
+    # 0: twice the task's time limit (one hour without one)
+    task_memo_claim_ttl=int(os.getenv("MEMO_CLAIM_TTL", 0)),
+    # A stalled Redis raises instead of blocking API requests indefinitely
+    redis_socket_timeout=REDIS_SOCKET_TIMEOUT,
+    redis_socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+    broker_connection_timeout=REDIS_SOCKET_TIMEOUT,
+    # Backend reconnects give up after about a second instead of 20 tries
+    # (~19 s); task routes then answer 503 (see broker_unavailable in app.py)
+    result_backend_transport_options={
+        "retry_policy": {"max_retries": 2, "interval_start": 0, "interval_step": 0.5, "interval_max": 0.5},
+    },
+    broker_transport_options={
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+    },
 )
+
+# Task runtime metrics for the autoscaler (scripts/autoscale.py)
+import common.task_metrics  # noqa: E402,F401
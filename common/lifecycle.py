@@ -0,0 +1,73 @@
+import gc
+
+
+def warm_up(app):
+    """
+    Build the app's immutable data ahead of time, so that with gunicorn's
+    preload it's created once in the master and shared with every worker.
+    """
+    import numpy  # noqa: F401 (module pages are shared once imported)
+
+    from v1.tools.scripts.utils import get_generator
+
+    with app.app_context():
+        get_generator()  # loads the word list and compiles the policies
+    # Compile the URL map now rather than on the first request
+    app.url_map.update()
+
+
+def before_fork():
+    """
+    Called in the master once, right before workers are forked.
+    Everything allocated so far is moved to the permanent generation, so
+    the workers' garbage collector never writes to (and copies) those pages.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def after_fork(app):
+    """
+    Called in each worker right after it's forked. Connections inherited
+    from the master must not be shared, so they're dropped here and
+    recreated on first use.
+    """
+    from common.celery_app import celery
+    from common.utils.limiter import limiter
+
+    # Lazily recreated by get_redis() and get_broker_redis()
+    app.extensions.pop("redis", None)
+    app.extensions.pop("broker_redis", None)
+    app.extensions.pop("admission", None)
+    app.extensions.pop("usage", None)
+    app.extensions.pop("memory_diagnostics", None)
+    # Bound to the master's event loop, which has no thread in the worker
+    app.extensions.pop("async_redis", None)
+    # Each worker tracks Redis health on its own
+    app.extensions["redis_breaker"].reset()
+    for breaker in app.extensions.get("limiter_breakers", {}).values():
+        breaker.reset()
+
+    # ShardedRedisStorage has one RedisStorage per node
+    storages = getattr(limiter.storage, "storages", {"": limiter.storage}).values()
+    for storage in storages:
+        storage_client = getattr(storage, "storage", None)
+        if hasattr(storage_client, "connection_pool"):
+            storage_client.connection_pool.reset()
+
+    # Celery only runs its own cleanup for multiprocessing forks
+    celery._after_fork()
+
+
+def start_memory_diagnostics(app):
+    """
+    Called in each worker once the app is loaded. Starts the memory
+    diagnostics listener when MEMORY_DIAGNOSTICS or a MEMORY_BUDGET_MB is
+    set; otherwise nothing runs.
+    """
+    if not (app.config["MEMORY_DIAGNOSTICS"] or app.config["MEMORY_BUDGET_MB"]):
+        return
+    from common.utils.memory import get_memory_diagnostics
+
+    with app.app_context():
+        get_memory_diagnostics()
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import time
+import zlib
+
+from celery.backends.redis import RedisBackend
+
+# Stored payloads are tagged with a two byte marker so plain JSON results
+# (which always start with "{") keep decoding exactly as before.
+COMPRESSED_MARKER = b"\x00z"
+DISK_MARKER = b"\x00f"
+
+
+class TieredRedisBackend(RedisBackend):
+    """Redis result backend that compresses large results and spills very
+    large ones to local disk, keeping only a pointer in Redis.
+
+    Tasks may set ``result_expires`` (seconds) to override the global
+    ``result_expires`` for their own results.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _get = self.app.conf.get
+        self.compress_threshold = int(_get("result_compress_threshold") or 1024)
+        self.compress_level = int(_get("result_compress_level") or 6)
+        self.disk_threshold = int(_get("result_disk_threshold") or 512 * 1024)
+        self.disk_path = _get("result_disk_path") or "results"
+        self._last_prune = 0.0
+
+    def encode(self, data):
+        payload = super().encode(data)
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        if len(payload) < self.compress_threshold:
+            return payload
+
+        compressed = COMPRESSED_MARKER + zlib.compress(payload, self.compress_level)
+        if len(compressed) < self.disk_threshold:
+            return compressed
+        return DISK_MARKER + self._write_to_disk(compressed).encode("utf-8")
+
+    def decode(self, payload):
+        if isinstance(payload, bytes):
+            if payload.startswith(DISK_MARKER):
+                payload = self._read_from_disk(payload[len(DISK_MARKER):].decode("utf-8"))
+                if payload is None:
+                    return None
+            if payload.startswith(COMPRESSED_MARKER):
+                payload = zlib.decompress(payload[len(COMPRESSED_MARKER):])
+        return super().decode(payload)
+
+    def _get_task_meta_for(self, task_id):
+        meta = self.get(self.get_key_for_task(task_id))
+        decoded = self.decode(meta) if meta else None
+        if not decoded:
+            # Missing keys and pointers to pruned files both read as PENDING
+            return {"status": "PENDING", "result": None}
+        return self.meta_from_decoded(decoded)
+
+    def get_many_meta(self, task_ids):
+        # Metadata for many tasks in a single MGET round trip
+        keys = [self.get_key_for_task(task_id) for task_id in task_ids]
+        metas = []
+        for task_id, value in zip(task_ids, self.mget(keys) if keys else []):
+            decoded = self.decode(value) if value else None
+            if not decoded:
+                decoded = {"status": "PENDING", "result": None, "task_id": task_id}
+            metas.append(decoded)
+        return metas
+
+    def _store_result(self, task_id, result, state, traceback=None, request=None, **kwargs):
+        result = super()._store_result(
+            task_id, result, state, traceback=traceback, request=request, **kwargs
+        )
+        expires = self._expires_for(request)
+        if expires is not None and expires != self.expires:
+            self.expire(self.get_key_for_task(task_id), expires)
+        return result
+
+    def _expires_for(self, request):
+        task_name = getattr(request, "task", None)
+        task = self.app.tasks.get(task_name) if task_name else None
+        expires = getattr(task, "result_expires", None)
+        return None if expires is None else int(expires)
+
+    def _write_to_disk(self, payload):
+        os.makedirs(self.disk_path, exist_ok=True)
+        # Content addressed, so identical results share a file
+        name = hashlib.sha256(payload).hexdigest()
+        path = os.path.join(self.disk_path, name)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        else:
+            os.utime(path)
+        self._maybe_prune()
+        return name
+
+    def _read_from_disk(self, name):
+        try:
+            with open(os.path.join(self.disk_path, os.path.basename(name)), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _maybe_prune(self):
+        # Redis expires the pointers on its own; files older than the longest
+        # configured expiry can no longer be referenced and are removed here.
+        now = time.time()
+        if not self.expires or now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        max_age = max(
+            [self.expires]
+            + [int(getattr(task, "result_expires", 0) or 0) for task in self.app.tasks.values()]
+        )
+        with os.scandir(self.disk_path) as entries:
+            for entry in entries:
+                try:
+                    if now - entry.stat().st_mtime > max_age:
+                        os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
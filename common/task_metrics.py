@@ -0,0 +1,53 @@
+import threading
+import time
+
+from celery.signals import task_postrun, task_prerun
+
+# Redis hash per queue: {"tasks": completed count, "seconds": total runtime}
+RUNTIME_KEY = "task-runtime:{queue}"
+FLUSH_INTERVAL = 10
+
+_started = {}
+_totals = {}
+_last_flush = time.monotonic()
+_lock = threading.Lock()
+
+
+@task_prerun.connect
+def record_start(task_id=None, **kwargs):
+    _started[task_id] = time.monotonic()
+
+
+@task_postrun.connect
+def record_runtime(task_id=None, task=None, **kwargs):
+    """
+    Accumulate task runtimes per queue in the worker process and add them to
+    Redis every FLUSH_INTERVAL seconds (one pipelined round trip), for the
+    autoscaler (scripts/autoscale.py).
+    """
+    global _last_flush
+    started = _started.pop(task_id, None)
+    if started is None or task is None:
+        return
+    now = time.monotonic()
+    delivery_info = task.request.delivery_info or {}
+    queue = delivery_info.get("routing_key") or task.app.conf.task_default_queue
+
+    with _lock:
+        count, seconds = _totals.get(queue, (0, 0.0))
+        _totals[queue] = (count + 1, seconds + now - started)
+        if now - _last_flush < FLUSH_INTERVAL:
+            return
+        totals = dict(_totals)
+        _totals.clear()
+        _last_flush = now
+
+    try:
+        pipe = task.app.backend.client.pipeline(transaction=False)
+        for queue, (count, seconds) in totals.items():
+            key = RUNTIME_KEY.format(queue=queue)
+            pipe.hincrby(key, "tasks", count)
+            pipe.hincrbyfloat(key, "seconds", seconds)
+        pipe.execute()
+    except Exception:
+        pass  # metrics only; the next flush starts from zero
@@ -0,0 +1,167 @@
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify
+from redis.exceptions import RedisError
+
+
+def parse_watermarks(value):
+    """
+    "celery=1000:500,reports=200:50" -> {"celery": (1000, 500), "reports": (200, 50)}
+    """
+    watermarks = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        queue, _, marks = entry.partition("=")
+        high, _, low = marks.partition(":")
+        high = int(high)
+        low = int(low) if low else high
+        if low > high:
+            raise ValueError(f"Low watermark above high watermark for queue '{queue.strip()}'")
+        watermarks[queue.strip()] = (high, low)
+    return watermarks
+
+
+class QueueState:
+    def __init__(self):
+        self.depth = None
+        self.sampled_at = float("-inf")
+        self.drain_rate = None  # tasks per second, smoothed
+        self.shedding = False
+
+
+class AdmissionController:
+    """
+    Sheds task submissions while a broker queue is too deep.
+
+    The queue length (LLEN on the Redis broker) is sampled at most once
+    every `sample_interval` seconds per worker. Once it reaches the high
+    watermark, submissions are rejected until it drops to the low watermark.
+    The drain rate is measured from the decline between samples; while
+    shedding, the API adds nothing, so it's what the workers get through.
+    """
+
+    def __init__(self, client, watermarks, sample_interval=1.0, max_retry_after=300, smoothing=0.3):
+        self.client = client
+        self.watermarks = watermarks
+        self.sample_interval = sample_interval
+        self.max_retry_after = max_retry_after
+        self.smoothing = smoothing
+        self._queues = {queue: QueueState() for queue in watermarks}
+        self._lock = threading.Lock()
+        self.stats = {"admitted": 0, "rejected": 0}
+
+    def sample(self, queue):
+        state = self._queues[queue]
+        now = time.monotonic()
+        with self._lock:
+            # Other requests keep using the cached depth meanwhile
+            if now - state.sampled_at < self.sample_interval:
+                return state
+            previous_depth, previous_at = state.depth, state.sampled_at
+            state.sampled_at = now
+
+        try:
+            depth = self.client.llen(queue)
+        except RedisError:
+            return state  # keep the last known depth
+
+        with self._lock:
+            if previous_depth is not None:
+                elapsed = now - previous_at
+                rate = max(0, previous_depth - depth) / elapsed
+                state.drain_rate = (
+                    rate
+                    if state.drain_rate is None
+                    else self.smoothing * rate + (1 - self.smoothing) * state.drain_rate
+                )
+            state.depth = depth
+            high, low = self.watermarks[queue]
+            if depth >= high:
+                state.shedding = True
+            elif depth <= low:
+                state.shedding = False
+        return state
+
+    def admit(self, queue):
+        """Returns None when the submission may go ahead, else a Retry-After in seconds."""
+        if queue not in self._queues:
+            return None
+        state = self.sample(queue)
+        if not state.shedding:
+            self.stats["admitted"] += 1
+            return None
+        self.stats["rejected"] += 1
+        return self.retry_after(queue)
+
+    def retry_after(self, queue):
+        # Time for the workers to bring the queue down to the low watermark
+        state = self._queues[queue]
+        _, low = self.watermarks[queue]
+        if not state.drain_rate:
+            return self.max_retry_after
+        seconds = math.ceil((state.depth - low) / state.drain_rate)
+        return min(self.max_retry_after, max(1, seconds))
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "queues": {
+                queue: {
+                    "depth": state.depth,
+                    "high": self.watermarks[queue][0],
+                    "low": self.watermarks[queue][1],
+                    "shedding": state.shedding,
+                    "drain_rate": round(state.drain_rate, 3) if state.drain_rate is not None else None,
+                }
+                for queue, state in self._queues.items()
+            },
+        }
+
+
+def get_admission():
+    """Per-worker AdmissionController for the Celery broker, created on first use."""
+    controller = current_app.extensions.get("admission")
+    if controller is None:
+        from common.utils.redis_client import get_broker_redis
+
+        controller = current_app.extensions["admission"] = AdmissionController(
+            get_broker_redis(),
+            parse_watermarks(current_app.config["ADMISSION_WATERMARKS"]),
+            sample_interval=current_app.config["ADMISSION_SAMPLE_INTERVAL"],
+            max_retry_after=current_app.config["ADMISSION_MAX_RETRY_AFTER"],
+        )
+    return controller
+
+
+def admission_control(queue=None):
+    """
+    Reject with 503 and Retry-After while `queue` (the default Celery queue
+    if omitted) is over its high watermark.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def decorated_function(*args, **kwargs):
+            from common.celery_app import celery
+
+            name = queue or celery.conf.task_default_queue
+            retry_after = get_admission().admit(name)
+            if retry_after is None:
+                return func(*args, **kwargs)
+            response = jsonify(
+                {
+                    "error": "Service Unavailable",
+                    "message": "Too many tasks are queued. Please try again later.",
+                    "status_code": 503,
+                }
+            )
+            response.headers["Retry-After"] = str(retry_after)
+            return response, 503
+
+        return decorated_function
+
+    return decorator
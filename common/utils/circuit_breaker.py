@@ -0,0 +1,118 @@
+import threading
+import time
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+
+class CircuitOpenError(RedisConnectionError):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit '{name}' is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of a dependency and stops calling it once it fails.
+
+    - closed: calls go through; `failure_threshold` consecutive failures
+      (errors, or calls slower than `latency_threshold` seconds) open it.
+    - open: calls are rejected with CircuitOpenError for `reset_timeout`
+      seconds.
+    - half_open: one thread probes the dependency; success closes the
+      circuit, failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_threshold=5, latency_threshold=0.25, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self.reset()
+
+    def reset(self):
+        # Also used after a fork, so the lock is always recreated
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_thread = None
+        self._probe_started = 0.0
+        self.stats = {"successes": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "trips": 0}
+
+    @property
+    def state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    @property
+    def retry_after(self):
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through right now."""
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return
+            thread = threading.get_ident()
+            # A probe that never reported back is given up after reset_timeout
+            probe_free = (
+                self._probe_thread in (None, thread)
+                or time.monotonic() - self._probe_started >= self.reset_timeout
+            )
+            if state == self.HALF_OPEN and probe_free:
+                if self._probe_thread != thread:
+                    self._probe_started = time.monotonic()
+                self._state = self.HALF_OPEN
+                self._probe_thread = thread
+                return
+            self.stats["rejected"] += 1
+        raise CircuitOpenError(self.name, self.retry_after)
+
+    def record_success(self, duration):
+        if duration > self.latency_threshold:
+            with self._lock:
+                self.stats["slow_calls"] += 1
+            self.record_failure()
+            return
+        with self._lock:
+            self.stats["successes"] += 1
+            self._failures = 0
+            if self._state != self.CLOSED:
+                self._state = self.CLOSED
+                self._probe_thread = None
+
+    def record_failure(self):
+        with self._lock:
+            self.stats["failures"] += 1
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.stats["trips"] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_thread = None
+
+    def trip(self):
+        """Open the circuit at once, for an outage a caller's own retries already confirmed."""
+        with self._lock:
+            self.stats["failures"] += 1
+            self._failures = max(self._failures + 1, self.failure_threshold)
+            if self._state != self.OPEN:
+                self.stats["trips"] += 1
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probe_thread = None
+
+    def snapshot(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "retry_after": round(self.retry_after, 3) if self._state == self.OPEN else 0,
+            **self.stats,
+        }
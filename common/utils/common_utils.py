@@ -1,5 +1,8 @@
+import hashlib
+import hmac
 from functools import wraps
-from flask import jsonify, request
+from flask import current_app, g, jsonify, request
+from flask_limiter.util import get_remote_address
 
 def authenticate_api_key(api_key):
     return True
@@ -12,5 +15,28 @@ def require_api_key(func):
         api_key = request.headers.get("X-API-Key")
         if not api_key or not authenticate_api_key(api_key):
             return jsonify({"response": "Invalid or missing API key"}), 401
-        return func(*args, **kwargs)
+        # Picked up by the usage accounting hook (common/utils/usage.py)
+        g.api_key = api_key
+        # ensure_sync: the view may be async
+        return current_app.ensure_sync(func)(*args, **kwargs)
     return decorated_function
+
+
+def require_admin_key(func):
+    # Admin endpoints: the key must be one of ADMIN_API_KEYS
+    @wraps(func)
+    def decorated_function(*args, **kwargs):
+        api_key = request.headers.get("X-API-Key", "")
+        admin_keys = [key.strip() for key in current_app.config["ADMIN_API_KEYS"].split(",") if key.strip()]
+        if not any(hmac.compare_digest(api_key.encode(), key.encode()) for key in admin_keys):
+            return jsonify({"response": "Invalid or missing admin API key"}), 401
+        return current_app.ensure_sync(func)(*args, **kwargs)
+    return decorated_function
+
+
+def client_id():
+    # Who is calling: a hash of their API key, or their address without one
+    api_key = request.headers.get("X-API-Key")
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    return "addr:" + get_remote_address()
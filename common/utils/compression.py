@@ -0,0 +1,77 @@
+import gzip
+import zlib
+
+from flask import request
+
+
+def parse_levels(value):
+    """
+    "application/json=6,application/x-ndjson=1" -> {"application/json": 6, "application/x-ndjson": 1}
+    """
+    levels = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        mimetype, _, level = entry.partition("=")
+        level = int(level)
+        if not 0 <= level <= 9:
+            raise ValueError(f"Compression level for '{mimetype.strip()}' must be between 0 and 9")
+        levels[mimetype.strip()] = level
+    return levels
+
+
+def gzip_stream(chunks, level):
+    # Each chunk is flushed on its own so clients still receive it right away
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def register_compression(app, levels, min_size=1024):
+    """
+    Gzip responses for clients that accept it. Only the mimetypes listed in
+    `levels` are compressed, each at its own level. Buffered bodies are
+    compressed when they're at least `min_size` bytes and get smaller.
+    Streamed bodies are compressed chunk by chunk.
+    """
+
+    def compress_response(response):
+        level = levels.get(response.mimetype)
+        if (
+            level is None
+            or request.method == "HEAD"
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        if not request.accept_encodings["gzip"]:
+            return response
+
+        if response.is_streamed:
+            response.response = gzip_stream(response.response, level)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            compressed = gzip.compress(data, compresslevel=level, mtime=0)
+            if len(compressed) >= len(data):
+                return response
+            response.set_data(compressed)
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    app.after_request(compress_response)
@@ -0,0 +1,42 @@
+from flask import Response, request
+
+
+def register_preflight(app, origins="*", methods=("GET", "POST"), max_age=600):
+    """
+    Answer CORS preflight requests from a before_request hook. Call it
+    after the blueprints are registered and before the logging and rate
+    limiting hooks, so preflights skip them. Each route's allowed methods
+    are worked out once here rather than per request, and
+    Access-Control-Max-Age lets browsers reuse the answer for `max_age`
+    seconds. Flask-CORS still handles the actual requests.
+    """
+    allowed = {}
+    for rule in app.url_map.iter_rules():
+        allowed.setdefault(rule.endpoint, set()).update(rule.methods)
+    static_headers = {
+        endpoint: {
+            "Access-Control-Allow-Methods": ", ".join(method for method in methods if method in rule_methods),
+            "Access-Control-Allow-Credentials": "true",
+            "Access-Control-Max-Age": str(max_age),
+            "Vary": "Origin",
+        }
+        for endpoint, rule_methods in allowed.items()
+        if any(method in rule_methods for method in methods)
+    }
+
+    def answer_preflight():
+        if request.method != "OPTIONS" or "Access-Control-Request-Method" not in request.headers:
+            return None
+        headers = static_headers.get(request.endpoint)
+        origin = request.headers.get("Origin")
+        if headers is None or not origin or (origins != "*" and origin not in origins):
+            return None  # left to the normal handling (404, 405, no CORS headers)
+
+        response = Response(status=204, headers=headers)
+        response.headers["Access-Control-Allow-Origin"] = origin
+        requested_headers = request.headers.get("Access-Control-Request-Headers")
+        if requested_headers:
+            response.headers["Access-Control-Allow-Headers"] = requested_headers
+        return response
+
+    app.before_request(answer_preflight)
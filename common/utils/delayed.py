@@ -0,0 +1,30 @@
+import time
+
+# Longest single countdown. ETA messages not acknowledged within the Redis
+# broker's visibility_timeout (1 hour by default) are delivered again.
+MAX_COUNTDOWN = 3000
+
+
+def defer(task, resume_at):
+    """
+    Wait until `resume_at` (epoch seconds) without holding a worker slot.
+
+    Call it from a bound task that accepts a `resume_at` keyword. Until the
+    time has come, the task is re-published with a countdown (same task id,
+    arguments and `resume_at`) and the current run ends by raising Retry.
+    The worker is free for other tasks meanwhile. Once `resume_at` has
+    passed, defer() returns and the task carries on.
+    """
+    remaining = resume_at - time.time()
+    if remaining <= 0:
+        return
+    if task.request.is_eager:
+        # Eager runs (task_always_eager, apply()) retry in place and ignore
+        # the countdown, so there's no worker slot to free up: just wait
+        time.sleep(remaining)
+        return
+    raise task.retry(
+        countdown=min(remaining, MAX_COUNTDOWN),
+        kwargs={**task.request.kwargs, "resume_at": resume_at},
+        max_retries=None,
+    )
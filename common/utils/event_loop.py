@@ -0,0 +1,76 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import os
+import threading
+
+# Threads for blocking calls made from async views (asyncio.to_thread), e.g.
+# Celery inspect broadcasts that each wait up to a second for replies. The
+# default executor (CPU count + 4 threads) would queue them.
+BLOCKING_THREADS = 64
+
+
+class WorkerEventLoop:
+    """
+    One asyncio loop per worker process, running in a daemon thread.
+
+    Async views are run on it rather than on a new loop per request (what
+    Flask does by default through asgiref), so redis.asyncio clients and
+    their connection pools live as long as the worker, and the I/O of
+    concurrent requests is multiplexed on one thread. Started lazily in
+    each process, threads don't survive fork.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    loop = asyncio.new_event_loop()
+                    loop.set_default_executor(
+                        concurrent.futures.ThreadPoolExecutor(BLOCKING_THREADS, thread_name_prefix="event-loop-blocking")
+                    )
+                    threading.Thread(target=loop.run_forever, name="event-loop", daemon=True).start()
+                    self._loop, self._pid = loop, os.getpid()
+        return self._loop
+
+    def run(self, coroutine_function, *args, **kwargs):
+        """Run the coroutine on the loop and wait for its result, in the caller's context."""
+        # The copied context carries Flask's app and request contexts over
+        context = contextvars.copy_context()
+        result = concurrent.futures.Future()
+
+        def start():
+            task = context.run(self.loop.create_task, coroutine_function(*args, **kwargs))
+            task.add_done_callback(functools.partial(copy_outcome, result))
+
+        self.loop.call_soon_threadsafe(start)
+        return result.result()
+
+    def async_to_sync(self, coroutine_function):
+        # Replaces Flask.async_to_sync (used by ensure_sync for async views)
+        @functools.wraps(coroutine_function)
+        def wrapper(*args, **kwargs):
+            return self.run(coroutine_function, *args, **kwargs)
+
+        return wrapper
+
+
+def copy_outcome(result, task):
+    if task.cancelled():
+        result.cancel()
+    elif task.exception() is not None:
+        result.set_exception(task.exception())
+    else:
+        result.set_result(task.result())
+
+
+def install_event_loop(app):
+    event_loop = app.extensions["event_loop"] = WorkerEventLoop()
+    app.async_to_sync = event_loop.async_to_sync
@@ -0,0 +1,39 @@
+import hashlib
+import json
+import uuid
+
+
+def content_key(task_name, args=(), kwargs=None):
+    # Stable key derived from what is being submitted
+    payload = json.dumps([task_name, list(args), kwargs or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def claim_key(task_name, key):
+    # Client supplied keys are hashed so their length doesn't matter
+    return f"idempotency:{task_name}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
+def submit_once(redis_client, key, task, args=(), kwargs=None, ttl=86400):
+    """
+    Enqueue `task` unless the same key was submitted within `ttl` seconds.
+    Returns (task_id, deduplicated).
+    """
+    redis_key = claim_key(task.name, key)
+
+    while True:
+        # Claim the key and record the task id in one atomic SET NX
+        task_id = str(uuid.uuid4())
+        if redis_client.set(redis_key, task_id, nx=True, ex=ttl):
+            try:
+                task.apply_async(args=args, kwargs=kwargs, task_id=task_id)
+            except Exception:
+                # Release the claim so the client's retry can go through
+                redis_client.delete(redis_key)
+                raise
+            return task_id, False
+
+        existing = redis_client.get(redis_key)
+        if existing is not None:
+            return existing.decode("utf-8"), True
+        # The key expired between SET and GET, try to claim it again
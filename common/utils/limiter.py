@@ -1,7 +1,21 @@
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from limits import parse
+
+# Registers the redis+sharded:// storage scheme (LIMITER_SHARDS)
+from common.utils import limiter_storage  # noqa: F401
 
 # Create a Limiter instance
 limiter = Limiter(
     key_func=get_remote_address
 )
+
+
+def consume(limit_value, cost, scope):
+    """
+    Charge `cost` hits against `limit_value` for the current client.
+    For views that only learn their cost while running (e.g. streamed
+    batches), where the decorators have already been evaluated.
+    Returns False once the limit is exhausted.
+    """
+    return limiter.limiter.hit(parse(limit_value), get_remote_address(), scope, cost=cost)
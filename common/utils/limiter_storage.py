@@ -0,0 +1,153 @@
+import bisect
+import hashlib
+from urllib.parse import urlsplit
+
+from limits.storage import MovingWindowSupport, RedisStorage, SlidingWindowCounterSupport, Storage
+from redis.exceptions import RedisError
+
+
+def parse_pins(value):
+    """
+    "LIMITER/10.0.0.5/=redis://hot:6379/0,..." -> [("LIMITER/10.0.0.5/", "redis://hot:6379/0")]
+    """
+    pins = []
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        prefix, _, node = entry.partition("=")
+        pins.append((prefix.strip(), node.strip()))
+    return pins
+
+
+def node_name(url):
+    """
+    "redis://:secret@10.0.0.7:6379/2" -> "10.0.0.7:6379/2", for logs and metrics
+    """
+    parts = urlsplit(url)
+    return f"{parts.hostname}:{parts.port or 6379}{parts.path or '/0'}"
+
+
+class HashRing:
+    """
+    Consistent hashing with `replicas` virtual points per node, so adding
+    or removing one of N nodes only moves about 1/N of the keys.
+    """
+
+    def __init__(self, nodes=(), replicas=160):
+        self.replicas = replicas
+        self._ring = []
+        self._positions = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+    @property
+    def nodes(self):
+        return sorted({node for _, node in self._ring})
+
+    def add(self, node):
+        for replica in range(self.replicas):
+            bisect.insort(self._ring, (self._hash(f"{node}#{replica}"), node))
+        self._positions = [position for position, _ in self._ring]
+
+    def remove(self, node):
+        self._ring = [point for point in self._ring if point[1] != node]
+        self._positions = [position for position, _ in self._ring]
+
+    def get(self, key):
+        if not self._ring:
+            raise LookupError("The hash ring has no nodes")
+        index = bisect.bisect(self._positions, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class ShardedRedisStorage(Storage, MovingWindowSupport, SlidingWindowCounterSupport):
+    """
+    Rate limit storage spread over several Redis nodes by consistent hashing
+    of the limit key. Keys matching a pinned prefix always go to the pinned
+    node (e.g. a hot client on a dedicated instance). Every call is handled
+    by the RedisStorage of the key's node, so each limit stays on one node.
+
+        storage_from_string("redis+sharded://", nodes=["redis://a:6379/0", "redis://b:6379/0"])
+
+    `options` are passed to every node's RedisStorage, `node_options` (a
+    dict keyed by node URL) to that node only.
+    """
+
+    STORAGE_SCHEME = ["redis+sharded"]
+
+    def __init__(self, uri=None, nodes=(), pins=(), node_options=None, replicas=160, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+        self.options = options
+        self.node_options = node_options or {}
+        self.storages = {}
+        self.ring = HashRing(replicas=replicas)
+        self.pins = list(pins)
+        for node in nodes:
+            self.add_node(node)
+        for _, node in self.pins:
+            if node not in self.storages:
+                # Pinned nodes only serve their pinned keys
+                self.storages[node] = self._connect(node)
+
+    @property
+    def base_exceptions(self):
+        return RedisError
+
+    def _connect(self, node):
+        return RedisStorage(node, **{**self.options, **self.node_options.get(node, {})})
+
+    def add_node(self, node):
+        if node not in self.storages:
+            self.storages[node] = self._connect(node)
+        self.ring.add(node)
+
+    def remove_node(self, node):
+        self.ring.remove(node)
+        if all(node != pinned for _, pinned in self.pins):
+            self.storages.pop(node, None)
+
+    def node_for(self, key):
+        for prefix, node in self.pins:
+            if key.startswith(prefix):
+                return node
+        return self.ring.get(key)
+
+    def _storage_for(self, key):
+        return self.storages[self.node_for(key)]
+
+    def incr(self, key, expiry, amount=1):
+        return self._storage_for(key).incr(key, expiry, amount)
+
+    def get(self, key):
+        return self._storage_for(key).get(key)
+
+    def get_expiry(self, key):
+        return self._storage_for(key).get_expiry(key)
+
+    def clear(self, key):
+        return self._storage_for(key).clear(key)
+
+    def check(self):
+        return all(storage.check() for storage in self.storages.values())
+
+    def reset(self):
+        return sum(storage.reset() or 0 for storage in self.storages.values())
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        return self._storage_for(key).acquire_entry(key, limit, expiry, amount)
+
+    def get_moving_window(self, key, limit, expiry):
+        return self._storage_for(key).get_moving_window(key, limit, expiry)
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        return self._storage_for(key).acquire_sliding_window_entry(key, limit, expiry, amount)
+
+    def get_sliding_window(self, key, expiry):
+        return self._storage_for(key).get_sliding_window(key, expiry)
+
+    def clear_sliding_window(self, key, expiry):
+        return self._storage_for(key).clear_sliding_window(key, expiry)
@@ -0,0 +1,176 @@
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+from logging.handlers import RotatingFileHandler
+
+
+class BackgroundHandler(logging.Handler):
+    """
+    Hands records to a writer thread that passes them on to `handlers`, so
+    file writes, rotation and shipping never run on the request thread.
+    The thread is started lazily in each process, so it also runs in
+    workers forked from a preloaded gunicorn master.
+
+    At most `max_queue` records wait for the thread; while a sink is stuck,
+    further records are dropped and counted in `dropped` rather than
+    piling up in memory.
+    """
+
+    def __init__(self, *handlers, flush_interval=1.0, max_queue=10000, thread_name="log-writer"):
+        super().__init__()
+        self.handlers = handlers
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.thread_name = thread_name
+        self.dropped = 0
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.max_queue)
+            self._thread = threading.Thread(
+                target=self._run, args=(self._queue,), name=self.thread_name, daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self, records):
+        while True:
+            try:
+                record = records.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # Idle: push out whatever the sinks are still batching
+                self._flush_handlers()
+                continue
+            if record is None:
+                self._flush_handlers()
+                return
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def _flush_handlers(self):
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self):
+        # Called by logging.shutdown() at exit: drain the queue first
+        if self._pid == os.getpid() and self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=5)
+            except queue.Full:
+                pass  # the sink is stuck, don't hold up the exit
+            self._thread.join(timeout=5)
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+    def snapshot(self):
+        queued = self._queue.qsize() if self._pid == os.getpid() else 0
+        return {"queued": queued, "dropped": self.dropped}
+
+
+class RedisStreamHandler(logging.Handler):
+    """
+    Ships formatted records to a Redis Stream in batches: one pipelined
+    round trip of XADDs (trimmed to roughly `maxlen` entries) per batch.
+    Meant to run behind a BackgroundHandler, which also flushes it when idle.
+    """
+
+    def __init__(self, client, stream, maxlen=100000, batch_size=100, max_buffer=10000):
+        super().__init__()
+        self.client = client
+        self.stream = stream
+        self.maxlen = maxlen
+        self.batch_size = batch_size
+        # Records kept while Redis is unreachable, oldest dropped first
+        self.max_buffer = max_buffer
+        self.buffer = []
+        self.dropped = 0
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for message in batch:
+                pipe.xadd(self.stream, {"record": message}, maxlen=self.maxlen, approximate=True)
+            pipe.execute()
+        except Exception:
+            # Keep the batch for the next flush, within the buffer bound
+            pending = batch + self.buffer
+            overflow = len(pending) - self.max_buffer
+            if overflow > 0:
+                self.dropped += overflow
+                pending = pending[overflow:]
+            self.buffer = pending
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler whose rotated files are gzip-compressed
+    (api_logs.log.1.gz, ...) in a background thread. Rotation itself is
+    reduced to a rename.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self._rotate
+        self._compressor = None
+
+    def doRollover(self):
+        # The previous file must be in place before backups are shifted again
+        self.wait_for_compression()
+        super().doRollover()
+
+    def wait_for_compression(self):
+        if self._compressor is not None:
+            self._compressor.join()
+            self._compressor = None
+
+    def _rotate(self, source, dest):
+        uncompressed = dest[: -len(".gz")]
+        os.rename(source, uncompressed)
+        self._compressor = threading.Thread(
+            target=compress_file, args=(uncompressed, dest), name="log-compressor", daemon=True
+        )
+        self._compressor.start()
+
+    def close(self):
+        self.wait_for_compression()
+        super().close()
+
+
+def compress_file(source, dest):
+    tmp_dest = f"{dest}.tmp"
+    with open(source, "rb") as f_in, gzip.open(tmp_dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.replace(tmp_dest, dest)
+    os.remove(source)
@@ -0,0 +1,132 @@
+import json
+import time
+
+from celery import states
+from celery.signals import task_postrun
+
+from common.utils.idempotency import claim_key, content_key, submit_once
+
+# Cached result of one call, and per task an index of cached calls scored
+# by expiry time, which enforces the size cap (earliest to expire goes first)
+RESULT_KEY = "memo:{task_name}:{digest}"
+INDEX_KEY = "memo-index:{task_name}"
+
+
+def memoize(ttl=None, max_entries=None, claim_ttl=None):
+    """
+    Opt a deterministic task into result memoization:
+
+        @memoize(ttl=3600)
+        @celery.task
+        def digest_task(text, algorithm="sha256", rounds=1):
+            ...
+
+    Successful results are cached for `ttl` seconds under a hash of the
+    task name and arguments, at most `max_entries` per task. Submitted
+    through submit_memoized(), a cached call is answered without enqueuing
+    and identical calls attach to the one in flight (claimed for at most
+    `claim_ttl` seconds, by default twice the task's time limit). Defaults
+    come from the task_memo_* celery conf.
+
+    Only for tasks whose result depends on nothing but their (JSON)
+    arguments, and that don't change their arguments when retried.
+    """
+    def decorator(task):
+        task.memoize = {"ttl": ttl, "max_entries": max_entries, "claim_ttl": claim_ttl}
+        return task
+
+    return decorator
+
+
+def memo_options(task):
+    options = getattr(task, "memoize", None)
+    if options is None:
+        return None
+    conf = task.app.conf
+    # A claim outliving its run only makes identical calls wait on a task id
+    # that will never finish (e.g. its worker was killed): time for one queue
+    # wait and one run, when the task has a time limit
+    time_limit = task.time_limit or conf.get("task_time_limit")
+    return {
+        "ttl": options["ttl"] or conf.get("task_memo_ttl", 3600),
+        "max_entries": options["max_entries"] or conf.get("task_memo_max_entries", 10000),
+        "claim_ttl": (
+            options["claim_ttl"] or conf.get("task_memo_claim_ttl") or (2 * time_limit if time_limit else 3600)
+        ),
+    }
+
+
+def submit_memoized(redis_client, task, args=(), kwargs=None):
+    """
+    Submit a call of a memoized task. Returns (task_id, cached,
+    deduplicated, result): a cached result comes back with the id of the
+    run that produced it, otherwise the call is enqueued or attached to
+    the identical call in flight (deduplicated) and result is None.
+
+    `redis_client` must be the result backend's (task.app.backend.client),
+    which the workers write results to and release claims from.
+    """
+    options = memo_options(task)
+    digest = content_key(task.name, args, kwargs)
+    value = redis_client.get(RESULT_KEY.format(task_name=task.name, digest=digest))
+    if value is not None:
+        cached = json.loads(value)
+        return cached["task_id"], True, False, cached["result"]
+
+    task_id, deduplicated = submit_once(
+        redis_client, digest, task, args=args, kwargs=kwargs, ttl=options["claim_ttl"]
+    )
+    return task_id, False, deduplicated, None
+
+
+def store_result(redis_client, task_name, digest, task_id, result, ttl, max_entries, now=None):
+    now = time.time() if now is None else now
+    index = INDEX_KEY.format(task_name=task_name)
+    pipe = redis_client.pipeline()
+    pipe.set(
+        RESULT_KEY.format(task_name=task_name, digest=digest),
+        json.dumps({"task_id": task_id, "result": result}),
+        ex=ttl,
+    )
+    pipe.zadd(index, {digest: now + ttl})
+    pipe.zremrangebyscore(index, "-inf", now)  # already expired
+    pipe.zcard(index)
+    pipe.expire(index, ttl)  # goes away with its last entry
+    count = pipe.execute()[3]
+
+    if count > max_entries:
+        evicted = redis_client.zpopmin(index, count - max_entries)
+        redis_client.delete(*[
+            RESULT_KEY.format(task_name=task_name, digest=member.decode("utf-8"))
+            for member, _ in evicted
+        ])
+
+
+def release_claim(redis_client, task_name, digest, task_id):
+    # Only the run that claimed the call releases it; runs submitted some
+    # other way (batches, delay()) leave a concurrent claim alone
+    key = claim_key(task_name, digest)
+    if redis_client.get(key) == task_id.encode("utf-8"):
+        redis_client.delete(key)
+
+
+@task_postrun.connect
+def remember_result(task_id=None, task=None, args=None, kwargs=None, retval=None, state=None, **extra):
+    """
+    Cache the result of a successful memoized task run, then release the
+    in-flight claim of its call unless it is being retried.
+    """
+    options = memo_options(task) if task is not None else None
+    if options is None or state == states.RETRY:
+        return
+    digest = content_key(task.name, args or (), kwargs)
+    redis_client = task.app.backend.client
+    try:
+        if state == states.SUCCESS:
+            store_result(redis_client, task.name, digest, task_id, retval, options["ttl"], options["max_entries"])
+    except Exception:
+        pass  # the result was still returned; the next call recomputes it
+    try:
+        release_claim(redis_client, task.name, digest, task_id)
+    except Exception:
+        pass  # the claim expires after claim_ttl
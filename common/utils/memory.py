@@ -0,0 +1,222 @@
+import gc
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import tracemalloc
+import uuid
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Commands are published to every worker of every API node sharing the
+# Redis; each one answers on the reply list. Workers are told apart by host
+# and pid, as pids repeat across hosts
+HOST = socket.gethostname()
+CHANNEL = "memory-diagnostics"
+REPLY_KEY = "memory-diagnostics:{request_id}"
+COMMANDS = ("stats", "start", "stop", "snapshot", "recycle")
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Not Linux: only the peak is available
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def gc_stats():
+    return {
+        "counts": list(gc.get_count()),
+        "thresholds": list(gc.get_threshold()),
+        "collections": [generation["collections"] for generation in gc.get_stats()],
+        "uncollectable": [generation["uncollectable"] for generation in gc.get_stats()],
+        "frozen": gc.get_freeze_count(),
+    }
+
+
+def site(stat):
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+class WorkerDiagnostics:
+    """
+    Memory diagnostics of one worker process. A daemon thread listens for
+    commands on a Redis channel (so any worker can be reached whichever one
+    serves the admin request) and, with a `budget` in bytes, recycles the
+    worker once its RSS goes over it. tracemalloc only runs between the
+    "start" and "stop" commands.
+    """
+
+    def __init__(self, client, budget=0, check_interval=30.0, recycle=None):
+        self.client = client
+        self.budget = budget
+        self.check_interval = check_interval
+        self.recycle = recycle or self._recycle
+        self._previous = None
+        self._pid = None
+        self._subscribed = threading.Event()
+
+    def handle(self, command, limit=10):
+        if command == "start":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._previous = self._snapshot()
+        elif command == "stop":
+            tracemalloc.stop()
+            self._previous = None
+        elif command == "recycle":
+            self.recycle()
+
+        report = {
+            "host": HOST,
+            "pid": os.getpid(),
+            "rss_bytes": rss_bytes(),
+            "budget_bytes": self.budget or None,
+            "gc": gc_stats(),
+            "tracemalloc": self._tracemalloc_stats(),
+        }
+        if command == "snapshot":
+            if not tracemalloc.is_tracing():
+                report["error"] = "tracemalloc is not running, send 'start' first"
+                return report
+            snapshot = self._snapshot()
+            report["top"] = [
+                {"site": site(stat), "size": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:limit]
+            ]
+            # Growth since "start" or the previous snapshot
+            report["diff"] = [
+                {"site": site(stat), "size_diff": stat.size_diff, "count_diff": stat.count_diff, "size": stat.size}
+                for stat in snapshot.compare_to(self._previous, "lineno")[:limit]
+            ]
+            self._previous = snapshot
+        return report
+
+    @staticmethod
+    def _tracemalloc_stats():
+        if not tracemalloc.is_tracing():
+            return {"tracing": False}
+        current, peak = tracemalloc.get_traced_memory()
+        return {"tracing": True, "current_bytes": current, "peak_bytes": peak}
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    @staticmethod
+    def _recycle():
+        # gunicorn workers finish their current request on SIGTERM and the
+        # master starts a replacement
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def check_budget(self):
+        if self.budget and rss_bytes() > self.budget:
+            logger.warning("Worker %s is over its memory budget, recycling it", os.getpid())
+            self.recycle()
+            return True
+        return False
+
+    def start(self, timeout=1.0):
+        """Start the listener in this process, once per pid (threads don't survive fork)."""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._subscribed.clear()
+        threading.Thread(target=self._run, name="memory-diagnostics", daemon=True).start()
+        # Commands published before the subscription would be missed
+        self._subscribed.wait(timeout)
+
+    def _run(self):
+        last_check = time.monotonic()
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                pubsub.get_message(timeout=1.0)  # the subscribe confirmation
+                self._subscribed.set()
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._answer(message["data"])
+                    if time.monotonic() - last_check >= self.check_interval:
+                        last_check = time.monotonic()
+                        self.check_budget()
+            except Exception:
+                logger.exception("Memory diagnostics listener failed, reconnecting")
+                time.sleep(self.check_interval)
+
+    def _answer(self, data):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get("pid") is not None and (message["pid"], message.get("host")) != (os.getpid(), HOST):
+            return
+        # Reply before recycling, the process may be gone right after
+        command = message["command"]
+        report = self.handle("stats" if command == "recycle" else command, message.get("limit", 10))
+        key = REPLY_KEY.format(request_id=message["id"])
+        pipe = self.client.pipeline(transaction=False)
+        pipe.rpush(key, json.dumps(report))
+        pipe.expire(key, 60)
+        pipe.execute()
+        if command == "recycle":
+            self.recycle()
+
+
+def get_memory_diagnostics():
+    """This worker's WorkerDiagnostics, listening once started."""
+    diagnostics = current_app.extensions.get("memory_diagnostics")
+    if diagnostics is None:
+        from redis import Redis
+
+        # Its own client: the listener holds a connection and replies are
+        # awaited with a blocking pop longer than REDIS_SOCKET_TIMEOUT
+        client = Redis.from_url(
+            current_app.config["LIMITER_STORAGE"],
+            socket_connect_timeout=current_app.config["REDIS_SOCKET_TIMEOUT"],
+        )
+        diagnostics = current_app.extensions["memory_diagnostics"] = WorkerDiagnostics(
+            client,
+            budget=current_app.config["MEMORY_BUDGET_MB"] * 1024 * 1024,
+            check_interval=current_app.config["MEMORY_CHECK_INTERVAL"],
+        )
+    diagnostics.start()
+    return diagnostics
+
+
+def broadcast(command, host=None, pid=None, limit=10, timeout=2.0):
+    """
+    Send `command` to every worker (or the one with `pid` on `host`) and
+    collect the reports that arrive within `timeout` seconds.
+    """
+    client = get_memory_diagnostics().client
+    request_id = str(uuid.uuid4())
+    message = {"id": request_id, "command": command, "host": host, "pid": pid, "limit": limit}
+    listeners = client.publish(CHANNEL, json.dumps(message))
+    expected = min(listeners, 1) if pid is not None else listeners
+
+    key = REPLY_KEY.format(request_id=request_id)
+    reports = []
+    deadline = time.monotonic() + timeout
+    while len(reports) < expected:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        reply = client.blpop([key], timeout=remaining)
+        if reply is not None:
+            reports.append(json.loads(reply[1]))
+    return sorted(reports, key=lambda report: (report["host"], report["pid"])), expected - len(reports)
@@ -0,0 +1,87 @@
+import json
+import time
+
+# Progress lives next to the task meta, not in it: state changes (STARTED,
+# RETRY while deferred, ...) overwrite the meta but leave progress alone.
+PROGRESS_KEY = "task-progress:{task_id}"
+
+
+class TaskProgress:
+    """
+    Progress reporting for a bound task. Updates are kept in memory and
+    written at most once per `interval` seconds (task_progress_interval),
+    each write carrying only the latest update:
+
+        progress = TaskProgress(self)
+        for index, item in enumerate(items):
+            ...
+            progress.update(done=index + 1, total=len(items), stage="processing")
+        progress.flush()
+
+    Without an explicit `eta_at` (epoch seconds), the ETA is extrapolated
+    from the time taken so far in this run.
+    """
+
+    def __init__(self, task, interval=None, clock=time.monotonic):
+        self.task = task
+        self.interval = interval if interval is not None else task.app.conf.get("task_progress_interval", 2.0)
+        self.clock = clock
+        self.started = clock()
+        self.writes = 0
+        self._pending = None
+        self._last_write = None
+
+    def update(self, percent=None, done=None, total=None, stage=None, eta_at=None):
+        if percent is None:
+            percent = 100.0 * done / total if total else 0.0
+        percent = min(max(float(percent), 0.0), 100.0)
+        if eta_at is None and percent > 0:
+            elapsed = self.clock() - self.started
+            eta_at = time.time() + elapsed * (100 - percent) / percent
+        self._pending = {
+            "percent": round(percent, 1),
+            "stage": stage,
+            "eta_at": round(eta_at, 3) if eta_at is not None else None,
+            "updated_at": round(time.time(), 3),
+        }
+        if self._last_write is None or self.clock() - self._last_write >= self.interval:
+            self.flush()
+
+    def flush(self):
+        """Write the latest pending update now (e.g. before a long step)."""
+        if self._pending is None:
+            return
+        progress, self._pending = self._pending, None
+        self._last_write = self.clock()
+        backend = self.task.app.backend
+        try:
+            backend.client.set(
+                PROGRESS_KEY.format(task_id=self.task.request.id),
+                json.dumps(progress),
+                ex=int(backend.expires or 86400),
+            )
+            self.writes += 1
+        except Exception:
+            pass  # progress is informational; the task carries on
+
+
+def read_progress(client, task_ids, now=None):
+    """
+    Progress of many tasks in one MGET: {task_id: progress or None}, with
+    `eta_seconds` worked out from the stored `eta_at`.
+    """
+    if not task_ids:
+        return {}
+    now = time.time() if now is None else now
+    values = client.mget([PROGRESS_KEY.format(task_id=task_id) for task_id in task_ids])
+    progress = {}
+    for task_id, value in zip(task_ids, values):
+        try:
+            entry = json.loads(value) if value else None
+        except ValueError:
+            entry = None
+        if entry is not None:
+            eta_at = entry.pop("eta_at", None)
+            entry["eta_seconds"] = round(max(eta_at - now, 0.0), 1) if eta_at is not None else None
+        progress[task_id] = entry
+    return progress
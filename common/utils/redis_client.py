@@ -0,0 +1,147 @@
+import time
+
+from flask import current_app
+from redis import Connection
+from redis.asyncio import Connection as AsyncConnection
+from redis.exceptions import ConnectionError, TimeoutError
+
+
+class CircuitBreakerConnection(Connection):
+    """
+    Redis connection that reports every command to a CircuitBreaker and
+    refuses to send while the breaker is open. Passed as `connection_class`,
+    so all clients built from redis_options() share one breaker.
+    """
+
+    def __init__(self, *args, breaker=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = breaker
+        self._sent_at = None
+
+    def connect(self):
+        # Pools connect before sending, so refused connections and connect
+        # timeouts have to be counted here
+        if self._sock:
+            return
+        self.breaker.before_call()
+        try:
+            super().connect()
+        except (ConnectionError, TimeoutError):
+            self.breaker.record_failure()
+            raise
+
+    def send_packed_command(self, command, check_health=True):
+        self.breaker.before_call()
+        self._sent_at = time.monotonic()
+        try:
+            super().send_packed_command(command, check_health)
+        except (ConnectionError, TimeoutError):
+            self.breaker.record_failure()
+            raise
+
+    def read_response(self, *args, **kwargs):
+        try:
+            response = super().read_response(*args, **kwargs)
+        except (ConnectionError, TimeoutError):
+            self.breaker.record_failure()
+            raise
+        # Reply errors (e.g. NOSCRIPT) are raised by the caller, Redis itself
+        # answered. Timed from the previous reply: in a pipeline each reply
+        # only waits for its own command, not for every one before it
+        now = time.monotonic()
+        self.breaker.record_success(now - self._sent_at)
+        self._sent_at = now
+        return response
+
+
+class AsyncCircuitBreakerConnection(AsyncConnection):
+    """CircuitBreakerConnection for redis.asyncio clients, sharing the same breaker."""
+
+    def __init__(self, *args, breaker=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = breaker
+        self._sent_at = None
+
+    async def connect(self):
+        if self.is_connected:
+            return
+        self.breaker.before_call()
+        try:
+            await super().connect()
+        except (ConnectionError, TimeoutError):
+            self.breaker.record_failure()
+            raise
+
+    async def send_packed_command(self, command, check_health=True):
+        self.breaker.before_call()
+        self._sent_at = time.monotonic()
+        try:
+            await super().send_packed_command(command, check_health)
+        except (ConnectionError, TimeoutError):
+            self.breaker.record_failure()
+            raise
+
+    async def read_response(self, *args, **kwargs):
+        try:
+            response = await super().read_response(*args, **kwargs)
+        except (ConnectionError, TimeoutError):
+            self.breaker.record_failure()
+            raise
+        now = time.monotonic()
+        self.breaker.record_success(now - self._sent_at)
+        self._sent_at = now
+        return response
+
+
+def redis_options(app):
+    """Client options shared by get_redis() and the limiter storage."""
+    return {
+        "connection_class": CircuitBreakerConnection,
+        "breaker": app.extensions["redis_breaker"],
+        "socket_timeout": app.config["REDIS_SOCKET_TIMEOUT"],
+        "socket_connect_timeout": app.config["REDIS_SOCKET_TIMEOUT"],
+    }
+
+
+def get_redis():
+    """Redis client for LIMITER_STORAGE, created on first use."""
+    client = current_app.extensions.get("redis")
+    if client is None:
+        from redis import Redis
+
+        client = current_app.extensions["redis"] = Redis.from_url(
+            current_app.config["LIMITER_STORAGE"], **redis_options(current_app)
+        )
+    return client
+
+
+def get_broker_redis():
+    """Redis client for the Celery broker (e.g. to read queue lengths), created on first use."""
+    client = current_app.extensions.get("broker_redis")
+    if client is None:
+        from redis import Redis
+
+        from common.celery_app import celery
+
+        client = current_app.extensions["broker_redis"] = Redis.from_url(
+            celery.conf.broker_url, **redis_options(current_app)
+        )
+    return client
+
+
+def get_async_redis(url=None):
+    """
+    redis.asyncio client for `url` (LIMITER_STORAGE by default), created on
+    first use. Only for async views: the client belongs to the worker's
+    event loop (common/utils/event_loop.py).
+    """
+    url = url or current_app.config["LIMITER_STORAGE"]
+    clients = current_app.extensions.setdefault("async_redis", {})
+    client = clients.get(url)
+    if client is None:
+        from redis.asyncio import Redis
+
+        client = clients[url] = Redis.from_url(
+            url, **{**redis_options(current_app), "connection_class": AsyncCircuitBreakerConnection}
+        )
+    return client
@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from celery import states
+
+
+class _Lookup:
+    # One backend read shared by every caller that arrives while it's fresh
+    def __init__(self):
+        self.done = threading.Event()
+        self.started = time.monotonic()
+        self.meta = None
+        self.error = None
+
+
+class TaskStatusCache:
+    """
+    Per-worker front for task status reads.
+
+    Metas of tasks in a terminal state (SUCCESS, FAILURE, REVOKED) never
+    change, so up to `maxsize` of them, taking at most `maxbytes` together,
+    are kept in an LRU. Metas over `max_entry_bytes` (a large result) are
+    not cached and read again on every lookup. Lookups of the same
+    non-terminal task within `coalesce_window` seconds share a single
+    backend read instead of each issuing their own.
+    """
+
+    def __init__(
+        self, fetch, maxsize=1024, coalesce_window=0.5, maxbytes=16 * 1024 * 1024, max_entry_bytes=None
+    ):
+        self.fetch = fetch
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.max_entry_bytes = maxbytes // 64 if max_entry_bytes is None else max_entry_bytes
+        self.coalesce_window = coalesce_window
+        self._terminal = OrderedDict()  # task_id -> (meta, size)
+        self._bytes = 0
+        self._lookups = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "coalesced": 0, "backend_reads": 0, "too_large": 0}
+
+    def get(self, task_id):
+        with self._lock:
+            entry = self._terminal.get(task_id)
+            if entry is not None:
+                self._terminal.move_to_end(task_id)
+                self.stats["hits"] += 1
+                return entry[0]
+
+            lookup = self._lookups.get(task_id)
+            now = time.monotonic()
+            if lookup is not None and (
+                not lookup.done.is_set() or now - lookup.started < self.coalesce_window
+            ):
+                self.stats["coalesced"] += 1
+                owner = False
+            else:
+                lookup = self._lookups[task_id] = _Lookup()
+                self.stats["backend_reads"] += 1
+                owner = True
+                self._prune_lookups(now)
+
+        if owner:
+            self._read(task_id, lookup)
+        else:
+            lookup.done.wait()
+        if lookup.error is not None:
+            raise lookup.error
+        return lookup.meta
+
+    def _read(self, task_id, lookup):
+        try:
+            lookup.meta = self.fetch(task_id)
+        except Exception as e:
+            lookup.error = e
+            with self._lock:
+                # Don't hand the error to callers arriving after this one
+                if self._lookups.get(task_id) is lookup:
+                    del self._lookups[task_id]
+            raise
+        finally:
+            lookup.done.set()
+
+        if lookup.meta["status"] in states.READY_STATES:
+            size = meta_size(lookup.meta)
+            with self._lock:
+                if size > self.max_entry_bytes:
+                    self.stats["too_large"] += 1
+                else:
+                    previous = self._terminal.pop(task_id, None)
+                    if previous is not None:
+                        self._bytes -= previous[1]
+                    self._terminal[task_id] = (lookup.meta, size)
+                    self._bytes += size
+                    while len(self._terminal) > self.maxsize or self._bytes > self.maxbytes:
+                        _, (_, evicted) = self._terminal.popitem(last=False)
+                        self._bytes -= evicted
+                if self._lookups.get(task_id) is lookup:
+                    del self._lookups[task_id]
+
+    def _prune_lookups(self, now):
+        # Called with the lock held; drops finished lookups past their window
+        if len(self._lookups) <= self.maxsize:
+            return
+        for task_id, lookup in list(self._lookups.items()):
+            if lookup.done.is_set() and now - lookup.started >= self.coalesce_window:
+                del self._lookups[task_id]
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "size": len(self._terminal),
+            "maxsize": self.maxsize,
+            "bytes": self._bytes,
+            "maxbytes": self.maxbytes,
+        }
+
+
+def meta_size(meta):
+    # Rough in-memory footprint: results and tracebacks make up most of it
+    return len(json.dumps(meta, default=str))
@@ -0,0 +1,90 @@
+import json
+from itertools import islice
+
+from flask import Response, request, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+READ_SIZE = 64 * 1024
+MAX_LINE_SIZE = 1024 * 1024
+WRITE_SIZE = 64 * 1024
+
+
+class InvalidLine:
+    """Yielded by iter_ndjson in place of a line that couldn't be parsed."""
+
+    def __init__(self, line_number, error):
+        self.line_number = line_number
+        self.error = error
+
+
+def is_streaming_request():
+    # Bodies that are consumed incrementally by the view and must not be
+    # read ahead of it (e.g. by the request logger)
+    return request.mimetype == NDJSON_MIMETYPE
+
+
+def iter_ndjson(stream, read_size=READ_SIZE, max_line_size=MAX_LINE_SIZE):
+    """
+    Parse NDJSON incrementally from a file-like WSGI input stream.
+    At most one read buffer plus one line is held in memory at a time.
+    """
+    buffer, line_number, skipping = b"", 0, False
+    while True:
+        chunk = stream.read(read_size)
+        if chunk:
+            buffer += chunk
+        lines = buffer.split(b"\n")
+        # The last piece is incomplete until the next read (or EOF)
+        buffer = lines.pop() if chunk else b""
+        for line in lines:
+            if skipping:
+                # Tail of an oversized line that was already reported
+                skipping = False
+                continue
+            line_number += 1
+            if line.strip():
+                yield parse_line(line, line_number)
+        if len(buffer) > max_line_size:
+            line_number += 1
+            yield InvalidLine(line_number, "Line too long")
+            buffer, skipping = b"", True
+        if not chunk:
+            return
+
+
+def parse_line(line, line_number):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return InvalidLine(line_number, "Invalid JSON")
+
+
+def batched(iterable, size):
+    # Groups items so handlers can process them vectorized
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def ndjson_response(items, write_size=WRITE_SIZE, status=200):
+    """
+    Stream items as NDJSON. The WSGI server pulls the generator as it
+    writes to the client, so a slow reader pauses the producer instead of
+    letting output pile up in memory.
+    """
+
+    def generate():
+        pending, size = [], 0
+        for item in items:
+            line = json.dumps(item).encode("utf-8") + b"\n"
+            pending.append(line)
+            size += len(line)
+            if size >= write_size:
+                yield b"".join(pending)
+                pending, size = [], 0
+        if pending:
+            yield b"".join(pending)
+
+    return Response(stream_with_context(generate()), status=status, mimetype=NDJSON_MIMETYPE)
+
@@ -0,0 +1,171 @@
+import atexit
+import hashlib
+import os
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app, g, request
+
+# Redis layout, per API key and time bucket:
+#   usage:<key_id>:<bucket>      hash {"<route> requests|bytes_in|bytes_out": n}
+#   usage-ips:<key_id>:<bucket>  HyperLogLog of client IPs
+USAGE_KEY = "usage:{key_id}:{bucket}"
+IPS_KEY = "usage-ips:{key_id}:{bucket}"
+FIELDS = ["requests", "bytes_in", "bytes_out"]
+REDIS_SCHEMES = ("redis://", "rediss://", "unix://")
+
+
+def key_id(api_key):
+    # Raw API keys are never stored
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class UsageRecorder:
+    """
+    Per-worker usage accounting. Requests only update in-memory counters;
+    a background thread adds them to Redis every `flush_interval` seconds
+    in one pipeline, and once more when the process exits. Counters that
+    fail to flush are kept for the next attempt.
+
+    Pass `connect` instead of `client` to create the client on first use,
+    i.e. in the flusher thread rather than on the request path.
+    """
+
+    def __init__(self, client=None, bucket_seconds=300, flush_interval=10.0, retention=30 * 86400, connect=None):
+        self._client = client
+        self.connect = connect
+        self.bucket_seconds = bucket_seconds
+        self.flush_interval = flush_interval
+        self.retention = retention
+        self._counts = defaultdict(lambda: [0, 0, 0])
+        self._ips = defaultdict(set)
+        self._lock = threading.Lock()
+        self._pid = None
+        atexit.register(self.flush)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.connect()
+        return self._client
+
+    def record(self, api_key, route, ip, bytes_in, bytes_out):
+        if self._pid != os.getpid():
+            self._start()
+        bucket = int(time.time() // self.bucket_seconds * self.bucket_seconds)
+        owner = key_id(api_key)
+        with self._lock:
+            counts = self._counts[(owner, bucket, route)]
+            counts[0] += 1
+            counts[1] += bytes_in or 0
+            counts[2] += bytes_out or 0
+            if ip:
+                self._ips[(owner, bucket)].add(ip)
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._run, name="usage-flusher", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(lambda: [0, 0, 0])
+            ips, self._ips = self._ips, defaultdict(set)
+        if not counts and not ips:
+            return
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            touched = set()
+            for (owner, bucket, route), values in counts.items():
+                key = USAGE_KEY.format(key_id=owner, bucket=bucket)
+                for field, value in zip(FIELDS, values):
+                    if value:
+                        pipe.hincrby(key, f"{route} {field}", value)
+                touched.add(key)
+            for (owner, bucket), addresses in ips.items():
+                key = IPS_KEY.format(key_id=owner, bucket=bucket)
+                pipe.pfadd(key, *addresses)
+                touched.add(key)
+            for key in touched:
+                pipe.expire(key, self.retention)
+            pipe.execute()
+        except Exception:
+            # Merge back; HINCRBY is additive, so a later flush catches up
+            with self._lock:
+                for key, values in counts.items():
+                    current = self._counts[key]
+                    for index, value in enumerate(values):
+                        current[index] += value
+                for key, addresses in ips.items():
+                    self._ips[key].update(addresses)
+
+    def report(self, api_key, window, now=None):
+        """Totals and per-route usage of `api_key` over the last `window` seconds."""
+        owner = key_id(api_key)
+        now = time.time() if now is None else now
+        last = int(now // self.bucket_seconds * self.bucket_seconds)
+        buckets = range(last - (window // self.bucket_seconds) * self.bucket_seconds, last + 1, self.bucket_seconds)
+
+        pipe = self.client.pipeline(transaction=False)
+        for bucket in buckets:
+            pipe.hgetall(USAGE_KEY.format(key_id=owner, bucket=bucket))
+        # PFCOUNT over several keys counts the distinct IPs across all of them
+        pipe.pfcount(*[IPS_KEY.format(key_id=owner, bucket=bucket) for bucket in buckets])
+        *hashes, unique_ips = pipe.execute()
+
+        routes = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+        for fields in hashes:
+            for name, value in fields.items():
+                route, _, field = name.decode("utf-8").rpartition(" ")
+                routes[route][field] += int(value)
+        totals = {field: sum(route[field] for route in routes.values()) for field in FIELDS}
+        return {**totals, "unique_ips": unique_ips, "routes": dict(routes)}
+
+
+def get_usage():
+    """
+    Per-worker UsageRecorder, created on first use. None when
+    LIMITER_STORAGE isn't Redis (e.g. memory://): usage isn't recorded.
+    """
+    if "usage" not in current_app.extensions:
+        recorder = None
+        if current_app.config["LIMITER_STORAGE"].startswith(REDIS_SCHEMES):
+            app = current_app._get_current_object()
+
+            def connect():
+                from common.utils.redis_client import get_redis
+
+                with app.app_context():
+                    return get_redis()
+
+            recorder = UsageRecorder(
+                bucket_seconds=current_app.config["USAGE_BUCKET_SECONDS"],
+                flush_interval=current_app.config["USAGE_FLUSH_INTERVAL"],
+                retention=current_app.config["USAGE_RETENTION"],
+                connect=connect,
+            )
+        current_app.extensions["usage"] = recorder
+    return current_app.extensions["usage"]
+
+
+def record_usage(response):
+    # after_request hook: counts requests authenticated by require_api_key
+    recorder = get_usage() if "api_key" in g else None
+    if recorder is not None:
+        recorder.record(
+            g.api_key,
+            request.url_rule.rule if request.url_rule else request.path,
+            request.remote_addr,
+            request.content_length,
+            response.content_length,
+        )
+    return response
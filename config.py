@@ -11,499 +11,72 @@ class Config:
     PORT = int(os.getenv("FLASK_PORT", 5000))
     FLASK_ENV = os.getenv("FLASK_ENV", "development")
     LIMITER_STORAGE = os.getenv("LIMITER_STORAGE", "redis://localhost:6379/0")
-    WORDS_LIST = [
-        # Animals
-        "apple",
-        "banana",
-        "cherry",
-        "dragon",
-        "elephant",
-        "falcon",
-        "giraffe",
-        "hippo",
-        "iguana",
-        "jaguar",
-        "koala",
-        "lemur",
-        "monkey",
-        "narwhal",
-        "octopus",
-        "penguin",
-        "quokka",
-        "rabbit",
-        "squid",
-        "tiger",
-        "unicorn",
-        "viper",
-        "walrus",
-        "xenops",
-        "yak",
-        "zebra",
-        "dolphin",
-        "fox",
-        "goose",
-        "hawk",
-        "lion",
-        "otter",
-        "parrot",
-        "raven",
-        "shark",
-        "turtle",
-        "wolf",
-        "lynx",
-        "bison",
-        "cobra",
-        "deer",
-        "eagle",
-        "frog",
-        "gecko",
-        "honeybee",
-        "inchworm",
-        "jellyfish",
-        "kangaroo",
-        "lobster",
-        "mantis",
-        "newt",
-        "orca",
-        "panther",
-        "quail",
-        "raccoon",
-        "salmon",
-        "tarantula",
-        "urchin",
-        "vulture",
-        "whale",
-        "xerus",
-        "zebu",
-        "alligator",
-        "buffalo",
-        "cheetah",
-        "dingo",
-        "emu",
-        "flamingo",
-        "gazelle",
-        "hedgehog",
-        "ibis",
-        "jackal",
-        "kiwi",
-        "marmoset",
-        "numbat",
-        "oyster",
-        "peacock",
-        "quagga",
-        "robin",
-        "sparrow",
-        "toucan",
-        "vole",
-        "wombat",
-        "yellowtail",
-        "zorse",
-        "alpaca",
-        "bat",
-        "chameleon",
-        "duck",
-        "elk",
-        "ferret",
-        "gorilla",
-        "hamster",
-        "ibex",
-        "jaybird",
-        "koala",
-        "lemur",
-        "mongoose",
-        "newt",
-        "owl",
-        "dog",
-        "cat",
-        "cow",
-        "horse",
-        "donkey",
-        "rabbit",
-        "squirrel",
-        "bear",
-        "moose",
-        "rhinoceros",
-        "hedgehog",
-        "zebra",
-        "rat",
-        "mouse",
-        # Objects
-        "pencil",
-        "guitar",
-        "book",
-        "camera",
-        "piano",
-        "sun",
-        "moon",
-        "star",
-        "planet",
-        "car",
-        "truck",
-        "bicycle",
-        "umbrella",
-        "laptop",
-        "keyboard",
-        "monitor",
-        "cup",
-        "spoon",
-        "fork",
-        "knife",
-        "plate",
-        "table",
-        "chair",
-        "bed",
-        "lamp",
-        "sofa",
-        "window",
-        "door",
-        "phone",
-        "television",
-        "speaker",
-        "microphone",
-        "headphones",
-        "pen",
-        "backpack",
-        "wallet",
-        "watch",
-        "clock",
-        "fridge",
-        "oven",
-        "stove",
-        "microwave",
-        "toaster",
-        "blender",
-        "fan",
-        "heater",
-        "airconditioner",
-        "drone",
-        "robot",
-        "notebook",
-        "calendar",
-        "printer",
-        "scanner",
-        "projector",
-        "router",
-        "lightbulb",
-        "vacuum",
-        "mop",
-        "broom",
-        "bucket",
-        "shovel",
-        "hammer",
-        "drill",
-        # Places
-        "london",
-        "paris",
-        "berlin",
-        "tokyo",
-        "madrid",
-        "rome",
-        "beijing",
-        "cairo",
-        "moscow",
-        "ottawa",
-        "canberra",
-        "havana",
-        "nairobi",
-        "buenosaires",
-        "lisbon",
-        "stockholm",
-        "amsterdam",
-        "vienna",
-        "oslo",
-        "helsinki",
-        "jakarta",
-        "athens",
-        "brussels",
-        "bangkok",
-        "seoul",
-        "singapore",
-        "newyork",
-        "losangeles",
-        "chicago",
-        "sydney",
-        "mexicocity",
-        "delhi",
-        "shanghai",
-        "dubai",
-        "istanbul",
-        "capetown",
-        "hongkong",
-        "toronto",
-        "vancouver",
-        "rio",
-        "mumbai",
-        "santiago",
-        "kualaLumpur",
-        "zurich",
-        "copenhagen",
-        "seattle",
-        "boston",
-        "houston",
-        "orlando",
-        "miami",
-        "barcelona",
-        "birmingham",
-        "glasgow",
-        "manchester",
-        "dublin",
-        "edinburgh",
-        # Verbs
-        "run",
-        "jump",
-        "swim",
-        "drive",
-        "fly",
-        "walk",
-        "write",
-        "read",
-        "sing",
-        "dance",
-        "cook",
-        "clean",
-        "paint",
-        "draw",
-        "code",
-        "study",
-        "play",
-        "watch",
-        "listen",
-        "talk",
-        "laugh",
-        "cry",
-        "build",
-        "break",
-        "fix",
-        "cut",
-        "open",
-        "close",
-        "lock",
-        "unlock",
-        "speak",
-        "whisper",
-        "shout",
-        "think",
-        "create",
-        "design",
-        "invent",
-        "repair",
-        "teach",
-        "learn",
-        "teach",
-        "help",
-        "gather",
-        "plan",
-        # Adjectives
-        "happy",
-        "sad",
-        "angry",
-        "excited",
-        "scared",
-        "nervous",
-        "calm",
-        "brave",
-        "strong",
-        "weak",
-        "fast",
-        "slow",
-        "tall",
-        "short",
-        "big",
-        "small",
-        "heavy",
-        "light",
-        "loud",
-        "quiet",
-        "bright",
-        "dark",
-        "hard",
-        "soft",
-        "sharp",
-        "blunt",
-        "hot",
-        "cold",
-        "warm",
-        "cool",
-        "wet",
-        "dry",
-        "clean",
-        "dirty",
-        "smooth",
-        "rough",
-        "easy",
-        "difficult",
-        "simple",
-        "complex",
-        "quick",
-        "slow",
-        "cheap",
-        "expensive",
-        "old",
-        "new",
-        "young",
-        "ancient",
-        "modern",
-        "classical",
-        "funny",
-        "serious",
-        # Nature
-        "mountain",
-        "river",
-        "forest",
-        "desert",
-        "ocean",
-        "sky",
-        "cloud",
-        "stone",
-        "volcano",
-        "island",
-        "beach",
-        "lake",
-        "hill",
-        "valley",
-        "canyon",
-        "waterfall",
-        "cave",
-        "glacier",
-        "reef",
-        "bay",
-        "prairie",
-        "cliff",
-        "sand",
-        "mud",
-        "grass",
-        "flower",
-        "tree",
-        "bush",
-        "leaf",
-        "branch",
-        "root",
-        "seed",
-        "fruit",
-        "rain",
-        "snow",
-        "hail",
-        "storm",
-        "wind",
-        "breeze",
-        "thunder",
-        "lightning",
-        "fog",
-        # Food and Drinks
-        "pizza",
-        "burger",
-        "pasta",
-        "salad",
-        "bread",
-        "cheese",
-        "milk",
-        "juice",
-        "coffee",
-        "tea",
-        "cake",
-        "chocolate",
-        "icecream",
-        "cookies",
-        "steak",
-        "sushi",
-        "sandwich",
-        "tacos",
-        "fries",
-        "soup",
-        "pancake",
-        "waffle",
-        "bacon",
-        "egg",
-        "butter",
-        "yogurt",
-        "rice",
-        "noodles",
-        "fish",
-        "chicken",
-        "beef",
-        "pork",
-        "shrimp",
-        "lobster",
-        "crab",
-        "apple",
-        "banana",
-        "grape",
-        "orange",
-        "lemon",
-        "lime",
-        "pear",
-        "peach",
-        "mango",
-        "melon",
-        "watermelon",
-        "strawberry",
-        "blueberry",
-        "raspberry",
-        "blackberry",
-        "pineapple",
-        "plum",
-        "avocado",
-        "carrot",
-        "tomato",
-        "cucumber",
-        "pepper",
-        "onion",
-        "garlic",
-        "potato",
-        "corn",
-        "broccoli",
-        "spinach",
-        # Technology
-        "computer",
-        "internet",
-        "server",
-        "database",
-        "software",
-        "hardware",
-        "app",
-        "website",
-        "browser",
-        "search",
-        "download",
-        "upload",
-        "update",
-        "backup",
-        "cloud",
-        "algorithm",
-        "code",
-        "bug",
-        "error",
-        "debug",
-        "program",
-        "network",
-        "firewall",
-        "security",
-        "encryption",
-        "password",
-        "login",
-        "logout",
-        "data",
-        "system",
-        "device",
-        "mobile",
-        "tablet",
-        "smartphone",
-        "robot",
-        "drone",
-        "machine",
-        "bot",
-        "virtual",
-        "reality",
-        "blockchain",
-        "bitcoin",
-        "crypto",
-        "NFT",
-        "bitcoin",
-        "ether",
-        "token",
-        "smartcontract",
-        "ledger",
-    ]
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", 86400))  # 24 hours
+    IDEMPOTENCY_DEDUPE_TTL = int(os.getenv("IDEMPOTENCY_DEDUPE_TTL", 60))  # ?dedupe=true keys
+    BATCH_MAX_TASKS = int(os.getenv("BATCH_MAX_TASKS", 1000))
+    # Broker messages one /v1/tasks/revoke request may scan for its selection
+    REVOKE_SCAN_LIMIT = int(os.getenv("REVOKE_SCAN_LIMIT", 10000))
+    # Per-worker cache of finished task states, bounded by count and bytes
+    # (metas over 1/64th of the bytes aren't cached), and the window in
+    # which status polls of the same running task share one backend read
+    TASK_STATUS_CACHE_SIZE = int(os.getenv("TASK_STATUS_CACHE_SIZE", 1024))
+    TASK_STATUS_CACHE_BYTES = int(os.getenv("TASK_STATUS_CACHE_BYTES", 16 * 1024 * 1024))
+    TASK_STATUS_COALESCE_WINDOW = float(os.getenv("TASK_STATUS_COALESCE_WINDOW", 0.5))
+    # Admission control: task submissions are rejected once a broker queue
+    # reaches its high watermark, until it drains to the low one
+    # ("queue=high:low,..."; empty disables it)
+    ADMISSION_WATERMARKS = os.getenv("ADMISSION_WATERMARKS", "celery=1000:500")
+    ADMISSION_SAMPLE_INTERVAL = float(os.getenv("ADMISSION_SAMPLE_INTERVAL", 1.0))
+    ADMISSION_MAX_RETRY_AFTER = int(os.getenv("ADMISSION_MAX_RETRY_AFTER", 300))
+    # Redis circuit breaker: consecutive failures (errors or calls slower than
+    # REDIS_BREAKER_LATENCY seconds) open it for REDIS_BREAKER_RESET seconds,
+    # during which rate limits fall back to LIMITER_FALLBACK in memory
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 1.0))
+    REDIS_BREAKER_FAILURES = int(os.getenv("REDIS_BREAKER_FAILURES", 5))
+    REDIS_BREAKER_LATENCY = float(os.getenv("REDIS_BREAKER_LATENCY", 0.25))
+    REDIS_BREAKER_RESET = float(os.getenv("REDIS_BREAKER_RESET", 30))
+    LIMITER_FALLBACK = os.getenv("LIMITER_FALLBACK", "10/minute")
+    # Rate limits spread over several Redis nodes by consistent hashing
+    # (comma separated URLs, LIMITER_STORAGE is used when empty). Limit keys
+    # starting with a pinned prefix go to its node: "prefix=redis://...,..."
+    LIMITER_SHARDS = os.getenv("LIMITER_SHARDS", "")
+    LIMITER_SHARD_PINS = os.getenv("LIMITER_SHARD_PINS", "")
+    # How long browsers may cache CORS preflight answers (seconds)
+    CORS_MAX_AGE = int(os.getenv("CORS_MAX_AGE", 600))
+    # Gzip for clients sending Accept-Encoding: per-mimetype levels (others
+    # are never compressed) and the smallest buffered body worth compressing
+    COMPRESS_LEVELS = os.getenv(
+        "COMPRESS_LEVELS", "application/json=6,application/x-ndjson=1,text/html=6,text/plain=6"
+    )
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    # Per-API-key usage: counted in memory, flushed to Redis every
+    # USAGE_FLUSH_INTERVAL seconds into USAGE_BUCKET_SECONDS wide buckets
+    USAGE_BUCKET_SECONDS = int(os.getenv("USAGE_BUCKET_SECONDS", 300))
+    USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", 10))
+    USAGE_RETENTION = int(os.getenv("USAGE_RETENTION", 30 * 86400))
+    # Admin-only memory diagnostics (/admin/memory), off by default. With a
+    # MEMORY_BUDGET_MB, workers whose RSS goes over it are recycled (checked
+    # every MEMORY_CHECK_INTERVAL seconds). ADMIN_API_KEYS: comma separated
+    MEMORY_DIAGNOSTICS = os.getenv("MEMORY_DIAGNOSTICS", "False").lower() in ["true", "1", "t"]
+    MEMORY_BUDGET_MB = int(os.getenv("MEMORY_BUDGET_MB", 0))
+    MEMORY_CHECK_INTERVAL = float(os.getenv("MEMORY_CHECK_INTERVAL", 30))
+    MEMORY_DIAGNOSTICS_TIMEOUT = float(os.getenv("MEMORY_DIAGNOSTICS_TIMEOUT", 2.0))
+    ADMIN_API_KEYS = os.getenv("ADMIN_API_KEYS", "")
+    # Logging: rotated files are compressed in the background, and records
+    # are optionally shipped in batches to a Redis Stream
+    LOG_DIR = os.getenv("LOG_DIR", "logs")
+    LOG_COMPRESS_ROTATED = os.getenv("LOG_COMPRESS_ROTATED", "True").lower() in ["true", "1", "t"]
+    LOG_STREAM_URL = os.getenv("LOG_STREAM_URL", "")
+    LOG_STREAM_NAME = os.getenv("LOG_STREAM_NAME", "api_logs")
+    LOG_STREAM_MAXLEN = int(os.getenv("LOG_STREAM_MAXLEN", 100000))
+    LOG_STREAM_BATCH_SIZE = int(os.getenv("LOG_STREAM_BATCH_SIZE", 100))
+    LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 1.0))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))  # records waiting per log sink
+    # Loaded on first use (see v1/tools/scripts/utils.py)
+    WORDS_FILE = os.getenv(
+        "WORDS_FILE",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "v1", "tools", "scripts", "words.txt"),
+    )
 
 
 class DevelopmentConfig(Config):
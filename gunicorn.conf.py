@@ -0,0 +1,29 @@
+# Gunicorn configuration, picked up automatically from the working directory.
+# Workers, timeout, bind address and log level stay on the command line
+# (see services/api.service).
+import os
+
+from common import lifecycle
+
+# With GUNICORN_PRELOAD=true the app is built once in the master and workers
+# share its memory copy-on-write; otherwise every worker builds its own.
+preload_app = os.getenv("GUNICORN_PRELOAD", "False").lower() in ["true", "1", "t"]
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded and before any fork
+    if server.cfg.preload_app:
+        lifecycle.warm_up(server.app.wsgi())
+        lifecycle.before_fork()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        lifecycle.after_fork(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    # Without preload each worker loads the app itself, after the fork
+    if not worker.cfg.preload_app:
+        lifecycle.warm_up(worker.wsgi)
+    lifecycle.start_memory_diagnostics(worker.wsgi)
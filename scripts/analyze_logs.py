@@ -0,0 +1,183 @@
+"""
+Offline analyzer for the API's JSON request logs.
+
+    python -m scripts.analyze_logs logs/ [--json] [--top 10]
+
+Reads api_logs.log and its rotated siblings (api_logs.log.N and
+api_logs.log.N.gz), oldest first, one line at a time: plain files are
+memory-mapped and .gz files are decompressed as a stream, so whole files
+are never loaded. Only "Request Completed" records are parsed; per route
+it reports throughput, latency percentiles and status codes, plus the top
+clients by requester_ip and client_name.
+"""
+import argparse
+import gzip
+import json
+import math
+import mmap
+import os
+import re
+import sys
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime
+
+COMPLETED_MARKER = b'"Request Completed"'
+ROTATED_SUFFIX = re.compile(r"\.(\d+)(\.gz)?$")
+
+
+def log_files(log_dir, log_file_name="api_logs"):
+    """The current log file and its rotated siblings, oldest first."""
+    base = f"{log_file_name}.log"
+    rotated = []
+    for name in os.listdir(log_dir):
+        if not name.startswith(base):
+            continue
+        match = ROTATED_SUFFIX.fullmatch(name[len(base):])
+        if match:
+            rotated.append((int(match.group(1)), name))
+    # Higher numbers were rotated out earlier
+    files = [os.path.join(log_dir, name) for _, name in sorted(rotated, reverse=True)]
+    current = os.path.join(log_dir, base)
+    if os.path.exists(current):
+        files.append(current)
+    return files
+
+
+def iter_lines(path):
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            yield from f
+        return
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # mmap can't map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter(mapped.readline, b"")
+
+
+def completed_records(paths):
+    for path in paths:
+        for line in iter_lines(path):
+            # Cheap byte check before paying for json.loads
+            if COMPLETED_MARKER not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # e.g. a line cut short by a crash
+            if record.get("event") == "Request Completed":
+                yield record
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+def analyze(paths, top=10):
+    durations = defaultdict(lambda: array("d"))
+    statuses = defaultdict(Counter)
+    ips, clients = Counter(), Counter()
+    first_seen = last_seen = None
+
+    for record in completed_records(paths):
+        route = record.get("route") or record.get("path") or "<unknown>"
+        if record.get("duration_ms") is not None:
+            durations[route].append(float(record["duration_ms"]))
+        statuses[route][str(record.get("status"))] += 1
+        ips[record.get("requester_ip") or "<unknown>"] += 1
+        if record.get("client_name"):
+            clients[record["client_name"]] += 1
+
+        timestamp = parse_timestamp(record.get("timestamp"))
+        if timestamp is not None:
+            first_seen = timestamp if first_seen is None else min(first_seen, timestamp)
+            last_seen = timestamp if last_seen is None else max(last_seen, timestamp)
+
+    span = (last_seen - first_seen) if first_seen is not None else 0
+    routes = {}
+    for route, counts in statuses.items():
+        values = sorted(durations[route])
+        total = sum(counts.values())
+        routes[route] = {
+            "count": total,
+            "rps": round(total / span, 3) if span > 0 else None,
+            "p50_ms": percentile(values, 50),
+            "p90_ms": percentile(values, 90),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1] if values else None,
+            "status": dict(sorted(counts.items())),
+        }
+
+    return {
+        "files": paths,
+        "requests": sum(route["count"] for route in routes.values()),
+        "span_seconds": round(span, 3),
+        "routes": dict(sorted(routes.items(), key=lambda item: -item[1]["count"])),
+        "top_ips": ips.most_common(top),
+        "top_clients": clients.most_common(top),
+    }
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_report(report, out=sys.stdout):
+    print(
+        f"{report['requests']} requests over {report['span_seconds']}s "
+        f"in {len(report['files'])} file(s)",
+        file=out,
+    )
+    print(
+        f"\n{'route':<40}{'count':>8}{'req/s':>9}{'p50':>9}{'p90':>9}{'p99':>9}"
+        f"{'max':>9}  status",
+        file=out,
+    )
+    for route, stats in report["routes"].items():
+        rps = "-" if stats["rps"] is None else f"{stats['rps']:.2f}"
+        status = " ".join(f"{code}:{n}" for code, n in stats["status"].items())
+        print(
+            f"{route:<40}{stats['count']:>8}{rps:>9}{format_ms(stats['p50_ms']):>9}"
+            f"{format_ms(stats['p90_ms']):>9}{format_ms(stats['p99_ms']):>9}"
+            f"{format_ms(stats['max_ms']):>9}  {status}",
+            file=out,
+        )
+    for title, rows in [("requester_ip", report["top_ips"]), ("client_name", report["top_clients"])]:
+        print(f"\ntop {title}", file=out)
+        for name, count in rows:
+            print(f"  {name:<38}{count:>8}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("log_dir", nargs="?", default="logs")
+    parser.add_argument("--name", default="api_logs", help="log file name without .log")
+    parser.add_argument("--top", type=int, default=10, help="number of top clients shown")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    paths = log_files(args.log_dir, args.name)
+    if not paths:
+        parser.error(f"no {args.name}.log files in {args.log_dir}")
+    report = analyze(paths, top=args.top)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
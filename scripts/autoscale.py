@@ -0,0 +1,200 @@
+"""
+Autoscaler for the Celery worker pools, driven by queue depth and task runtime.
+
+    python -m scripts.autoscale [--queue celery] [--min 2] [--max 16] [--dry-run]
+
+Every `--interval` seconds it reads the queue length (LLEN on the Redis
+broker), the number of tasks being executed and the average task runtime
+(recorded by the workers, see common/task_metrics.py). From these it works
+out how many processes are needed to empty the queue within
+`--target-latency` seconds.
+It then grows or shrinks every worker's pool with Celery's pool_grow and
+pool_shrink control commands (prefork pool). Scaling down waits for a
+`--hysteresis` margin and a longer cooldown than scaling up, so the pool
+doesn't flap.
+"""
+import argparse
+import logging
+import math
+import os
+import time
+
+from common.task_metrics import RUNTIME_KEY
+
+logger = logging.getLogger("autoscaler")
+
+
+class Autoscaler:
+    """Scaling policy: decides the per-worker pool size, no I/O."""
+
+    def __init__(
+        self,
+        min_size,
+        max_size,
+        target_latency=60.0,
+        hysteresis=0.25,
+        up_cooldown=30.0,
+        down_cooldown=120.0,
+        default_runtime=1.0,
+    ):
+        if not 1 <= min_size <= max_size:
+            raise ValueError("Pool size bounds must satisfy 1 <= min <= max")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.hysteresis = hysteresis
+        self.up_cooldown = up_cooldown
+        self.down_cooldown = down_cooldown
+        self.runtime = default_runtime
+        self.last_change = float("-inf")
+
+    def desired_size(self, depth, active, workers):
+        # Processes needed for the tasks running now plus the queued work
+        # spread over target_latency, split evenly across workers
+        needed = active + depth * self.runtime / self.target_latency
+        per_worker = math.ceil(needed / max(1, workers))
+        return min(self.max_size, max(self.min_size, per_worker))
+
+    def decide(self, now, depth, active, workers, current, runtime=None):
+        """Returns the new per-worker pool size (== current for no change)."""
+        if runtime:
+            self.runtime = runtime
+        desired = self.desired_size(depth, active, workers)
+        # Bounds changed or a worker came up out of range: fix it right away
+        if not self.min_size <= current <= self.max_size:
+            desired = min(self.max_size, max(self.min_size, current))
+        elif desired > current:
+            if now - self.last_change < self.up_cooldown:
+                return current
+        elif desired < current:
+            if now - self.last_change < self.down_cooldown:
+                return current
+            # Ignore small dips, keep capacity that's about to be needed again
+            if desired > current * (1 - self.hysteresis):
+                return current
+        else:
+            return current
+        self.last_change = now
+        return desired
+
+
+class QueueMetrics:
+    """
+    Reads queue depth from the broker and the average task runtime from the
+    result backend, where the workers record it.
+    """
+
+    def __init__(self, broker, backend, queue):
+        self.broker = broker
+        self.backend = backend
+        self.queue = queue
+        self._last_totals = None
+
+    def depth(self):
+        return self.broker.llen(self.queue)
+
+    def runtime(self):
+        """Average runtime of the tasks finished since the last call, or None."""
+        totals = self.backend.hgetall(RUNTIME_KEY.format(queue=self.queue))
+        tasks = int(totals.get(b"tasks", 0))
+        seconds = float(totals.get(b"seconds", 0))
+        previous, self._last_totals = self._last_totals, (tasks, seconds)
+        if previous is None or tasks <= previous[0]:
+            return None
+        return (seconds - previous[1]) / (tasks - previous[0])
+
+
+def pool_size(pool):
+    # "max-concurrency" is the size the worker started with: pool_grow and
+    # pool_shrink don't update it, only the prefork pool's process list
+    processes = pool.get("processes")
+    return len(processes) if processes is not None else pool["max-concurrency"]
+
+
+class CeleryPool:
+    """Reads and resizes worker pools through Celery's remote control."""
+
+    def __init__(self, celery, timeout=2.0):
+        self.celery = celery
+        self.timeout = timeout
+        self.sizes = {}
+
+    def state(self):
+        """(workers, smallest pool size, active tasks); keeps each worker's size for resize()"""
+        inspect = self.celery.control.inspect(timeout=self.timeout)
+        stats = inspect.stats() or {}
+        active = inspect.active() or {}
+        self.sizes = {worker: pool_size(info["pool"]) for worker, info in stats.items()}
+        return len(self.sizes), min(self.sizes.values(), default=0), sum(len(tasks) for tasks in active.values())
+
+    def resize(self, size):
+        # Each worker moves from its own size to `size` (already within
+        # bounds): one delta broadcast to all of them would push pools of
+        # different sizes past --min/--max
+        for worker, current in self.sizes.items():
+            if size > current:
+                self.celery.control.pool_grow(size - current, destination=[worker])
+            elif size < current:
+                self.celery.control.pool_shrink(current - size, destination=[worker])
+            self.sizes[worker] = size
+
+
+def run(autoscaler, metrics, pool, interval, dry_run=False, ticks=None):
+    tick = 0
+    while ticks is None or tick < ticks:
+        tick += 1
+        workers, current, active = pool.state()
+        if workers:
+            depth = metrics.depth()
+            size = autoscaler.decide(
+                time.monotonic(), depth, active, workers, current, runtime=metrics.runtime()
+            )
+            logger.info(
+                "queue=%s depth=%d active=%d workers=%d pool=%d runtime=%.2fs -> %d",
+                metrics.queue, depth, active, workers, current, autoscaler.runtime, size,
+            )
+            if not dry_run:
+                # Also brings workers that differ from the smallest pool in line
+                pool.resize(size)
+        else:
+            logger.warning("No workers answered")
+        if ticks is None or tick < ticks:
+            time.sleep(interval)
+
+
+def main(argv=None):
+    env = os.getenv
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queue", default=env("AUTOSCALE_QUEUE", "celery"))
+    parser.add_argument("--min", type=int, default=int(env("AUTOSCALE_MIN", 2)))
+    parser.add_argument("--max", type=int, default=int(env("AUTOSCALE_MAX", 16)))
+    parser.add_argument("--target-latency", type=float, default=float(env("AUTOSCALE_TARGET_LATENCY", 60)),
+                        help="seconds the queued work should take to drain")
+    parser.add_argument("--hysteresis", type=float, default=float(env("AUTOSCALE_HYSTERESIS", 0.25)),
+                        help="fraction the pool must be oversized by before shrinking")
+    parser.add_argument("--up-cooldown", type=float, default=float(env("AUTOSCALE_UP_COOLDOWN", 30)))
+    parser.add_argument("--down-cooldown", type=float, default=float(env("AUTOSCALE_DOWN_COOLDOWN", 120)))
+    parser.add_argument("--interval", type=float, default=float(env("AUTOSCALE_INTERVAL", 5)))
+    parser.add_argument("--dry-run", action="store_true", help="log decisions without resizing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    from redis import Redis
+
+    from common.celery_app import celery
+
+    autoscaler = Autoscaler(
+        args.min,
+        args.max,
+        target_latency=args.target_latency,
+        hysteresis=args.hysteresis,
+        up_cooldown=args.up_cooldown,
+        down_cooldown=args.down_cooldown,
+    )
+    metrics = QueueMetrics(Redis.from_url(celery.conf.broker_url), celery.backend.client, args.queue)
+    run(autoscaler, metrics, CeleryPool(celery), args.interval, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Replays recorded production traffic against a local instance of the API.
+
+    python -m scripts.replay logs/ [--speed 1] [--api-keys KEY,...] [--redis-url URL] [--eager] [--json]
+    python -m scripts.replay logs/ --speed 0 --url http://localhost:5000
+
+Requests are rebuilt from the "Incoming Request" records of api_logs.log
+and its rotated siblings (method, path, headers and body) and sent with
+their original spacing, `--speed` times faster (0: as fast as
+`--concurrency` allows). Redacted API keys are replaced with keys from
+`--api-keys`, one per original client IP so per-key limits and usage look
+like production.
+
+By default the app runs in this process (so each client keeps its
+original IP) against `--redis-url` (a local redis-server or fakeredis,
+redis://localhost:6379/0 by default) for rate limits, broker and results,
+whatever .env says. Its own request logs go to a temporary LOG_DIR
+rather than into the logs being replayed, and no log stream is written.
+Replaying against a Redis on another host is refused without
+`--allow-remote-redis`. Task submissions go to that Redis for a local
+worker, or run in this process with `--eager`. With `--url`, requests go
+over HTTP to a server started separately.
+
+Throughput, latency percentiles and error rates are reported per route.
+Query strings and streamed bodies aren't logged, so requests are sent
+without query strings and streamed uploads are skipped.
+"""
+import argparse
+import http.client
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from werkzeug.exceptions import HTTPException
+
+from scripts.analyze_logs import format_ms, iter_lines, log_files, parse_timestamp, percentile
+
+INCOMING_MARKER = b'"Incoming Request"'
+REDACTED = "REDACTED"
+# Set by the client or the server, not part of the recorded request
+SKIPPED_HEADERS = {"Host", "Content-Length", "Transfer-Encoding", "Connection"}
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+REDIS_URL_PATTERN = re.compile(r"rediss?://[^,\s]+")
+
+
+class Recorded:
+    __slots__ = ("offset", "method", "path", "headers", "body", "ip")
+
+    def __init__(self, offset, method, path, headers, body, ip):
+        self.offset = offset
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.ip = ip
+
+
+def load_requests(paths, api_keys=("replay-key",)):
+    """Recorded requests in log order, `offset` in seconds from the first one."""
+    requests, skipped = [], 0
+    keys_by_ip = {}
+    start = None
+    for path in paths:
+        for line in iter_lines(path):
+            if INCOMING_MARKER not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("event") != "Incoming Request" or not record.get("path"):
+                continue
+            if record.get("body") == "<streamed>":
+                skipped += 1
+                continue
+
+            ip = record.get("requester_ip") or "127.0.0.1"
+            headers = {}
+            for name, value in (record.get("headers") or {}).items():
+                if name in SKIPPED_HEADERS:
+                    continue
+                if value == REDACTED:
+                    value = keys_by_ip.setdefault(ip, api_keys[len(keys_by_ip) % len(api_keys)])
+                headers[name] = value
+
+            timestamp = parse_timestamp(record.get("timestamp"))
+            if start is None and timestamp is not None:
+                start = timestamp
+            offset = 0.0 if timestamp is None or start is None else max(0.0, timestamp - start)
+            requests.append(Recorded(
+                offset, record.get("method", "GET"), record["path"], headers,
+                (record.get("body") or "").encode("utf-8"), ip,
+            ))
+    return requests, skipped
+
+
+def use_redis(redis_url):
+    """
+    Point the in-process app at `redis_url` for everything it keeps in
+    Redis. Must run before the app is imported: .env doesn't override
+    variables that are already set.
+    """
+    os.environ["LIMITER_STORAGE"] = redis_url
+    os.environ["REDIS_URL"] = redis_url
+    os.environ["LIMITER_SHARDS"] = ""
+    os.environ["LIMITER_SHARD_PINS"] = ""
+    os.environ["LOG_STREAM_URL"] = ""
+
+
+def remote_redis_hosts(app, celery):
+    """Hosts of the Redis servers the app would use that aren't this machine."""
+    settings = [
+        app.config["LIMITER_STORAGE"], app.config["LIMITER_SHARDS"], app.config["LIMITER_SHARD_PINS"],
+        app.config["LOG_STREAM_URL"], celery.conf.broker_url, str(celery.conf.result_backend),
+    ]
+    urls = [url for setting in settings for url in REDIS_URL_PATTERN.findall(setting or "")]
+    # Hosts only: the URLs may carry passwords
+    return sorted({urlsplit(url).hostname for url in urls} - LOCAL_HOSTS)
+
+
+def route_for(url_map, method, path):
+    # Reported the way log_request_completion names routes
+    try:
+        rule, _ = url_map.bind("localhost").match(path, method, return_rule=True)
+        return rule.rule
+    except HTTPException:
+        return path
+
+
+class LocalTarget:
+    """The app in this process, one test client per thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def send(self, recorded):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(
+            recorded.path,
+            method=recorded.method,
+            headers=recorded.headers,
+            data=recorded.body,
+            environ_base={"REMOTE_ADDR": recorded.ip},
+        )
+        response.get_data()  # streamed responses are timed to the last byte
+        response.close()
+        return response.status_code
+
+
+class HttpTarget:
+    """A separately started server, one keep-alive connection per thread."""
+
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, recorded):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request(recorded.method, self.prefix + recorded.path, body=recorded.body or None, headers=recorded.headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            raise
+
+
+def replay(requests, target, url_map, speed=1.0, concurrency=16):
+    """
+    Send `requests` to `target` and time them. With `speed` > 0 each one
+    is sent at its recorded offset divided by `speed`; `lag` is how far
+    the sends fell behind that schedule (the pool was saturated).
+    """
+    durations = defaultdict(lambda: array("d"))
+    statuses = defaultdict(Counter)
+    lock = threading.Lock()
+    lag = 0.0
+
+    def send(recorded):
+        route = route_for(url_map, recorded.method, recorded.path)
+        start = time.perf_counter()
+        try:
+            status = str(target.send(recorded))
+        except Exception as e:
+            status = type(e).__name__
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with lock:
+            durations[route].append(elapsed_ms)
+            statuses[route][status] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if speed > 0:
+            for recorded in requests:
+                delay = recorded.offset / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    lag = max(lag, -delay)
+                pool.submit(send, recorded)
+        else:
+            # Bounded so a large log isn't queued up front
+            slots = threading.Semaphore(concurrency * 2)
+
+            def release(_):
+                slots.release()
+
+            for recorded in requests:
+                slots.acquire()
+                pool.submit(send, recorded).add_done_callback(release)
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for route, counts in statuses.items():
+        values = sorted(durations[route])
+        total = sum(counts.values())
+        # Server errors and requests that got no response at all
+        errors = sum(n for status, n in counts.items() if not status.isdigit() or int(status) >= 500)
+        routes[route] = {
+            "count": total,
+            "rps": round(total / elapsed, 3) if elapsed > 0 else None,
+            "p50_ms": percentile(values, 50),
+            "p90_ms": percentile(values, 90),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1] if values else None,
+            "error_rate": round(errors / total, 4),
+            "status": dict(sorted(counts.items())),
+        }
+    total = sum(route["count"] for route in routes.values())
+    return {
+        "requests": total,
+        "elapsed_seconds": round(elapsed, 3),
+        "rps": round(total / elapsed, 3) if elapsed > 0 else None,
+        "max_lag_seconds": round(lag, 3),
+        "routes": dict(sorted(routes.items(), key=lambda item: -item[1]["count"])),
+    }
+
+
+def print_report(report, out=sys.stdout):
+    print(
+        f"{report['requests']} requests in {report['elapsed_seconds']}s "
+        f"({report['rps']} req/s, up to {report['max_lag_seconds']}s behind schedule)",
+        file=out,
+    )
+    print(
+        f"\n{'route':<40}{'count':>8}{'req/s':>9}{'p50':>9}{'p90':>9}{'p99':>9}"
+        f"{'max':>9}{'errors':>8}  status",
+        file=out,
+    )
+    for route, stats in report["routes"].items():
+        rps = "-" if stats["rps"] is None else f"{stats['rps']:.2f}"
+        status = " ".join(f"{code}:{n}" for code, n in stats["status"].items())
+        print(
+            f"{route:<40}{stats['count']:>8}{rps:>9}{format_ms(stats['p50_ms']):>9}"
+            f"{format_ms(stats['p90_ms']):>9}{format_ms(stats['p99_ms']):>9}"
+            f"{format_ms(stats['max_ms']):>9}{stats['error_rate']:>8.1%}  {status}",
+            file=out,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("log_dir", nargs="?", default="logs")
+    parser.add_argument("--name", default="api_logs", help="log file name without .log")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor, 0 for as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at most")
+    parser.add_argument("--api-keys", default="replay-key", help="comma separated keys replacing redacted ones")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--url", help="replay over HTTP against a running server instead of in-process")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0", help="Redis of the in-process app")
+    parser.add_argument("--allow-remote-redis", action="store_true", help="allow a --redis-url on another host")
+    parser.add_argument("--eager", action="store_true", help="run tasks in this process instead of a worker")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    paths = log_files(args.log_dir, args.name)
+    if not paths:
+        parser.error(f"no {args.name}.log files in {args.log_dir}")
+    api_keys = [key.strip() for key in args.api_keys.split(",") if key.strip()]
+    requests, skipped = load_requests(paths, api_keys or ["replay-key"])
+    if args.limit is not None:
+        requests = requests[:args.limit]
+
+    if not args.url:
+        use_redis(args.redis_url)
+        os.environ["LOG_DIR"] = tempfile.mkdtemp(prefix="replay-logs-")
+    from app import app
+    from common.celery_app import celery
+
+    if args.url:
+        target = HttpTarget(args.url)
+    else:
+        remote = remote_redis_hosts(app, celery)
+        if remote and not args.allow_remote_redis:
+            parser.error(f"refusing to replay against a remote Redis ({', '.join(remote)}); pass --allow-remote-redis")
+        if os.path.realpath(app.config["LOG_DIR"]) == os.path.realpath(args.log_dir):
+            parser.error(f"the app logs to {args.log_dir}, the logs being replayed; set LOG_DIR elsewhere")
+        if args.eager:
+            celery.conf.task_always_eager = True
+        target = LocalTarget(app)
+
+    report = replay(requests, target, app.url_map, speed=args.speed, concurrency=args.concurrency)
+    report["skipped_streamed"] = skipped
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+        if skipped:
+            print(f"\n{skipped} streamed request(s) skipped")
+
+
+if __name__ == "__main__":
+    main()
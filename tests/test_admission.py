@@ -0,0 +1,76 @@
+import pytest
+from app import app
+from common.utils.admission import AdmissionController, parse_watermarks
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+class FakeBroker:
+    # Answers LLEN with the given depths, one per sample
+    def __init__(self, *depths):
+        self.depths = list(depths)
+
+    def llen(self, queue):
+        return self.depths.pop(0) if len(self.depths) > 1 else self.depths[0]
+
+
+def controller(*depths, high=100, low=50):
+    return AdmissionController(FakeBroker(*depths), {"celery": (high, low)}, sample_interval=0)
+
+
+def test_parse_watermarks():
+    assert parse_watermarks("celery=1000:500, reports=200") == {
+        "celery": (1000, 500),
+        "reports": (200, 200),
+    }
+    assert parse_watermarks("") == {}
+    with pytest.raises(ValueError):
+        parse_watermarks("celery=10:20")
+
+
+def test_sheds_between_watermarks():
+    admission = controller(10, 100, 80, 50, 60)
+    assert admission.admit("celery") is None
+    assert admission.admit("celery") is not None  # reached high
+    assert admission.admit("celery") is not None  # still above low
+    assert admission.admit("celery") is None  # drained to low
+    assert admission.admit("celery") is None
+    assert admission.stats == {"admitted": 3, "rejected": 2}
+
+
+def test_unknown_queues_are_admitted():
+    assert controller(1000).admit("other") is None
+
+
+def test_depth_is_sampled_once_per_interval():
+    broker = FakeBroker(10, 500)
+    admission = AdmissionController(broker, {"celery": (100, 50)}, sample_interval=60)
+    for _ in range(5):
+        assert admission.admit("celery") is None
+    assert broker.depths == [500]  # only the first depth was read
+
+
+def test_retry_after_follows_drain_rate():
+    admission = controller(200, high=100, low=50)
+    assert admission.admit("celery") == admission.max_retry_after  # no rate measured yet
+
+    state = admission._queues["celery"]
+    state.drain_rate = 10.0
+    # (200 - 50) tasks at 10 tasks/s
+    assert admission.retry_after("celery") == 15
+
+
+def test_task_routes_return_503_while_shedding(client):
+    app.extensions["admission"] = controller(5000)
+    try:
+        response = client.get('/v1/tasks/RunBackgroundTask')
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "300"
+        assert client.get('/metrics').json["admission"]["queues"]["celery"]["shedding"] is True
+    finally:
+        app.extensions.pop("admission")
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+import uuid
+from unittest.mock import patch
+
+import pytest
+from flask import request
+
+from app import app
+from common.celery_app import celery
+from common.utils.event_loop import WorkerEventLoop
+from common.utils.limiter import limiter
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    limiter.reset()
+    with app.test_client() as client:
+        yield client
+
+
+def test_coroutines_run_on_one_loop_with_the_request_context():
+    event_loop = WorkerEventLoop()
+    threads = set()
+
+    async def view():
+        threads.add(threading.current_thread().name)
+        await asyncio.sleep(0)
+        return request.path
+
+    with app.test_request_context("/some/path"):
+        assert event_loop.async_to_sync(view)() == "/some/path"
+        assert event_loop.run(view) == "/some/path"
+    assert threads == {"event-loop"}
+
+
+def test_exceptions_reach_the_caller():
+    async def fail():
+        raise KeyError("boom")
+
+    with pytest.raises(KeyError):
+        WorkerEventLoop().run(fail)
+
+
+def test_api_key_is_checked_before_the_async_view(client):
+    with patch('v1.tasks.routes.celery.control.inspect') as mock_inspect:
+        assert client.get('/v1/tasks/GetPendingRequests').status_code == 401
+    mock_inspect.assert_not_called()
+
+
+@patch('v1.tasks.routes.celery.control.inspect')
+def test_pending_requests_inspect_concurrently(mock_inspect, client):
+    def slow(result):
+        def call():
+            time.sleep(0.3)
+            return result
+        return call
+
+    done, running = str(uuid.uuid4()), str(uuid.uuid4())
+    mock_inspect.return_value.active = slow({"worker1": [{"id": done}, {"id": running}]})
+    mock_inspect.return_value.scheduled = slow({"worker1": [{"eta": "...", "request": {"id": "later"}}]})
+    mock_inspect.return_value.reserved = slow(None)
+    celery.backend.store_result(done, "ok", "SUCCESS")
+    try:
+        started = time.monotonic()
+        response = client.get('/v1/tasks/GetPendingRequests', headers={"X-Api-Key": "key"})
+        assert time.monotonic() - started < 0.6  # not 3 x 0.3s
+    finally:
+        celery.backend.forget(done)
+
+    assert response.status_code == 200
+    assert [(task["task_id"], task["state"], task["type"]) for task in response.json["response"]] == [
+        (running, "PENDING", "active"), ("later", "PENDING", "scheduled"),
+    ]
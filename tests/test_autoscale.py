@@ -0,0 +1,165 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from redis import Redis
+
+from common import task_metrics
+from common.task_metrics import RUNTIME_KEY
+from scripts.autoscale import Autoscaler, CeleryPool, QueueMetrics, run
+
+
+@pytest.fixture
+def redis_client():
+    return Redis.from_url("redis://localhost:6379/0")
+
+
+@pytest.fixture
+def queue(redis_client):
+    name = f"test-queue-{uuid.uuid4()}"
+    yield name
+    redis_client.delete(name, RUNTIME_KEY.format(queue=name))
+
+
+def autoscaler(**kwargs):
+    options = dict(target_latency=10, hysteresis=0.25, up_cooldown=30, down_cooldown=120)
+    options.update(kwargs)
+    return Autoscaler(2, 16, **options)
+
+
+def test_scales_up_with_queued_work():
+    scaler = autoscaler()
+    # 4 running + 120 queued tasks of 1s to drain in 10s -> 16 processes over 2 workers
+    assert scaler.decide(0, depth=120, active=4, workers=2, current=4, runtime=1.0) == 8
+
+
+def test_size_stays_within_bounds():
+    scaler = autoscaler()
+    assert scaler.decide(0, depth=100000, active=0, workers=1, current=4) == 16
+    scaler = autoscaler()
+    assert scaler.decide(0, depth=0, active=0, workers=1, current=1) == 2
+
+
+def test_cooldowns_delay_further_changes():
+    scaler = autoscaler()
+    assert scaler.decide(0, depth=100, active=0, workers=1, current=2) == 10
+    assert scaler.decide(10, depth=200, active=0, workers=1, current=10) == 10
+    assert scaler.decide(31, depth=200, active=0, workers=1, current=10) == 16
+    # Empty queue: shrinking waits for the longer down cooldown
+    assert scaler.decide(100, depth=0, active=0, workers=1, current=16) == 16
+    assert scaler.decide(152, depth=0, active=0, workers=1, current=16) == 2
+
+
+def test_small_dips_do_not_shrink_the_pool():
+    scaler = autoscaler(down_cooldown=0)
+    # 8 -> 7 is within the 25% hysteresis band
+    assert scaler.decide(0, depth=0, active=7, workers=1, current=8) == 8
+    assert scaler.decide(1, depth=0, active=5, workers=1, current=8) == 5
+
+
+def test_queue_metrics_read_redis(redis_client, queue):
+    redis_client.rpush(queue, *[f"task-{i}" for i in range(50)])
+    key = RUNTIME_KEY.format(queue=queue)
+    metrics = QueueMetrics(redis_client, redis_client, queue)
+
+    assert metrics.depth() == 50
+    redis_client.hset(key, mapping={"tasks": 10, "seconds": 20.0})
+    assert metrics.runtime() is None  # first reading is the baseline
+    redis_client.hincrby(key, "tasks", 5)
+    redis_client.hincrbyfloat(key, "seconds", 2.5)
+    assert metrics.runtime() == 0.5
+    assert metrics.runtime() is None  # nothing finished since
+
+
+class SyntheticPool:
+    # One worker whose processes each finish one queued task per tick
+    def __init__(self, redis_client, queue, size):
+        self.redis, self.queue, self.size = redis_client, queue, size
+        self.sizes = []
+
+    def state(self):
+        self.redis.ltrim(self.queue, self.size, -1)
+        return 1, self.size, min(self.size, self.redis.llen(self.queue))
+
+    def resize(self, size):
+        if size != self.size:
+            self.sizes.append(size)
+        self.size = size
+
+
+def test_run_follows_synthetic_load(redis_client, queue):
+    redis_client.rpush(queue, *range(400))
+    pool = SyntheticPool(redis_client, queue, 2)
+    scaler = autoscaler(target_latency=20, up_cooldown=0, down_cooldown=0)
+
+    run(scaler, QueueMetrics(redis_client, redis_client, queue), pool, interval=0, ticks=40)
+
+    assert max(pool.sizes) == 16
+    assert pool.sizes[-1] == 2
+    assert redis_client.llen(queue) == 0
+
+
+class FakeControl:
+    # Like the prefork pool: "max-concurrency" stays at the starting size,
+    # only the process list follows pool_grow and pool_shrink
+    def __init__(self, sizes):
+        self.started, self.sizes, self.calls = dict(sizes), sizes, []
+
+    def inspect(self, timeout=None):
+        return SimpleNamespace(
+            stats=lambda: {
+                worker: {"pool": {"max-concurrency": self.started[worker], "processes": list(range(size))}}
+                for worker, size in self.sizes.items()
+            },
+            active=lambda: {worker: [] for worker in self.sizes},
+        )
+
+    def pool_grow(self, n, destination):
+        self.calls.append(("grow", n, destination))
+        for worker in destination:
+            self.sizes[worker] += n
+
+    def pool_shrink(self, n, destination):
+        self.calls.append(("shrink", n, destination))
+        for worker in destination:
+            self.sizes[worker] -= n
+
+
+def test_pools_of_different_sizes_are_resized_separately():
+    control = FakeControl({"a": 2, "b": 8})
+    pool = CeleryPool(SimpleNamespace(control=control))
+    assert pool.state() == (2, 2, 0)
+
+    pool.resize(4)
+    assert control.calls == [("grow", 2, ["a"]), ("shrink", 4, ["b"])]
+    pool.resize(4)
+    assert len(control.calls) == 2
+
+
+def test_resized_pools_are_read_from_their_processes():
+    control = FakeControl({"a": 2})
+    pool = CeleryPool(SimpleNamespace(control=control))
+    pool.state()
+    pool.resize(6)
+
+    # The next tick sees the grown pool, not the size it started with
+    assert pool.state() == (1, 6, 0)
+    pool.resize(6)
+    pool.resize(3)
+    assert control.calls == [("grow", 4, ["a"]), ("shrink", 3, ["a"])]
+    assert pool.state() == (1, 3, 0)
+
+
+def test_workers_flush_task_runtimes(redis_client, queue, monkeypatch):
+    monkeypatch.setattr(task_metrics, "FLUSH_INTERVAL", 0)
+    task = SimpleNamespace(
+        request=SimpleNamespace(delivery_info={"routing_key": queue}),
+        app=SimpleNamespace(backend=SimpleNamespace(client=redis_client)),
+    )
+    for task_id in ["a", "b"]:
+        task_metrics.record_start(task_id=task_id)
+        task_metrics.record_runtime(task_id=task_id, task=task)
+
+    totals = redis_client.hgetall(RUNTIME_KEY.format(queue=queue))
+    assert int(totals[b"tasks"]) == 2
+    assert float(totals[b"seconds"]) >= 0
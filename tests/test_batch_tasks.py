@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from unittest.mock import patch
+from app import app
+from common.celery_app import celery
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+HEADERS = {"X-Api-Key": "expected-api-key"}
+
+
+def test_batch_requires_api_key(client):
+    response = client.post('/v1/tasks/batch', json={"tasks": [{"name": "background_task"}]})
+    assert response.status_code == 401
+
+
+def test_batch_rejects_unknown_tasks(client):
+    response = client.post(
+        '/v1/tasks/batch', json={"tasks": [{"name": "background_task"}, {"name": "nope"}]},
+        headers=HEADERS,
+    )
+    assert response.status_code == 400
+    assert b"index 1" in response.data
+
+
+@pytest.mark.parametrize("spec", [
+    {"name": "background_task", "kwargs": {"delay": 1e9}},
+    {"name": "background_task", "kwargs": {"delay": "10"}},
+    {"name": "background_task", "kwargs": {"resume_at": 1e12}},
+    {"name": "background_task", "args": [1e9]},
+])
+def test_background_task_waits_are_validated(client, spec):
+    for path, payload in [('/v1/tasks/batch', {"tasks": [spec]}), ('/v1/tasks/submit', spec)]:
+        with patch('v1.tasks.routes.background_task.apply_async') as mock_apply_async:
+            response = client.post(path, json=payload, headers=HEADERS)
+        assert response.status_code == 400
+        mock_apply_async.assert_not_called()
+
+
+@patch('v1.tasks.routes.background_task.apply_async')
+def test_batch_submission_and_group_status(mock_apply_async, client):
+    """A batch returns its group and member ids, and the group status aggregates them."""
+    response = client.post(
+        '/v1/tasks/batch', json={"tasks": [{"name": "background_task"}] * 3}, headers=HEADERS
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert len(data['task_ids']) == 3
+    assert mock_apply_async.call_count == 3
+
+    group_id, task_ids = data['group_id'], data['task_ids']
+    try:
+        celery.backend.store_result(task_ids[0], "done", "SUCCESS")
+        celery.backend.store_result(task_ids[1], "boom", "FAILURE")
+
+        response = client.get(f'/v1/tasks/group/{group_id}')
+        assert response.status_code == 200
+        status = json.loads(response.data)
+        assert status['total'] == 3
+        assert status['completed'] == 2
+        assert status['counts'] == {"SUCCESS": 1, "FAILURE": 1, "PENDING": 1}
+        assert status['percent'] == 66.7
+        assert status['eta_seconds'] is None
+    finally:
+        for task_id in task_ids:
+            celery.backend.forget(task_id)
+        celery.backend.delete_group(group_id)
+
+
+@patch('v1.tasks.routes.background_task.apply_async')
+def test_batch_chunking(mock_apply_async, client):
+    """chunk_size packs the calls into fewer messages."""
+    response = client.post(
+        '/v1/tasks/batch',
+        json={"tasks": [{"name": "background_task"}] * 5, "chunk_size": 2},
+        headers=HEADERS,
+    )
+    assert response.status_code == 200
+    assert len(json.loads(response.data)['task_ids']) == 3
+
+
+def test_unknown_group_returns_404(client):
+    response = client.get('/v1/tasks/group/does-not-exist')
+    assert response.status_code == 404
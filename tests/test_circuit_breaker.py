@@ -0,0 +1,136 @@
+import pytest
+from unittest.mock import patch
+from kombu.exceptions import OperationalError
+from redis import Redis
+from redis.exceptions import ConnectionError
+from app import app
+from common.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from common.utils.limiter import limiter
+from common.utils.redis_client import redis_options
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def open_breaker():
+    breaker = app.extensions["redis_breaker"]
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    yield breaker
+    breaker.reset_timeout = app.config["REDIS_BREAKER_RESET"]
+    breaker.reset()
+    limiter._storage_dead = False
+
+
+@pytest.fixture
+def breaker():
+    breaker = app.extensions["redis_breaker"]
+    yield breaker
+    breaker.reset()
+    limiter._storage_dead = False
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success(0.001)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after > 0
+    assert breaker.snapshot()["trips"] == 1
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, latency_threshold=0.1)
+    breaker.record_success(0.5)
+    breaker.record_success(0.5)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()["slow_calls"] == 2
+
+
+def test_half_open_allows_one_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN  # reset_timeout=0 re-arms at once
+
+    breaker.before_call()
+    breaker.record_success(0.001)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_limits_fall_back_to_memory_while_open(client, open_breaker):
+    for _ in range(10):
+        assert client.get('/limit').status_code == 200
+    assert client.get('/limit').status_code == 429
+
+
+def test_task_routes_fail_fast_while_open(client, open_breaker):
+    response = client.get('/v1/tasks/status/some-task')
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) > 0
+    assert response.json["error"] == "Service Unavailable"
+
+
+def test_task_routes_probe_redis_when_half_open(client, open_breaker):
+    open_breaker.reset_timeout = 0
+    response = client.get('/v1/tasks/status/some-task')
+    assert response.status_code == 200
+    assert open_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_health_reports_breaker_state(client, open_breaker):
+    response = client.get('/health')
+    assert response.status_code == 500
+    assert response.json["dependencies"]["redis"] is False
+    assert response.json["circuit_breakers"]["redis"]["state"] == "open"
+
+    metrics = client.get('/metrics').json
+    assert metrics["circuit_breakers"]["redis"]["rejected"] >= 1
+
+
+def test_refused_connections_open_the_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+    client = Redis.from_url("redis://localhost:6390/0", **{**redis_options(app), "breaker": breaker})
+    for _ in range(3):
+        with pytest.raises(ConnectionError) as error:
+            client.ping()
+        assert not isinstance(error.value, CircuitOpenError)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        client.ping()
+
+
+@patch('v1.tasks.routes.background_task.delay', side_effect=OperationalError("Connection refused"))
+def test_celery_connection_errors_answer_503_and_open_the_breaker(mock_delay, client, breaker):
+    response = client.get('/v1/tasks/RunBackgroundTask')
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) > 0
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_long_pipelines_are_not_slow_calls():
+    # The whole pipeline takes longer than the threshold, no single reply does
+    breaker = CircuitBreaker("test", failure_threshold=3, latency_threshold=0.05, reset_timeout=60)
+    client = Redis.from_url("redis://localhost:6379/0", **{**redis_options(app), "breaker": breaker})
+    pipe = client.pipeline(transaction=False)
+    for index in range(3000):
+        pipe.lrem("breaker-pipeline-test", 1, index)
+    pipe.execute()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()["slow_calls"] == 0
@@ -0,0 +1,74 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from app import app
+from common.utils.compression import parse_levels, register_compression
+
+GZIP = {"Accept-Encoding": "gzip, deflate"}
+
+
+@pytest.fixture
+def client():
+    test_app = Flask(__name__)
+    register_compression(test_app, {"application/json": 6, "application/x-ndjson": 1}, min_size=100)
+
+    @test_app.route("/large")
+    def large():
+        return jsonify({"results": list(range(500))})
+
+    @test_app.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    @test_app.route("/csv")
+    def csv():
+        return Response("a,b\n" * 500, mimetype="text/csv")
+
+    @test_app.route("/stream")
+    def stream():
+        return Response((json.dumps({"line": i}) + "\n" for i in range(100)), mimetype="application/x-ndjson")
+
+    with test_app.test_client() as client:
+        yield client
+
+
+def test_parse_levels():
+    assert parse_levels("application/json=6, text/plain=1") == {"application/json": 6, "text/plain": 1}
+    with pytest.raises(ValueError):
+        parse_levels("application/json=12")
+
+
+def test_large_responses_are_gzipped(client):
+    plain = client.get('/large')
+    response = client.get('/large', headers=GZIP)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) < int(plain.headers["Content-Length"])
+    assert gzip.decompress(response.data) == plain.data
+
+
+def test_only_negotiated_and_large_enough_responses_are_compressed(client):
+    assert "Content-Encoding" not in client.get('/large').headers
+    assert "Content-Encoding" not in client.get('/large', headers={"Accept-Encoding": "gzip;q=0"}).headers
+    assert "Content-Encoding" not in client.get('/small', headers=GZIP).headers
+    assert "Content-Encoding" not in client.get('/csv', headers=GZIP).headers
+
+
+def test_streams_are_compressed_chunk_by_chunk(client):
+    response = client.get('/stream', headers=GZIP, buffered=False)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+
+    chunks = list(response.response)
+    assert len(chunks) > 1
+    lines = gzip.decompress(b"".join(chunks)).decode().splitlines()
+    assert [json.loads(line)["line"] for line in lines] == list(range(100))
+
+
+def test_app_negotiates_compression():
+    response = app.test_client().get('/liveness', headers=GZIP)
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert "Content-Encoding" not in response.headers  # below COMPRESS_MIN_SIZE
@@ -0,0 +1,52 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from app import app
+from common.utils.limiter import limiter
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def preflight(client, path, method="POST", headers="X-Api-Key, Content-Type"):
+    return client.options(path, headers={
+        "Origin": "https://app.example.com",
+        "Access-Control-Request-Method": method,
+        "Access-Control-Request-Headers": headers,
+    })
+
+
+def test_preflight_is_answered_with_route_methods_and_max_age(client):
+    response = preflight(client, '/api')
+    assert response.status_code == 204
+    assert response.headers["Access-Control-Allow-Origin"] == "https://app.example.com"
+    assert response.headers["Access-Control-Allow-Methods"] == "POST"
+    assert response.headers["Access-Control-Allow-Headers"] == "X-Api-Key, Content-Type"
+    assert response.headers["Access-Control-Allow-Credentials"] == "true"
+    assert response.headers["Access-Control-Max-Age"] == str(app.config["CORS_MAX_AGE"])
+
+    assert preflight(client, '/v1/tools/add').headers["Access-Control-Allow-Methods"] == "POST"
+    assert preflight(client, '/limit', "GET").headers["Access-Control-Allow-Methods"] == "GET"
+
+
+def test_preflight_skips_logging_and_rate_limiting(client, caplog):
+    with patch.object(limiter, "_check_request_limit") as check, \
+            caplog.at_level(logging.INFO, logger="api_logger"):
+        for _ in range(10):
+            assert preflight(client, '/limit', "GET").status_code == 204
+    check.assert_not_called()
+    assert caplog.records == []
+
+
+def test_unknown_paths_are_not_preflighted(client):
+    assert preflight(client, '/nonexistent').status_code == 404
+
+
+def test_actual_requests_still_get_cors_headers(client):
+    response = client.get('/', headers={"Origin": "https://app.example.com"})
+    assert response.headers["Access-Control-Allow-Origin"] == "https://app.example.com"
@@ -0,0 +1,74 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import Retry
+
+from common.utils.delayed import MAX_COUNTDOWN, defer
+from v1.tasks.routes import MAX_DELAY, background_task
+
+
+class FakeTask:
+    def __init__(self, is_eager=False, **kwargs):
+        self.request = SimpleNamespace(kwargs=kwargs, is_eager=is_eager)
+        self.retries = []
+
+    def retry(self, **options):
+        self.retries.append(options)
+        return Retry()
+
+
+def test_defer_reschedules_instead_of_sleeping():
+    task = FakeTask(delay=10)
+    resume_at = time.time() + 10
+    started = time.monotonic()
+    with pytest.raises(Retry):
+        defer(task, resume_at)
+
+    assert time.monotonic() - started < 1
+    (options,) = task.retries
+    assert 9 < options["countdown"] <= 10
+    assert options["kwargs"] == {"delay": 10, "resume_at": resume_at}
+    assert options["max_retries"] is None
+
+
+def test_long_waits_are_split_below_visibility_timeout():
+    task = FakeTask()
+    with pytest.raises(Retry):
+        defer(task, time.time() + 7200)
+    assert task.retries[0]["countdown"] == MAX_COUNTDOWN
+
+
+def test_defer_returns_once_due():
+    task = FakeTask()
+    defer(task, time.time() - 1)
+    assert task.retries == []
+
+
+def test_background_task_completes_once_resumed():
+    result = background_task.apply(kwargs={"resume_at": time.time() - 1}, task_id="task-1")
+    assert result.get() == "task-1"
+
+
+def test_eager_runs_wait_in_place():
+    task = FakeTask(is_eager=True)
+    started = time.monotonic()
+    defer(task, time.time() + 0.2)
+    assert time.monotonic() - started >= 0.15
+    assert task.retries == []
+
+
+def test_eager_background_task_waits_for_its_delay():
+    started = time.monotonic()
+    assert background_task.apply(kwargs={"delay": 0.2}, task_id="task-2").get() == "task-2"
+    assert time.monotonic() - started >= 0.15
+
+
+def test_background_task_caps_its_wait():
+    with patch('v1.tasks.routes.defer') as mock_defer:
+        background_task.apply(kwargs={"delay": 1e9}, task_id="task-3")
+        background_task.apply(kwargs={"resume_at": time.time() + 1e9}, task_id="task-4")
+    assert mock_defer.call_count == 2
+    for call in mock_defer.call_args_list:
+        assert call.args[1] <= time.time() + MAX_DELAY
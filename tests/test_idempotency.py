@@ -0,0 +1,85 @@
+import json
+import uuid
+
+import pytest
+from unittest.mock import patch
+from app import app
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+@patch('v1.tasks.routes.background_task.apply_async')
+def test_duplicate_submission_returns_original_task(mock_apply_async, client):
+    """A retry with the same Idempotency-Key is not enqueued again."""
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = json.loads(client.get('/v1/tasks/RunBackgroundTask', headers=headers).data)
+    second = json.loads(client.get('/v1/tasks/RunBackgroundTask', headers=headers).data)
+
+    assert first['deduplicated'] is False
+    assert second['deduplicated'] is True
+    assert second['response'] == first['response']
+    mock_apply_async.assert_called_once()
+    assert mock_apply_async.call_args.kwargs['task_id'] == first['response']
+
+
+@patch('v1.tasks.routes.background_task.apply_async')
+def test_different_keys_are_enqueued_separately(mock_apply_async, client):
+    """Distinct Idempotency-Keys each enqueue their own task."""
+    first = json.loads(client.get(
+        '/v1/tasks/RunBackgroundTask', headers={"Idempotency-Key": str(uuid.uuid4())}
+    ).data)
+    second = json.loads(client.get(
+        '/v1/tasks/RunBackgroundTask', headers={"Idempotency-Key": str(uuid.uuid4())}
+    ).data)
+
+    assert first['response'] != second['response']
+    assert mock_apply_async.call_count == 2
+
+
+@patch('v1.tasks.routes.background_task.apply_async', side_effect=ConnectionError)
+def test_failed_enqueue_releases_key(mock_apply_async, client):
+    """A failed publish doesn't leave the key claimed."""
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    with pytest.raises(ConnectionError):
+        client.get('/v1/tasks/RunBackgroundTask', headers=headers)
+
+    mock_apply_async.side_effect = None
+    data = json.loads(client.get('/v1/tasks/RunBackgroundTask', headers=headers).data)
+    assert data['deduplicated'] is False
+
+
+@patch('v1.tasks.routes.background_task.apply_async')
+def test_keys_are_scoped_to_the_client(mock_apply_async, client):
+    """The same key from two API keys enqueues a task for each."""
+    key = str(uuid.uuid4())
+    first = json.loads(client.get(
+        '/v1/tasks/RunBackgroundTask', headers={"Idempotency-Key": key, "X-API-Key": "client-a"}
+    ).data)
+    second = json.loads(client.get(
+        '/v1/tasks/RunBackgroundTask', headers={"Idempotency-Key": key, "X-API-Key": "client-b"}
+    ).data)
+
+    assert second['deduplicated'] is False
+    assert first['response'] != second['response']
+    assert mock_apply_async.call_count == 2
+
+
+@patch('v1.tasks.routes.background_task.apply_async')
+def test_dedupe_keys_expire_quickly(mock_apply_async, client):
+    """?dedupe=true is per client and held for IDEMPOTENCY_DEDUPE_TTL only."""
+    headers = {"X-API-Key": str(uuid.uuid4())}
+    with patch('v1.tasks.routes.submit_once', return_value=("id", False)) as mock_submit:
+        client.get('/v1/tasks/RunBackgroundTask?dedupe=true', headers=headers)
+    assert mock_submit.call_args.kwargs['ttl'] == app.config['IDEMPOTENCY_DEDUPE_TTL']
+
+    first = json.loads(client.get('/v1/tasks/RunBackgroundTask?dedupe=true', headers=headers).data)
+    other = json.loads(client.get(
+        '/v1/tasks/RunBackgroundTask?dedupe=true', headers={"X-API-Key": str(uuid.uuid4())}
+    ).data)
+    assert first['deduplicated'] is False and other['deduplicated'] is False
@@ -0,0 +1,25 @@
+import gc
+
+from app import app
+from common import lifecycle
+from common.utils.redis_client import get_redis
+
+
+def test_warm_up_compiles_url_map():
+    lifecycle.warm_up(app)
+    assert not app.url_map._remap
+
+
+def test_before_fork_freezes_existing_objects():
+    try:
+        lifecycle.before_fork()
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+
+def test_after_fork_drops_inherited_redis_client():
+    with app.app_context():
+        client = get_redis()
+        lifecycle.after_fork(app)
+        assert get_redis() is not client
@@ -0,0 +1,88 @@
+import uuid
+
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from redis import Redis
+
+from common.utils.limiter_storage import HashRing, ShardedRedisStorage, node_name, parse_pins
+
+# Separate databases of the local Redis stand in for separate nodes
+NODES = [f"redis://localhost:6379/{db}" for db in (1, 2, 3)]
+KEYS = [f"LIMITER/10.0.{i // 256}.{i % 256}/api/10/1/minute" for i in range(3000)]
+
+
+def test_parse_pins():
+    assert parse_pins("LIMITER/10.0.0.5/=redis://hot:6379/0, ") == [("LIMITER/10.0.0.5/", "redis://hot:6379/0")]
+    assert parse_pins("") == []
+
+
+def test_node_name_hides_credentials():
+    assert node_name("redis://:secret@10.0.0.7:6379/2") == "10.0.0.7:6379/2"
+    assert node_name("redis://cache") == "cache:6379/0"
+
+
+def test_ring_spreads_keys_evenly():
+    ring = HashRing(NODES)
+    counts = {node: 0 for node in NODES}
+    for key in KEYS:
+        counts[ring.get(key)] += 1
+    assert all(800 < count < 1200 for count in counts.values())
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = HashRing(NODES)
+    before = {key: ring.get(key) for key in KEYS}
+    ring.add("redis://localhost:6379/4")
+    moved = [key for key in KEYS if ring.get(key) != before[key]]
+
+    assert all(ring.get(key) == "redis://localhost:6379/4" for key in moved)
+    assert 0.15 < len(moved) / len(KEYS) < 0.35
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(NODES)
+    before = {key: ring.get(key) for key in KEYS}
+    ring.remove(NODES[0])
+
+    assert ring.nodes == NODES[1:]
+    assert all(ring.get(key) == before[key] for key in KEYS if before[key] != NODES[0])
+
+
+def test_empty_ring():
+    with pytest.raises(LookupError):
+        HashRing().get("key")
+
+
+def test_limits_are_enforced_on_the_keys_node():
+    storage = storage_from_string("redis+sharded://", nodes=NODES)
+    assert isinstance(storage, ShardedRedisStorage)
+    limiter = FixedWindowRateLimiter(storage)
+    limit = parse("3/minute")
+    client = str(uuid.uuid4())
+
+    assert all(limiter.hit(limit, client) for _ in range(3))
+    assert not limiter.hit(limit, client)
+
+    key = limit.key_for(client)
+    node = storage.node_for(key)
+    for url in NODES:
+        assert Redis.from_url(url).exists(f"LIMITS:{key}") == (url == node)
+    assert storage.check()
+
+
+def test_pinned_keys_go_to_their_node():
+    hot = str(uuid.uuid4())
+    pinned = "redis://localhost:6379/5"
+    storage = ShardedRedisStorage(nodes=NODES[:2], pins=[(f"LIMITER/{hot}/", pinned)])
+
+    assert storage.node_for(f"LIMITER/{hot}/api/10/1/minute") == pinned
+    assert storage.node_for(f"LIMITER/{uuid.uuid4()}/api/10/1/minute") in NODES[:2]
+
+    storage.incr(f"LIMITER/{hot}/api", 60)
+    assert Redis.from_url(pinned).exists(f"LIMITS:LIMITER/{hot}/api")
+    # Pinned nodes stay reachable when they leave the ring
+    storage.add_node(pinned)
+    storage.remove_node(pinned)
+    assert storage.get(f"LIMITER/{hot}/api") == 1
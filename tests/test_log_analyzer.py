@@ -0,0 +1,74 @@
+import gzip
+import json
+import logging
+
+from app import app
+from scripts.analyze_logs import analyze, log_files, main
+
+
+def completed(route, duration_ms, status=200, ip="10.0.0.1", client_name="", second=0):
+    return json.dumps({
+        "event": "Request Completed",
+        "route": route,
+        "duration_ms": duration_ms,
+        "status": status,
+        "requester_ip": ip,
+        "client_name": client_name,
+        "timestamp": f"2026-01-01T00:00:{second:02d}.000000Z",
+    }) + "\n"
+
+
+def write_logs(tmp_path):
+    incoming = json.dumps({"event": "Incoming Request", "path": "/"}) + "\n"
+    with gzip.open(tmp_path / "api_logs.log.2.gz", "wt") as f:
+        f.write(completed("/", 1.0, second=0) + incoming)
+    (tmp_path / "api_logs.log.1").write_text(
+        completed("/v1/tools/add", 5.0, ip="10.0.0.2", client_name="tools", second=5)
+    )
+    (tmp_path / "api_logs.log").write_text(
+        "".join(completed("/", float(ms), second=10) for ms in range(2, 11))
+        + completed("/", 50.0, status=429, second=10)
+        + '{"event": "Request Completed", "truncated\n'
+    )
+    (tmp_path / "other.log").write_text(completed("/ignored", 1.0))
+
+
+def test_log_files_are_ordered_oldest_first(tmp_path):
+    write_logs(tmp_path)
+    assert [path.rsplit("/", 1)[1] for path in log_files(str(tmp_path))] == [
+        "api_logs.log.2.gz", "api_logs.log.1", "api_logs.log",
+    ]
+
+
+def test_analyze_aggregates_per_route(tmp_path):
+    write_logs(tmp_path)
+    report = analyze(log_files(str(tmp_path)))
+
+    assert report["requests"] == 12
+    assert report["span_seconds"] == 10
+    root = report["routes"]["/"]
+    assert root["count"] == 11
+    assert root["status"] == {"200": 10, "429": 1}
+    assert (root["p50_ms"], root["p90_ms"], root["p99_ms"], root["max_ms"]) == (6.0, 10.0, 50.0, 50.0)
+    assert root["rps"] == 1.1
+    assert report["top_ips"] == [("10.0.0.1", 11), ("10.0.0.2", 1)]
+    assert report["top_clients"] == [("tools", 1)]
+
+
+def test_cli_prints_json(tmp_path, capsys):
+    write_logs(tmp_path)
+    main([str(tmp_path), "--json"])
+    assert json.loads(capsys.readouterr().out)["routes"]["/v1/tools/add"]["count"] == 1
+
+
+def test_request_emits_completion_record(caplog):
+    with caplog.at_level(logging.INFO, logger="api_logger"):
+        app.test_client().get("/liveness")
+
+    records = [json.loads(record.getMessage()) for record in caplog.records]
+    incoming = next(r for r in records if r["event"] == "Incoming Request")
+    done = next(r for r in records if r["event"] == "Request Completed")
+    assert done["request_id"] == incoming["request_id"]
+    assert done["route"] == "/liveness"
+    assert done["status"] == 200
+    assert done["duration_ms"] >= 0
@@ -0,0 +1,108 @@
+import gzip
+import logging
+import threading
+import uuid
+
+from redis import Redis
+from common.utils.log_sinks import (
+    BackgroundHandler,
+    CompressingRotatingFileHandler,
+    RedisStreamHandler,
+)
+
+
+def make_record(message):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records, self.threads = [], set()
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+        self.threads.add(threading.current_thread().name)
+
+
+def test_background_handler_writes_off_the_calling_thread():
+    target = ListHandler()
+    handler = BackgroundHandler(target)
+    for i in range(10):
+        handler.handle(make_record(f"record {i}"))
+    handler.close()
+
+    assert target.records == [f"record {i}" for i in range(10)]
+    assert target.threads == {"log-writer"}
+
+
+class StuckHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+
+    def emit(self, record):
+        self.unblock.wait(5)
+
+
+def test_background_handler_drops_records_while_a_sink_is_stuck():
+    target = StuckHandler()
+    handler = BackgroundHandler(target, max_queue=3)
+    for i in range(10):
+        handler.handle(make_record(f"record {i}"))
+
+    # One record held by the stuck sink, three queued, the rest dropped
+    assert 6 <= handler.dropped <= 7
+    assert handler.snapshot()["queued"] == 3
+    target.unblock.set()
+    handler.close()
+
+
+def test_redis_stream_handler_ships_in_batches():
+    client = Redis.from_url("redis://localhost:6379/0")
+    stream = f"test-logs-{uuid.uuid4()}"
+    handler = RedisStreamHandler(client, stream, maxlen=1000, batch_size=5)
+    try:
+        for i in range(7):
+            handler.handle(make_record(f"record {i}"))
+        # One full batch shipped, the rest waits for the next flush
+        assert client.xlen(stream) == 5
+        assert len(handler.buffer) == 2
+
+        handler.flush()
+        entries = client.xrange(stream)
+        assert [fields[b"record"] for _, fields in entries] == [
+            f"record {i}".encode() for i in range(7)
+        ]
+    finally:
+        client.delete(stream)
+
+
+class BrokenClient:
+    def pipeline(self, transaction=True):
+        raise ConnectionError("Redis is down")
+
+
+def test_redis_stream_handler_keeps_bounded_buffer_while_redis_is_down():
+    handler = RedisStreamHandler(BrokenClient(), "logs", batch_size=2, max_buffer=3)
+    for i in range(5):
+        handler.handle(make_record(f"record {i}"))
+    handler.flush()
+
+    assert handler.buffer == ["record 2", "record 3", "record 4"]
+    assert handler.dropped == 2
+
+
+def test_rotated_files_are_compressed(tmp_path):
+    log_file = tmp_path / "api_logs.log"
+    handler = CompressingRotatingFileHandler(str(log_file), maxBytes=100, backupCount=2)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(5):
+        handler.handle(make_record(f"{i}" * 60))
+    handler.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "api_logs.log", "api_logs.log.1.gz", "api_logs.log.2.gz",
+    ]
+    with gzip.open(tmp_path / "api_logs.log.1.gz", "rt") as f:
+        assert f.read() == "3" * 60 + "\n"
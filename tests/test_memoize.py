@@ -0,0 +1,131 @@
+import json
+import uuid
+
+import pytest
+from unittest.mock import patch
+from redis import Redis
+
+from app import app
+from common.celery_app import celery
+from common.utils.idempotency import claim_key, content_key
+from common.utils.memoize import INDEX_KEY, RESULT_KEY, memo_options, memoize, store_result, submit_memoized
+from v1.tasks.routes import digest_task
+
+redis = Redis.from_url("redis://localhost:6379/0")
+HEADERS = {"X-Api-Key": "expected-api-key"}
+
+
+@memoize(ttl=60)
+@celery.task
+def failing_task(text):
+    raise ValueError(text)
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def submit(client, text):
+    response = client.post(
+        '/v1/tasks/submit', json={"name": "digest_task", "args": [text]}, headers=HEADERS
+    )
+    assert response.status_code == 200
+    return json.loads(response.data)
+
+
+@patch('v1.tasks.routes.digest_task.apply_async')
+def test_identical_calls_attach_to_the_one_in_flight(mock_apply_async, client):
+    text = str(uuid.uuid4())
+    first, second = submit(client, text), submit(client, text)
+
+    assert first["deduplicated"] is False and first["cached"] is False
+    assert second["deduplicated"] is True
+    assert second["response"] == first["response"]
+    mock_apply_async.assert_called_once()
+
+    submit(client, str(uuid.uuid4()))  # other arguments, another task
+    assert mock_apply_async.call_count == 2
+
+
+def test_results_are_served_from_cache_without_enqueuing(client):
+    text = str(uuid.uuid4())
+    with patch('v1.tasks.routes.digest_task.apply_async') as mock_apply_async:
+        task_id = submit(client, text)["response"]
+    # The worker runs the call and caches its result
+    expected = digest_task.apply(args=[text], task_id=task_id).get()
+    assert redis.get(claim_key(digest_task.name, content_key(digest_task.name, [text]))) is None
+
+    with patch('v1.tasks.routes.digest_task.apply_async') as mock_apply_async:
+        data = submit(client, text)
+    mock_apply_async.assert_not_called()
+    assert data == {"response": task_id, "cached": True, "deduplicated": False, "result": expected}
+
+
+def test_failed_runs_are_not_cached_and_release_the_claim():
+    text = str(uuid.uuid4())
+    with patch.object(failing_task, 'apply_async'):
+        task_id, cached, deduplicated, _ = submit_memoized(redis, failing_task, [text])
+    assert not cached and not deduplicated
+
+    failing_task.apply(args=[text], task_id=task_id)
+    digest = content_key(failing_task.name, [text])
+    assert redis.get(RESULT_KEY.format(task_name=failing_task.name, digest=digest)) is None
+    assert redis.get(claim_key(failing_task.name, digest)) is None
+
+
+def test_size_cap_evicts_the_entries_expiring_first():
+    task_name = f"test.{uuid.uuid4()}"
+    for index, digest in enumerate(["a", "b", "c"]):
+        store_result(redis, task_name, digest, f"id-{digest}", index, ttl=60, max_entries=2, now=1000 + index)
+
+    assert redis.get(RESULT_KEY.format(task_name=task_name, digest="a")) is None
+    assert json.loads(redis.get(RESULT_KEY.format(task_name=task_name, digest="c"))) == {"task_id": "id-c", "result": 2}
+    assert redis.zrange(INDEX_KEY.format(task_name=task_name), 0, -1) == [b"b", b"c"]
+
+    # Expired entries leave the index instead of counting against the cap
+    store_result(redis, task_name, "d", "id-d", 3, ttl=60, max_entries=2, now=1062)
+    assert redis.zrange(INDEX_KEY.format(task_name=task_name), 0, -1) == [b"d"]
+
+
+@patch('v1.tasks.routes.background_task.apply_async')
+def test_tasks_without_memoization_are_always_enqueued(mock_apply_async, client):
+    mock_apply_async.return_value.id = "task-id"
+    for _ in range(2):
+        response = client.post('/v1/tasks/submit', json={"name": "background_task"}, headers=HEADERS)
+        assert json.loads(response.data)["cached"] is False
+    assert mock_apply_async.call_count == 2
+
+    response = client.post('/v1/tasks/submit', json={"name": "nope"}, headers=HEADERS)
+    assert response.status_code == 400
+
+
+def test_submit_uses_the_result_backend_redis(client):
+    # LIMITER_STORAGE may point elsewhere; results and claims live with the backend
+    with patch('v1.tasks.routes.submit_memoized', return_value=("id", False, False, None)) as mock_submit:
+        submit(client, str(uuid.uuid4()))
+    assert mock_submit.call_args.args[0] is celery.backend.client
+
+
+@pytest.mark.parametrize("spec", [
+    {"name": "digest_task", "args": ["text"], "kwargs": {"rounds": 10 ** 9}},
+    {"name": "digest_task", "args": ["text", "sha256", 0]},
+    {"name": "digest_task", "args": ["text"], "kwargs": {"algorithm": "shake_128"}},
+    {"name": "digest_task", "args": [["not", "text"]]},
+    {"name": "digest_task", "kwargs": {"text": "text", "salt": "x"}},
+])
+def test_digest_arguments_are_validated(client, spec):
+    for path, payload in [('/v1/tasks/submit', spec), ('/v1/tasks/batch', {"tasks": [spec]})]:
+        with patch('v1.tasks.routes.digest_task.apply_async') as mock_apply_async:
+            response = client.post(path, json=payload, headers=HEADERS)
+        assert response.status_code == 400
+        mock_apply_async.assert_not_called()
+
+
+def test_claims_default_to_twice_the_time_limit():
+    # digest_task has a 60 s time limit; an hour would strand identical
+    # calls on a run whose worker was killed
+    assert memo_options(digest_task)["claim_ttl"] == 120
+    assert memo_options(failing_task)["claim_ttl"] == 3600
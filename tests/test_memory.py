@@ -0,0 +1,102 @@
+import socket
+import tracemalloc
+
+import pytest
+from redis import Redis
+
+from app import app
+from common.utils.memory import WorkerDiagnostics, rss_bytes
+
+ADMIN_KEY = "admin-test-key"
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    app.config["MEMORY_DIAGNOSTICS"] = True
+    app.config["ADMIN_API_KEYS"] = ADMIN_KEY
+    app.config["MEMORY_DIAGNOSTICS_TIMEOUT"] = 0.5
+    with app.test_client() as client:
+        yield client
+    app.config["MEMORY_DIAGNOSTICS"] = False
+    app.config["MEMORY_DIAGNOSTICS_TIMEOUT"] = 2.0
+    app.config["ADMIN_API_KEYS"] = ""
+
+
+@pytest.fixture
+def diagnostics():
+    diagnostics = WorkerDiagnostics(Redis.from_url("redis://localhost:6379/0"))
+    yield diagnostics
+    tracemalloc.stop()
+
+
+def test_stats(diagnostics):
+    report = diagnostics.handle("stats")
+    assert report["host"] == socket.gethostname()
+    assert report["rss_bytes"] > 0
+    assert len(report["gc"]["counts"]) == 3
+    assert report["tracemalloc"] == {"tracing": False}
+    assert "top" not in report
+
+
+def test_snapshot_reports_growth_since_start(diagnostics):
+    assert diagnostics.handle("snapshot")["error"]
+    diagnostics.handle("start")
+    leak = [bytearray(1024) for _ in range(2000)]
+    report = diagnostics.handle("snapshot", limit=5)
+
+    assert report["tracemalloc"]["tracing"]
+    assert len(report["top"]) <= 5
+    growth = report["diff"][0]
+    assert "test_memory.py" in growth["site"]
+    assert growth["size_diff"] >= 2000 * 1024
+    assert growth["count_diff"] >= 2000
+
+    # The next diff is relative to this snapshot
+    assert all(stat["size_diff"] < 1024 * 1024 for stat in diagnostics.handle("snapshot")["diff"])
+    diagnostics.handle("stop")
+    assert not tracemalloc.is_tracing()
+    del leak
+
+
+def test_budget_recycles_worker():
+    recycled = []
+    diagnostics = WorkerDiagnostics(None, budget=rss_bytes() // 2, recycle=lambda: recycled.append(True))
+    assert diagnostics.check_budget()
+    assert recycled == [True]
+    assert not WorkerDiagnostics(None, budget=0, recycle=lambda: recycled.append(True)).check_budget()
+
+
+def test_endpoint_is_hidden_when_disabled():
+    app.config["ADMIN_API_KEYS"] = ADMIN_KEY
+    try:
+        response = app.test_client().get("/admin/memory", headers={"X-API-Key": ADMIN_KEY})
+    finally:
+        app.config["ADMIN_API_KEYS"] = ""
+    assert response.status_code == 404
+
+
+def test_endpoint_requires_admin_key(client):
+    assert client.get("/admin/memory").status_code == 401
+    assert client.get("/admin/memory", headers={"X-API-Key": "not-admin"}).status_code == 401
+
+
+def test_endpoint_reaches_workers(client):
+    headers = {"X-API-Key": ADMIN_KEY}
+    response = client.get("/admin/memory", headers=headers)
+    assert response.status_code == 200
+    (worker,) = response.json["workers"]
+    assert response.json["missing"] == 0
+    assert worker["rss_bytes"] > 0
+
+    target = {"host": worker["host"], "pid": worker["pid"]}
+    assert client.post("/admin/memory", json={"command": "start", **target}, headers=headers).status_code == 200
+    response = client.post("/admin/memory", json={"command": "snapshot", "limit": 3}, headers=headers)
+    assert len(response.json["workers"][0]["top"]) == 3
+    client.post("/admin/memory", json={"command": "stop"}, headers=headers)
+
+    # The same pid on another host is another worker
+    response = client.post("/admin/memory", json={"command": "stats", **target, "host": "elsewhere"}, headers=headers)
+    assert response.status_code == 404
+    assert client.post("/admin/memory", json={"command": "stats", "pid": target["pid"]}, headers=headers).status_code == 400
+    assert client.post("/admin/memory", json={"command": "explode"}, headers=headers).status_code == 400
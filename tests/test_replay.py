@@ -0,0 +1,135 @@
+import json
+import os
+
+import pytest
+from app import app
+from common.celery_app import celery
+from scripts.analyze_logs import log_files
+from scripts.replay import LocalTarget, load_requests, main, remote_redis_hosts, replay, route_for
+
+REPLAY_ENV = ["LIMITER_STORAGE", "REDIS_URL", "LIMITER_SHARDS", "LIMITER_SHARD_PINS", "LOG_STREAM_URL", "LOG_DIR"]
+
+
+@pytest.fixture(autouse=True)
+def restore_env(monkeypatch):
+    # main() points the environment at --redis-url; undone after each test
+    for name in REPLAY_ENV:
+        monkeypatch.delenv(name, raising=False)
+
+
+def incoming(path, method="GET", second=0, ip="10.0.0.1", body="", api_key=True):
+    headers = {"User-Agent": "curl/8.0", "Host": "api.example.com"}
+    if api_key:
+        headers["X-Api-Key"] = "REDACTED"
+    if body:
+        headers["Content-Type"] = "application/json"
+    return json.dumps({
+        "event": "Incoming Request",
+        "method": method,
+        "path": path,
+        "headers": headers,
+        "body": body,
+        "requester_ip": ip,
+        "timestamp": f"2026-01-01T00:00:{second:02d}.000000Z",
+    }) + "\n"
+
+
+def write_logs(tmp_path):
+    (tmp_path / "api_logs.log.1").write_text(
+        incoming("/", second=0, api_key=False)
+        + json.dumps({"event": "Request Completed", "route": "/", "status": 200}) + "\n"
+    )
+    (tmp_path / "api_logs.log").write_text(
+        incoming("/v1/tools/add", "POST", second=1, ip="10.0.0.2", body='{"num1": 1, "num2": 2}')
+        + incoming("/v1/tools/add", "POST", second=2, ip="10.0.0.3", body='{"num1": 3, "num2": 4}')
+        + incoming("/v1/tools/add", "POST", second=2, ip="10.0.0.2", body="<streamed>")
+        + incoming("/missing", second=2)
+    )
+
+
+def test_load_requests_substitutes_api_keys(tmp_path):
+    write_logs(tmp_path)
+    requests, skipped = load_requests(log_files(str(tmp_path)), api_keys=["key-a", "key-b"])
+
+    assert skipped == 1
+    assert [(r.method, r.path, r.offset) for r in requests] == [
+        ("GET", "/", 0.0), ("POST", "/v1/tools/add", 1.0), ("POST", "/v1/tools/add", 2.0), ("GET", "/missing", 2.0),
+    ]
+    assert "Host" not in requests[0].headers and "X-Api-Key" not in requests[0].headers
+    # One key per original client IP
+    assert [r.headers["X-Api-Key"] for r in requests[1:]] == ["key-a", "key-b", "key-a"]
+    assert requests[1].body == b'{"num1": 1, "num2": 2}'
+    assert requests[1].ip == "10.0.0.2"
+
+
+def test_route_for():
+    assert route_for(app.url_map, "GET", "/v1/tasks/status/abc") == "/v1/tasks/status/<task_id>"
+    assert route_for(app.url_map, "GET", "/missing") == "/missing"
+
+
+def test_replay_keeps_recorded_spacing(tmp_path):
+    write_logs(tmp_path)
+    requests, _ = load_requests(log_files(str(tmp_path)))
+    report = replay(requests, LocalTarget(app), app.url_map, speed=4)
+
+    assert 0.5 <= report["elapsed_seconds"] < 1.5  # 2 recorded seconds at 4x
+    assert report["requests"] == 4
+    add = report["routes"]["/v1/tools/add"]
+    assert add["count"] == 2
+    assert add["status"] == {"200": 2}
+    assert add["error_rate"] == 0
+    assert report["routes"]["/missing"]["status"] == {"404": 1}
+
+
+class FailingTarget:
+    def send(self, recorded):
+        if recorded.path == "/":
+            raise ConnectionResetError()
+        return 500
+
+
+def test_errors_are_counted_per_route(tmp_path):
+    write_logs(tmp_path)
+    requests, _ = load_requests(log_files(str(tmp_path)))
+    report = replay(requests, FailingTarget(), app.url_map, speed=0, concurrency=2)
+
+    assert report["routes"]["/"]["status"] == {"ConnectionResetError": 1}
+    assert report["routes"]["/"]["error_rate"] == 1
+    assert report["routes"]["/v1/tools/add"]["error_rate"] == 1
+
+
+def test_cli_prints_json(tmp_path, capsys):
+    write_logs(tmp_path)
+    main([str(tmp_path), "--speed", "0", "--json"])
+    report = json.loads(capsys.readouterr().out)
+    assert report["requests"] == 4
+    assert report["skipped_streamed"] == 1
+
+
+def test_remote_redis_is_refused(tmp_path, monkeypatch, capsys):
+    write_logs(tmp_path)
+    monkeypatch.setitem(app.config, "LIMITER_SHARDS", "redis://:secret@redis.prod.example:6379/0")
+    assert remote_redis_hosts(app, celery) == ["redis.prod.example"]
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--speed", "0", "--json"])
+    assert "redis.prod.example" in capsys.readouterr().err
+
+
+def test_in_process_replay_uses_the_redis_url(tmp_path):
+    write_logs(tmp_path)
+    main([str(tmp_path), "--speed", "0", "--json", "--redis-url", "redis://127.0.0.1:6379/0"])
+    assert os.environ["REDIS_URL"] == os.environ["LIMITER_STORAGE"] == "redis://127.0.0.1:6379/0"
+    assert os.environ["LOG_STREAM_URL"] == ""
+
+
+def test_in_process_replay_logs_elsewhere(tmp_path, monkeypatch):
+    write_logs(tmp_path)
+    before = (tmp_path / "api_logs.log").read_text()
+    main([str(tmp_path), "--speed", "0", "--json"])
+    assert os.environ["LOG_DIR"] != str(tmp_path)
+
+    # An app already logging into the replayed directory is refused
+    monkeypatch.setitem(app.config, "LOG_DIR", str(tmp_path))
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--speed", "0", "--json"])
+    assert (tmp_path / "api_logs.log").read_text() == before
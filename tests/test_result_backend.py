@@ -0,0 +1,69 @@
+import json
+import secrets
+import uuid
+
+import pytest
+from app import app
+from common.celery_app import REDIS_URL, celery
+from common.result_backend import COMPRESSED_MARKER, DISK_MARKER, TieredRedisBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = TieredRedisBackend(app=celery, url=REDIS_URL)
+    backend.compress_threshold = 100
+    backend.disk_threshold = 1000
+    backend.disk_path = str(tmp_path)
+    return backend
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_small_results_stay_plain_json(backend):
+    payload = backend.encode({"status": "SUCCESS", "result": "ok"})
+    assert payload.startswith(b"{")
+    assert backend.decode(payload)["result"] == "ok"
+
+
+def test_large_results_are_compressed(backend):
+    meta = {"status": "SUCCESS", "result": "a" * 500}
+    payload = backend.encode(meta)
+    assert payload.startswith(COMPRESSED_MARKER)
+    assert backend.decode(payload) == meta
+
+
+def test_huge_results_spill_to_disk(backend, tmp_path):
+    meta = {"status": "SUCCESS", "result": secrets.token_hex(5000)}
+    payload = backend.encode(meta)
+    assert payload.startswith(DISK_MARKER)
+    assert len(list(tmp_path.iterdir())) == 1
+    assert backend.decode(payload) == meta
+
+
+def test_missing_disk_result_reads_as_pending(backend, tmp_path):
+    payload = backend.encode({"status": "SUCCESS", "result": secrets.token_hex(5000)})
+    for path in tmp_path.iterdir():
+        path.unlink()
+    assert backend.decode(payload) is None
+
+
+def test_status_route_reads_compressed_results(client):
+    task_id = str(uuid.uuid4())
+    result = "x" * 5000
+    celery.backend.store_result(task_id, result, "SUCCESS")
+    try:
+        raw = celery.backend.get(celery.backend.get_key_for_task(task_id))
+        assert raw.startswith(COMPRESSED_MARKER)
+
+        response = client.get(f'/v1/tasks/status/{task_id}')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['state'] == "SUCCESS"
+        assert data['result'] == result
+    finally:
+        celery.backend.forget(task_id)
@@ -0,0 +1,115 @@
+import json
+import uuid
+
+import pytest
+from unittest.mock import patch
+from redis import Redis
+from app import app
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+HEADERS = {"X-Api-Key": "expected-api-key"}
+
+
+def test_revoke_requires_api_key(client):
+    response = client.post('/v1/tasks/revoke/task1')
+    assert response.status_code == 401
+
+
+@patch('v1.tasks.routes.celery.control.revoke')
+def test_revoke_single_task(mock_revoke, client):
+    response = client.post('/v1/tasks/revoke/task1?terminate=true', headers=HEADERS)
+    assert response.status_code == 200
+    mock_revoke.assert_called_once_with("task1", terminate=True)
+
+
+@patch('v1.tasks.routes.celery.control.inspect')
+@patch('v1.tasks.routes.celery.control.revoke')
+def test_revoke_by_ids_and_name_in_one_broadcast(mock_revoke, mock_inspect, client):
+    """Explicit ids and ids matched by name are revoked with a single call."""
+    name = "v1.tasks.routes.background_task"
+    mock_inspect.return_value.active.return_value = {
+        "worker1": [{"id": "task2", "name": name}, {"id": "other", "name": "other.task"}]
+    }
+    mock_inspect.return_value.scheduled.return_value = {
+        "worker1": [{"eta": "2030-01-01T00:00:00", "request": {"id": "task3", "name": name}}]
+    }
+    mock_inspect.return_value.reserved.return_value = {}
+
+    response = client.post(
+        '/v1/tasks/revoke', json={"task_ids": ["task1"], "name": name}, headers=HEADERS
+    )
+    assert response.status_code == 200
+    assert json.loads(response.data)['revoked'] == ["task1", "task2", "task3"]
+    mock_revoke.assert_called_once()
+    assert sorted(mock_revoke.call_args.args[0]) == ["task1", "task2", "task3"]
+
+
+@patch('v1.tasks.routes.celery.control.purge', return_value=7)
+@patch('v1.tasks.routes.celery.control.revoke')
+def test_revoke_with_purge(mock_revoke, mock_purge, client):
+    response = client.post('/v1/tasks/revoke', json={"purge": True}, headers=HEADERS)
+    assert response.status_code == 200
+    assert json.loads(response.data)['purged'] == 7
+    mock_revoke.assert_not_called()
+
+
+def test_revoke_unknown_group(client):
+    response = client.post('/v1/tasks/revoke', json={"group_id": "missing"}, headers=HEADERS)
+    assert response.status_code == 404
+
+
+@patch('v1.tasks.routes.celery.control.purge')
+@patch('v1.tasks.routes.celery.control.inspect')
+@patch('v1.tasks.routes.celery.control.revoke')
+def test_purge_by_name_only_drops_matching_messages(mock_revoke, mock_inspect, mock_purge, client):
+    """Messages of the named task still in the broker are revoked and deleted; others stay."""
+    broker = Redis.from_url("redis://localhost:6379/0")
+    name, other = f"test.runaway.{uuid.uuid4()}", f"test.other.{uuid.uuid4()}"
+    messages = [json.dumps({"headers": {"id": f"{task}-{i}", "task": task}}) for i in range(3) for task in (name, other)]
+    broker.rpush("celery", *messages)
+    mock_inspect.return_value.active.return_value = {}
+    mock_inspect.return_value.scheduled.return_value = {}
+    mock_inspect.return_value.reserved.return_value = {}
+    try:
+        response = client.post('/v1/tasks/revoke', json={"name": name, "purge": True}, headers=HEADERS)
+        data = json.loads(response.data)
+        assert data['purged'] == 3 and data['truncated'] is False
+        assert data['revoked'] == [f"{name}-{i}" for i in range(3)]
+        mock_purge.assert_not_called()
+        remaining = [json.loads(raw)["headers"]["task"] for raw in broker.lrange("celery", 0, -1)]
+        assert name not in remaining and remaining.count(other) == 3
+    finally:
+        for message in messages:
+            broker.lrem("celery", 0, message)
+
+
+@patch('v1.tasks.routes.celery.control.inspect')
+@patch('v1.tasks.routes.celery.control.revoke')
+def test_purge_scans_at_most_the_limit(mock_revoke, mock_inspect, client, monkeypatch):
+    """Only REVOKE_SCAN_LIMIT messages, the next to be delivered, are scanned."""
+    broker = Redis.from_url("redis://localhost:6379/0")
+    name = f"test.runaway.{uuid.uuid4()}"
+    messages = [json.dumps({"headers": {"id": f"{name}-{i}", "task": name}}) for i in range(5)]
+    # Workers pop from the tail: the last three are delivered first. Messages
+    # left by earlier tests would use up the limit
+    broker.delete("celery")
+    broker.rpush("celery", "not json", *messages)
+    mock_inspect.return_value.active.return_value = {}
+    mock_inspect.return_value.scheduled.return_value = {}
+    mock_inspect.return_value.reserved.return_value = {}
+    monkeypatch.setitem(app.config, "REVOKE_SCAN_LIMIT", 3)
+    try:
+        response = client.post('/v1/tasks/revoke', json={"name": name, "purge": True}, headers=HEADERS)
+        data = json.loads(response.data)
+        assert data['purged'] == 3 and data['truncated'] is True
+        assert data['revoked'] == [f"{name}-{i}" for i in range(2, 5)]
+        assert broker.lrange("celery", 0, -1) == [b"not json"] + [m.encode() for m in messages[:2]]
+    finally:
+        broker.delete("celery")
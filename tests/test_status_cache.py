@@ -0,0 +1,126 @@
+import threading
+import uuid
+
+import pytest
+from app import app
+from common.celery_app import celery
+from common.utils.status_cache import TaskStatusCache
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+class CountingBackend:
+    def __init__(self, status="SUCCESS"):
+        self.status = status
+        self.reads = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, task_id):
+        self.reads.append(task_id)
+        self.release.wait(timeout=5)
+        return {"status": self.status, "result": task_id}
+
+
+def test_terminal_states_are_cached():
+    backend = CountingBackend("SUCCESS")
+    cache = TaskStatusCache(backend, coalesce_window=0)
+    for _ in range(5):
+        assert cache.get("a") == {"status": "SUCCESS", "result": "a"}
+    assert backend.reads == ["a"]
+    assert cache.snapshot()["hits"] == 4
+
+
+def test_cache_is_lru_bounded():
+    backend = CountingBackend("REVOKED")
+    cache = TaskStatusCache(backend, maxsize=2, coalesce_window=0)
+    for task_id in ["a", "b", "a", "c", "a", "b"]:
+        cache.get(task_id)
+    # "b" was least recently used when "c" came in
+    assert backend.reads == ["a", "b", "c", "b"]
+    assert cache.snapshot()["size"] == 2
+
+
+def test_concurrent_lookups_of_running_task_are_coalesced():
+    backend = CountingBackend("STARTED")
+    backend.release.clear()
+    cache = TaskStatusCache(backend, coalesce_window=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("a"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    backend.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert backend.reads == ["a"]
+    assert len(results) == 8
+    assert cache.snapshot()["coalesced"] == 7
+
+
+def test_running_task_is_read_again_after_the_window():
+    backend = CountingBackend("STARTED")
+    cache = TaskStatusCache(backend, coalesce_window=0)
+    cache.get("a")
+    cache.get("a")
+    assert backend.reads == ["a", "a"]
+
+
+def test_backend_errors_are_not_cached():
+    calls = []
+
+    def fetch(task_id):
+        calls.append(task_id)
+        if len(calls) == 1:
+            raise ConnectionError("Redis is down")
+        return {"status": "SUCCESS", "result": 1}
+
+    cache = TaskStatusCache(fetch, coalesce_window=60)
+    with pytest.raises(ConnectionError):
+        cache.get("a")
+    assert cache.get("a")["result"] == 1
+
+
+def test_status_route_serves_finished_tasks_from_cache(client):
+    task_id = str(uuid.uuid4())
+    celery.backend.mark_as_failure(task_id, ValueError("boom"))
+    try:
+        client.get(f'/v1/tasks/status/{task_id}')
+        before = client.get('/metrics').json["task_status_cache"]
+        for _ in range(3):
+            response = client.get(f'/v1/tasks/status/{task_id}')
+            assert response.json == {"task_id": task_id, "state": "FAILURE", "error": "boom"}
+        after = client.get('/metrics').json["task_status_cache"]
+        assert after["backend_reads"] == before["backend_reads"]
+        assert after["hits"] == before["hits"] + 3
+    finally:
+        celery.backend.forget(task_id)
+
+
+def test_cache_is_bounded_by_bytes():
+    sizes = {"a": 300, "b": 300, "c": 300, "huge": 5000}
+    reads = []
+
+    def fetch(task_id):
+        reads.append(task_id)
+        return {"status": "SUCCESS", "result": "x" * sizes[task_id]}
+
+    cache = TaskStatusCache(fetch, coalesce_window=0, maxbytes=1000, max_entry_bytes=500)
+    for task_id in ["a", "b", "c", "a"]:
+        cache.get(task_id)
+    # Three results don't fit in 1000 bytes: "a" was evicted by "c"
+    assert reads == ["a", "b", "c", "a"]
+    assert cache.snapshot()["size"] == 2
+    assert cache.snapshot()["bytes"] <= 1000
+
+    # A result over the per-entry limit is never cached
+    cache.get("huge")
+    cache.get("huge")
+    assert reads[-2:] == ["huge", "huge"]
+    assert cache.snapshot()["too_large"] == 2
+    assert cache.snapshot()["size"] == 2
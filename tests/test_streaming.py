@@ -0,0 +1,36 @@
+import io
+import json
+
+from common.utils.streaming import InvalidLine, batched, iter_ndjson, ndjson_response
+from app import app
+
+
+def test_iter_ndjson_reassembles_lines_across_reads():
+    body = b'{"a": 1}\n\n[1, 2]\n"text"'
+    items = list(iter_ndjson(io.BytesIO(body), read_size=3))
+    assert items == [{"a": 1}, [1, 2], "text"]
+
+
+def test_iter_ndjson_reports_bad_and_oversized_lines():
+    body = b'[1]\n{broken\n' + b'x' * 50 + b'\n[2]\n'
+    items = list(iter_ndjson(io.BytesIO(body), read_size=8, max_line_size=20))
+    assert items[0] == [1]
+    assert isinstance(items[1], InvalidLine) and items[1].error == "Invalid JSON"
+    assert isinstance(items[2], InvalidLine) and items[2].error == "Line too long"
+    assert items[2].line_number == 3
+    assert items[3] == [2]
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_ndjson_response_buffers_writes():
+    """Small lines are coalesced into writes of roughly write_size bytes."""
+    with app.test_request_context():
+        response = ndjson_response(({"i": i} for i in range(100)), write_size=100)
+        chunks = list(response.response)
+
+    assert 1 < len(chunks) < 100
+    lines = b"".join(chunks).splitlines()
+    assert [json.loads(line)["i"] for line in lines] == list(range(100))
@@ -0,0 +1,105 @@
+import json
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from celery.exceptions import Retry
+from redis import Redis
+
+from app import app
+from common.celery_app import celery
+from common.utils.progress import PROGRESS_KEY, TaskProgress, read_progress
+from v1.tasks.routes import background_task
+
+redis = Redis.from_url("redis://localhost:6379/0")
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_task():
+    backend = SimpleNamespace(client=redis, expires=60)
+    return SimpleNamespace(app=SimpleNamespace(backend=backend), request=SimpleNamespace(id=str(uuid.uuid4())))
+
+
+def stored(task_id):
+    return json.loads(redis.get(PROGRESS_KEY.format(task_id=task_id)))
+
+
+def test_updates_are_throttled_and_coalesced():
+    task, clock = fake_task(), Clock()
+    progress = TaskProgress(task, interval=2.0, clock=clock)
+
+    for done in range(1, 21):
+        clock.now = done * 0.25  # 20 updates over 5 seconds
+        progress.update(done=done, total=40, stage="processing")
+    assert progress.writes == 3  # at 0.25s, 2.25s and 4.25s
+    assert stored(task.request.id)["percent"] == 42.5
+
+    progress.flush()  # the latest update is written on demand
+    assert progress.writes == 4
+    assert stored(task.request.id)["percent"] == 50.0
+    progress.flush()
+    assert progress.writes == 4
+
+
+def test_eta_is_extrapolated_from_the_rate_so_far():
+    task, clock = fake_task(), Clock()
+    progress = TaskProgress(task, interval=0, clock=clock)
+    clock.now = 10.0
+    progress.update(percent=25, stage="processing")
+
+    entry = read_progress(redis, [task.request.id])[task.request.id]
+    assert entry["stage"] == "processing"
+    assert 29 < entry["eta_seconds"] <= 30
+    assert read_progress(redis, ["unknown-task"]) == {"unknown-task": None}
+    assert read_progress(redis, []) == {}
+
+
+def test_status_reports_progress_of_deferred_task(client):
+    task_id = str(uuid.uuid4())
+    # A worker run: defer() reschedules the task by raising Retry
+    background_task.push_request(id=task_id, kwargs={"delay": 60}, is_eager=False)
+    try:
+        with pytest.raises(Retry):
+            background_task.run(delay=60, resume_at=time.time() + 45)
+    finally:
+        background_task.pop_request()
+    try:
+        celery.backend.mark_as_retry(task_id, Exception("deferred"))
+        response = client.get(f"/v1/tasks/status/{task_id}")
+        body = response.json
+        assert body["state"] == "RETRY"
+        assert body["progress"]["stage"] == "waiting"
+        assert 24 < body["progress"]["percent"] <= 25.1
+        assert 44 < body["progress"]["eta_seconds"] <= 45
+    finally:
+        celery.backend.forget(task_id)
+
+
+def test_bulk_progress(client):
+    done, running, unknown = (str(uuid.uuid4()) for _ in range(3))
+    celery.backend.store_result(done, "ok", "SUCCESS")
+    redis.set(PROGRESS_KEY.format(task_id=running), json.dumps({"percent": 60.0, "stage": "b", "eta_at": None}))
+    try:
+        response = client.post("/v1/tasks/progress", json={"task_ids": [done, running, unknown]})
+        tasks = response.json["tasks"]
+        assert tasks[done] == {"state": "SUCCESS", "progress": None}
+        assert tasks[running]["progress"]["percent"] == 60.0
+        assert tasks[unknown] == {"state": "PENDING", "progress": None}
+        assert client.post("/v1/tasks/progress", json={"task_ids": []}).status_code == 400
+    finally:
+        celery.backend.forget(done)
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from app import app
+from common.utils.limiter import limiter
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    limiter.reset()
+    with app.test_client() as client:
+        yield client
+
+
+HEADERS = {"X-API-Key": "valid-key"}
+
+
+def test_add_single_pair(client):
+    response = client.post('/v1/tools/add', json={"num1": 5, "num2": 3}, headers=HEADERS)
+    assert response.status_code == 200
+    assert json.loads(response.data)['result'] == 8
+
+
+def test_add_lists(client):
+    response = client.post(
+        '/v1/tools/add', json={"num1": [1, "2", 3.5], "num2": [1, 2, 0.5]}, headers=HEADERS
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['result'] == [2, 4, 4]
+    assert data['errors'] == []
+
+
+def test_add_pairs_with_invalid_elements(client):
+    """Invalid elements are reported individually and don't fail the batch."""
+    response = client.post(
+        '/v1/tools/add',
+        json={"pairs": [[1, 2], ["x", 1], [3], {"num1": 4, "num2": None}, {"num1": 1, "num2": 1}]},
+        headers=HEADERS,
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['result'] == [3, None, None, None, 2]
+    assert [error['index'] for error in data['errors']] == [1, 2, 3]
+
+
+def test_add_lists_of_different_length(client):
+    response = client.post('/v1/tools/add', json={"num1": [1, 2], "num2": [1]}, headers=HEADERS)
+    assert response.status_code == 400
+
+
+def test_add_ndjson(client):
+    """NDJSON input is answered with one NDJSON result line per input line."""
+    body = "\n".join(json.dumps(pair) for pair in [[1, 2], {"num1": 3, "num2": 4}, "oops"])
+    response = client.post(
+        '/v1/tools/add',
+        data=body + "\nnot json\n",
+        headers=dict(HEADERS, **{"Content-Type": "application/x-ndjson"}),
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.data.splitlines()]
+    assert [line['result'] for line in lines] == [3, 7, None, None]
+    assert [line['index'] for line in lines] == [0, 1, 2, 3]
+    assert lines[2]['error'] == "Invalid numbers provided"
+    assert lines[3]['error'] == "Invalid JSON"
+
+
+def test_add_is_charged_per_element(client):
+    """A batch larger than the element quota exhausts it for the next request."""
+    response = client.post(
+        '/v1/tools/add', json={"num1": [1] * 10000, "num2": [1] * 10000}, headers=HEADERS
+    )
+    assert response.status_code == 200
+
+    response = client.post('/v1/tools/add', json={"num1": [1], "num2": [1]}, headers=HEADERS)
+    assert response.status_code == 429
@@ -0,0 +1,98 @@
+import math
+import re
+from collections import Counter
+
+import pytest
+
+from app import app
+from v1.tools.scripts.generator import Chars, CredentialGenerator, RandomSource, Words
+
+WORDS = ("alpha", "bravo", "charlie", "delta")
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+class ScriptedBytes:
+    def __init__(self, data):
+        self.data = bytes(data)
+
+    def __call__(self, n):
+        chunk, self.data = self.data[:n], self.data[n:]
+        return chunk
+
+
+def test_rejection_sampling_drops_biased_values():
+    # 256 % 3 == 1: byte 255 would favour 0, so it's skipped
+    source = RandomSource(buffer_size=4, randbytes=ScriptedBytes([255, 4, 255, 2, 0, 0, 0, 0]))
+    assert source.below(3, 2) == [1, 2]
+    assert Chars("abc", 2).generate(RandomSource(randbytes=ScriptedBytes([255, 254, 0, 1] + [0] * 8))) == "ca"
+
+
+def test_words_need_several_bytes_per_draw():
+    source = RandomSource(randbytes=ScriptedBytes([0xFF, 0xFF, 0x00, 0x05] + [0] * 16))
+    # 2 bytes per draw for 300 words; 65535 is past the largest multiple of 300
+    assert source.below(300) == [5]
+
+
+def test_output_is_uniform():
+    counts = Counter(Chars("abcdefg", 70000).generate(RandomSource()))
+    assert set(counts) == set("abcdefg")
+    assert all(abs(count - 10000) < 500 for count in counts.values())
+
+
+def test_fork_discards_buffer():
+    source = RandomSource()
+    source.read(10)
+    source._discard()
+    assert source._buffer == b"" and source._offset == 0
+
+
+def test_policies_shape_and_entropy():
+    generator = CredentialGenerator(WORDS)
+    assert re.fullmatch(r"([a-z]+-){2,}[a-z]+[A-Z][0-9]{2}[!$#%&*+\-=?@_]", generator.generate("passphrase"))
+    assert re.fullmatch(r"[0-9]{6}", generator.generate("pin"))
+    assert re.fullmatch(r"cx_[0-9A-Za-z]{40}", generator.generate("api_token"))
+    assert len(generator.generate("password")) == 20
+
+    assert generator.policies["pin"].entropy_bits == pytest.approx(6 * math.log2(10))
+    assert generator.policies["passphrase"].entropy_bits == pytest.approx(
+        3 * math.log2(4) + math.log2(26) + 2 * math.log2(10) + math.log2(12)
+    )
+    with pytest.raises(KeyError):
+        generator.generate("nope")
+
+
+def test_short_passphrases_get_more_words():
+    passphrase = Words(("ab", "cd"), count=2, min_length=12).generate(RandomSource())
+    assert len(passphrase) >= 12 and passphrase.count("-") >= 3
+
+
+def test_repeated_words_are_counted_once():
+    words = Words(("ab", "cd", "ab", "ef", "cd"), count=2)
+    assert words.words == ("ab", "cd", "ef")
+    assert words.entropy_bits == pytest.approx(2 * math.log2(3))
+    with pytest.raises(ValueError):
+        Words(("ab", "ab"))
+
+
+def test_invalid_alphabets():
+    with pytest.raises(ValueError):
+        Chars("a")
+    with pytest.raises(ValueError):
+        Chars("aé€")
+
+
+def test_generate_route(client):
+    response = client.get("/v1/tools/Generate?policy=api_token")
+    assert response.status_code == 200
+    assert response.json["response"].startswith("cx_")
+    assert response.json["entropy_bits"] == 238.2
+
+    response = client.get("/v1/tools/Generate?policy=unknown")
+    assert response.status_code == 400
+    assert set(response.json["policies"]) == {"passphrase", "password", "pin", "api_token"}
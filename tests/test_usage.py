@@ -0,0 +1,103 @@
+import time
+import uuid
+
+import pytest
+from unittest.mock import Mock
+from redis import Redis
+
+from app import app
+from common.utils.usage import UsageRecorder
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    # Usage is only recorded with a Redis LIMITER_STORAGE (test_routes.py uses memory://)
+    storage = app.config["LIMITER_STORAGE"]
+    app.config["LIMITER_STORAGE"] = "redis://localhost:6379/0"
+    app.extensions.pop("usage", None)
+    with app.test_client() as client:
+        yield client
+    app.config["LIMITER_STORAGE"] = storage
+    app.extensions.pop("usage", None)
+
+
+@pytest.fixture
+def recorder():
+    return UsageRecorder(Redis.from_url("redis://localhost:6379/0"), bucket_seconds=60, flush_interval=3600)
+
+
+class BrokenClient:
+    def pipeline(self, transaction=True):
+        raise ConnectionError("Redis is down")
+
+
+def test_usage_is_flushed_and_reported(recorder):
+    api_key = f"key-{uuid.uuid4()}"
+    for ip in ["10.0.0.1", "10.0.0.2", "10.0.0.1"]:
+        recorder.record(api_key, "/api", ip, 10, 100)
+    recorder.record(api_key, "/v1/tasks/batch", "10.0.0.3", 500, None)
+    assert recorder.report(api_key, 3600)["requests"] == 0  # nothing flushed yet
+
+    recorder.flush()
+    report = recorder.report(api_key, 3600)
+    assert report["requests"] == 4
+    assert report["bytes_in"] == 530
+    assert report["bytes_out"] == 300
+    assert report["unique_ips"] == 3
+    assert report["routes"]["/api"] == {"requests": 3, "bytes_in": 30, "bytes_out": 300}
+
+
+def test_reports_only_cover_the_window(recorder):
+    api_key = f"key-{uuid.uuid4()}"
+    recorder.record(api_key, "/api", "10.0.0.1", 0, 0)
+    recorder.flush()
+    later = time.time() + 7200
+    assert recorder.report(api_key, 3600, now=later)["requests"] == 0
+    assert recorder.report(api_key, 86400, now=later)["requests"] == 1
+
+
+def test_failed_flush_keeps_counters():
+    recorder = UsageRecorder(BrokenClient(), flush_interval=3600)
+    recorder.record("key", "/api", "10.0.0.1", 1, 2)
+    recorder.flush()
+    recorder.record("key", "/api", "10.0.0.2", 1, 2)
+    (counts,) = recorder._counts.values()
+    assert counts == [2, 2, 4]
+    (ips,) = recorder._ips.values()
+    assert ips == {"10.0.0.1", "10.0.0.2"}
+
+
+def test_usage_endpoint_reports_calling_key(client):
+    headers = {"X-Api-Key": f"key-{uuid.uuid4()}"}
+    assert client.post('/api', headers=headers).status_code == 200
+    app.extensions["usage"].flush()
+
+    response = client.get('/usage?window=3600', headers=headers)
+    assert response.status_code == 200
+    window = response.json["windows"]["3600"]
+    assert window["routes"]["/api"]["requests"] == 1
+    assert window["unique_ips"] == 1
+
+
+def test_usage_endpoint_validates_windows(client):
+    headers = {"X-Api-Key": "expected-api-key"}
+    assert client.get('/usage', headers={}).status_code == 401
+    assert client.get('/usage?window=abc', headers=headers).status_code == 400
+    assert client.get('/usage?window=0', headers=headers).status_code == 400
+
+
+def test_usage_is_skipped_without_redis_storage(client):
+    app.config["LIMITER_STORAGE"] = "memory://"
+    assert client.post('/api', headers={"X-Api-Key": "expected-api-key"}).status_code == 200
+    assert app.extensions["usage"] is None
+    assert client.get('/usage', headers={"X-Api-Key": "expected-api-key"}).status_code == 404
+
+
+def test_client_is_created_on_first_flush():
+    connect = Mock(return_value=Redis.from_url("redis://localhost:6379/0"))
+    recorder = UsageRecorder(connect=connect, flush_interval=3600)
+    recorder.record("key", "/api", "10.0.0.1", 1, 2)
+    connect.assert_not_called()
+    recorder.flush()
+    connect.assert_called_once()
@@ -0,0 +1,157 @@
+import logging
+
+from flask import Blueprint, abort, current_app, g, jsonify, request
+from common.utils.common_utils import require_admin_key, require_api_key
+from common.utils.limiter import limiter
+from common.utils.log_sinks import BackgroundHandler
+from common.utils.redis_client import get_redis
+from common.utils.usage import get_usage
+
+# Base routes, registered without a prefix
+base_routes = Blueprint("base", __name__)
+
+
+@base_routes.route("/", methods=["GET"])
+def home():
+    return jsonify(message="Welcome to the CyberITEX API!")
+
+
+@base_routes.route("/api", methods=["POST"])
+@require_api_key
+@limiter.limit("5/minute")  # Rate limiting: 5 requests per minute
+def api():
+    return jsonify(status="success", data="This is the API endpoint.")
+
+
+@base_routes.route("/limit", methods=["GET"])
+@limiter.limit("5/minute")  # Rate limiting: 5 requests per minute
+def limit():
+    return jsonify(status="success", data="Sky is the limit")
+
+
+@base_routes.route("/health", methods=["GET"])
+def health_check():
+    # Check dependencies
+    health_status = {
+        "status": "healthy",
+        "dependencies": {
+            "database": False,
+            "redis": False,
+        },
+    }
+
+    try:
+        # Check database connection (example using SQLAlchemy)
+        # with app.config['DB_ENGINE'].connect() as conn:
+        #     conn.execute("SELECT 1")
+        health_status["dependencies"]["database"] = True
+    except Exception:
+        health_status["status"] = "unhealthy"
+
+    try:
+        # Check Redis connection (fails fast while the circuit is open)
+        if get_redis().ping():
+            health_status["dependencies"]["redis"] = True
+    except Exception as e:
+        health_status["status"] = "unhealthy"
+        health_status["dependencies"]["redis"] = False
+        print(f"Redis health check failed: {e}")
+    health_status["circuit_breakers"] = {
+        "redis": current_app.extensions["redis_breaker"].snapshot()
+    }
+
+    # Return appropriate status code
+    if health_status["status"] == "healthy":
+        return jsonify(health_status), 200
+    else:
+        return jsonify(health_status), 500
+
+
+@base_routes.route("/metrics", methods=["GET"])
+def metrics():
+    status_cache = current_app.extensions.get("task_status_cache")
+    admission = current_app.extensions.get("admission")
+    return jsonify(
+        {
+            "circuit_breakers": {
+                "redis": current_app.extensions["redis_breaker"].snapshot(),
+                **{
+                    breaker.name: breaker.snapshot()
+                    for breaker in current_app.extensions.get("limiter_breakers", {}).values()
+                },
+            },
+            "task_status_cache": status_cache.snapshot() if status_cache else None,
+            "admission": admission.snapshot() if admission else None,
+            "log_sinks": {
+                handler.thread_name: handler.snapshot()
+                for handler in logging.getLogger("api_logger").handlers
+                if isinstance(handler, BackgroundHandler)
+            },
+        }
+    ), 200
+
+
+@base_routes.route("/usage", methods=["GET"])
+@require_api_key
+@limiter.limit("30/minute")
+def usage():
+    """
+    Usage of the calling API key over one or more windows (in seconds).
+    Example: /usage?window=3600,86400
+    Counts reach Redis every USAGE_FLUSH_INTERVAL seconds, so the most
+    recent requests may not be included yet.
+    """
+    try:
+        windows = [int(window) for window in request.args.get("window", "3600,86400").split(",")]
+    except ValueError:
+        return jsonify({"error": "window must be a comma separated list of seconds"}), 400
+    if any(not 0 < window <= current_app.config["USAGE_RETENTION"] for window in windows):
+        return jsonify({"error": "window must be between 1 second and USAGE_RETENTION"}), 400
+
+    recorder = get_usage()
+    if recorder is None:
+        abort(404)  # usage is only recorded with a Redis LIMITER_STORAGE
+    return jsonify({
+        "windows": {str(window): recorder.report(g.api_key, window) for window in windows},
+    }), 200
+
+
+@base_routes.route("/admin/memory", methods=["GET", "POST"])
+@require_admin_key
+def memory_diagnostics():
+    """
+    Memory diagnostics of the gunicorn workers (MEMORY_DIAGNOSTICS).
+    GET reports RSS, GC and tracemalloc state of every worker. POST sends
+    {"command": "start" | "snapshot" | "stop" | "recycle" | "stats",
+    "host": <worker host>, "pid": <worker pid, all workers if omitted>,
+    "limit": 10};
+    "snapshot" adds the top allocation sites and the growth since "start"
+    or the previous snapshot.
+    """
+    from common.utils.memory import COMMANDS, broadcast
+
+    if not current_app.config["MEMORY_DIAGNOSTICS"]:
+        abort(404)
+    data = (request.get_json(silent=True) or {}) if request.method == "POST" else {}
+    command = data.get("command", "stats")
+    host, pid, limit = data.get("host"), data.get("pid"), data.get("limit", 10)
+    if command not in COMMANDS:
+        return jsonify({"error": f"command must be one of {', '.join(COMMANDS)}"}), 400
+    if (pid is not None and not isinstance(pid, int)) or not isinstance(limit, int) or not 0 < limit <= 100:
+        return jsonify({"error": "pid must be an integer and limit between 1 and 100"}), 400
+    # Every API node sharing the Redis gets the command: a pid alone could
+    # match a worker on another host
+    if (pid is None) != (host is None) or (host is not None and not isinstance(host, str)):
+        return jsonify({"error": "A worker is selected by both host and pid"}), 400
+
+    workers, missing = broadcast(
+        command, host, pid, limit, timeout=current_app.config["MEMORY_DIAGNOSTICS_TIMEOUT"]
+    )
+    if pid is not None and not workers:
+        return jsonify({"error": f"No worker with pid {pid} on {host} answered"}), 404
+    return jsonify({"workers": workers, "missing": missing}), 200
+
+
+@base_routes.route('/liveness', methods=['GET'])
+def liveness_check():
+    return jsonify({"status": "alive"}), 200
@@ -1,14 +1,46 @@
+import asyncio
+import hashlib
+import json
+import threading
+
+from celery import group, states
 from celery.exceptions import SoftTimeLimitExceeded
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
+from redis.exceptions import RedisError
 from common.celery_app import celery
-from common.utils.common_utils import require_api_key
+from common.utils.admission import admission_control
+from common.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from common.utils.common_utils import client_id, require_api_key
+from common.utils.delayed import defer
+from common.utils.idempotency import content_key, submit_once
+from common.utils.memoize import memo_options, memoize, submit_memoized
+from common.utils.progress import TaskProgress, read_progress
+from common.utils.redis_client import get_async_redis, get_broker_redis, get_redis
+from common.utils.status_cache import TaskStatusCache
 from common.utils.limiter import limiter
-from time import sleep
+from inspect import signature
+from time import time
 
 
 tasks_routes = Blueprint("tasks", __name__)
 
 
+@tasks_routes.before_request
+def require_redis():
+    # Every task route needs the broker or result backend, so fail fast with
+    # a 503 while Redis is known to be down. In half-open state this ping is
+    # the recovery probe.
+    breaker = current_app.extensions["redis_breaker"]
+    if breaker.state == CircuitBreaker.CLOSED:
+        return
+    try:
+        get_redis().ping()
+    except CircuitOpenError:
+        raise
+    except RedisError:
+        raise CircuitOpenError(breaker.name, breaker.retry_after)
+
+
 @tasks_routes.route("/", methods=["GET"])
 @limiter.limit("5/minute")
 def home_tools():
@@ -17,77 +49,500 @@ def home_tools():
 
 @tasks_routes.route("/RunBackgroundTask", methods=["GET"])
 @limiter.limit("20/minute")
+@admission_control()
 def RunBackgroundTask():
-    task = background_task.delay()
-    return jsonify({"response": task.id}), 200
+    # Retries carrying the same Idempotency-Key (or ?dedupe=true for a key
+    # derived from the task itself) get the original task id back. Keys are
+    # scoped to the client, so clients never get each other's tasks
+    key = request.headers.get("Idempotency-Key")
+    ttl = current_app.config["IDEMPOTENCY_TTL"]
+    if not key and request.args.get("dedupe", "").lower() in ["true", "1"]:
+        # Only collapses a burst of retries: later calls are new submissions
+        key = content_key(background_task.name)
+        ttl = current_app.config["IDEMPOTENCY_DEDUPE_TTL"]
+
+    if not key:
+        task = background_task.delay()
+        return jsonify({"response": task.id, "deduplicated": False}), 200
 
+    task_id, deduplicated = submit_once(
+        get_redis(),
+        f"{client_id()}:{key}",
+        background_task,
+        ttl=ttl,
+    )
+    return jsonify({"response": task_id, "deduplicated": deduplicated}), 200
 
-@celery.task(bind=True, time_limit=7200, soft_time_limit=7100, rate_limit="10/m")
-def background_task(self):
+
+# Longest wait background_task accepts, in seconds
+MAX_DELAY = 3600
+
+
+@celery.task(bind=True, time_limit=60, soft_time_limit=50, rate_limit="10/m")
+def background_task(self, delay=10, resume_at=None):
     task_id = self.request.id
     try:
-        sleep(10)
+        # Waits `delay` seconds as a scheduled retry rather than a sleep, so
+        # the worker slot serves other tasks in the meantime. Capped here as
+        # well as in the routes: the task re-publishes itself until resume_at
+        delay = min(max(delay, 0), MAX_DELAY)
+        resume_at = min(resume_at if resume_at is not None else time() + delay, time() + MAX_DELAY)
+        if resume_at > time():
+            waited = 1 - (resume_at - time()) / delay if delay else 1
+            TaskProgress(self).update(percent=100 * waited, stage="waiting", eta_at=resume_at)
+        defer(self, resume_at)
         return task_id
     except SoftTimeLimitExceeded:
         return f"Task exceeded soft time limit for"
 
 
+# Digests digest_task accepts: fixed-length ones, at most MAX_DIGEST_ROUNDS
+# times (about 0.15 s for the slowest), well within its time limit
+DIGEST_ALGORITHMS = sorted(hashlib.algorithms_guaranteed - {"shake_128", "shake_256"})
+MAX_DIGEST_ROUNDS = 100000
+
+
+@memoize()
+@celery.task(time_limit=60, soft_time_limit=50)
+def digest_task(text, algorithm="sha256", rounds=1):
+    # A pure function of its arguments: repeated calls are served from the
+    # memoization cache (see /submit)
+    if algorithm not in DIGEST_ALGORITHMS or not 1 <= rounds <= MAX_DIGEST_ROUNDS:
+        raise ValueError("Unsupported algorithm or number of rounds")
+    digest = text.encode("utf-8")
+    for _ in range(rounds):
+        digest = hashlib.new(algorithm, digest).digest()
+    return digest.hex()
+
+
+# Tasks that can be submitted by name through the batch and submit endpoints
+BATCH_TASKS = {
+    "background_task": background_task,
+    "digest_task": digest_task,
+}
+
+
+def invalid_call(task, args, kwargs):
+    # Arguments clients may not choose freely, or None when the call is fine
+    if task is background_task:
+        if args or set(kwargs) - {"delay"}:
+            return "background_task only accepts a delay keyword"
+        delay = kwargs.get("delay", 10)
+        if isinstance(delay, bool) or not isinstance(delay, (int, float)) or not 0 <= delay <= MAX_DELAY:
+            return f"delay must be between 0 and {MAX_DELAY} seconds"
+    elif task is digest_task:
+        try:
+            call = signature(digest_task.run).bind(*args, **kwargs).arguments
+        except TypeError:
+            return "digest_task takes text, algorithm and rounds"
+        rounds = call.get("rounds", 1)
+        if not isinstance(call["text"], str):
+            return "text must be a string"
+        if call.get("algorithm", "sha256") not in DIGEST_ALGORITHMS:
+            return f"algorithm must be one of {', '.join(DIGEST_ALGORITHMS)}"
+        if isinstance(rounds, bool) or not isinstance(rounds, int) or not 1 <= rounds <= MAX_DIGEST_ROUNDS:
+            return f"rounds must be between 1 and {MAX_DIGEST_ROUNDS}"
+    return None
+
+
+def batch_size():
+    # Batches are charged by the number of tasks they submit
+    data = request.get_json(silent=True)
+    tasks = data.get("tasks") if isinstance(data, dict) else None
+    return len(tasks) if isinstance(tasks, list) and tasks else 1
+
+
+@tasks_routes.route("/batch", methods=["POST"])
+@require_api_key
+@limiter.limit("200/minute", cost=batch_size)
+@admission_control()
+def submit_batch():
+    """
+    Submit many tasks with a single publish.
+    Example JSON payload:
+    { "tasks": [{"name": "background_task", "args": [], "kwargs": {}}], "chunk_size": 10 }
+    """
+    data = request.get_json(silent=True)
+    specs = data.get("tasks") if isinstance(data, dict) else None
+    if not isinstance(specs, list) or not specs:
+        return jsonify({"error": "Invalid input, please provide a list of tasks"}), 400
+    if len(specs) > current_app.config["BATCH_MAX_TASKS"]:
+        return jsonify({
+            "error": f"A batch may contain at most {current_app.config['BATCH_MAX_TASKS']} tasks"
+        }), 400
+
+    tasks, calls = set(), []
+    for index, spec in enumerate(specs):
+        task = BATCH_TASKS.get(spec.get("name")) if isinstance(spec, dict) else None
+        args, kwargs = (spec.get("args", []), spec.get("kwargs", {})) if task else (None, None)
+        if task is None or not isinstance(args, list) or not isinstance(kwargs, dict):
+            return jsonify({"error": f"Invalid task specification at index {index}"}), 400
+        error = invalid_call(task, args, kwargs)
+        if error:
+            return jsonify({"error": f"Invalid task specification at index {index}: {error}"}), 400
+        tasks.add(task)
+        calls.append((task, args, kwargs))
+
+    chunk_size = data.get("chunk_size")
+    if chunk_size is not None:
+        # Chunks pack several calls of one task into each message
+        if not isinstance(chunk_size, int) or chunk_size < 1:
+            return jsonify({"error": "chunk_size must be a positive integer"}), 400
+        if len(tasks) != 1 or any(kwargs for _, _, kwargs in calls):
+            return jsonify({"error": "Chunking requires a single task name and positional args only"}), 400
+        signature = calls[0][0].chunks([args for _, args, _ in calls], chunk_size).group()
+    else:
+        signature = group(task.s(*args, **kwargs) for task, args, kwargs in calls)
+
+    # group publishes every member over one producer connection
+    result = signature.apply_async()
+    result.save()
+    return jsonify({
+        "group_id": result.id,
+        "task_ids": [child.id for child in result.results],
+    }), 200
+
+
+@tasks_routes.route("/submit", methods=["POST"])
+@require_api_key
+@limiter.limit("20/minute")
+@admission_control()
+def submit_task():
+    """
+    Submit one task by name. Calls of memoized tasks are answered from the
+    result cache without enqueuing, and identical calls share the one in flight.
+    Example JSON payload:
+    { "name": "digest_task", "args": ["some text"], "kwargs": {"rounds": 1000} }
+    """
+    data = request.get_json(silent=True)
+    task = BATCH_TASKS.get(data.get("name")) if isinstance(data, dict) else None
+    args, kwargs = (data.get("args", []), data.get("kwargs", {})) if task else (None, None)
+    if task is None or not isinstance(args, list) or not isinstance(kwargs, dict):
+        return jsonify({"error": "Invalid task specification"}), 400
+    error = invalid_call(task, args, kwargs)
+    if error:
+        return jsonify({"error": f"Invalid task specification: {error}"}), 400
+
+    if memo_options(task) is None:
+        task_id = task.apply_async(args=args, kwargs=kwargs).id
+        return jsonify({"response": task_id, "cached": False, "deduplicated": False}), 200
+
+    # The result backend's Redis: where the workers cache results and release claims
+    task_id, cached, deduplicated, result = submit_memoized(celery.backend.client, task, args, kwargs)
+    response = {"response": task_id, "cached": cached, "deduplicated": deduplicated}
+    if cached:
+        response["result"] = result
+    return jsonify(response), 200
+
+
+@tasks_routes.route("/group/<group_id>", methods=["GET"])
+@limiter.limit("30/minute")
+def get_group_status(group_id):
+    result = celery.GroupResult.restore(group_id)
+    if result is None:
+        return jsonify({"error": "Group not found"}), 404
+
+    # One MGET for all members instead of one lookup per task, and one more
+    # for the progress of those still running
+    counts = {}
+    task_ids = [child.id for child in result.results]
+    metas = celery.backend.get_many_meta(task_ids)
+    for meta in metas:
+        counts[meta["status"]] = counts.get(meta["status"], 0) + 1
+    running = [task_id for task_id, meta in zip(task_ids, metas) if meta["status"] not in states.READY_STATES]
+    progress = [entry for entry in read_progress(celery.backend.client, running).values() if entry]
+
+    total = len(result.results)
+    completed = sum(count for state, count in counts.items() if state in states.READY_STATES)
+    etas = [entry["eta_seconds"] for entry in progress if entry["eta_seconds"] is not None]
+    return jsonify({
+        "group_id": group_id,
+        "total": total,
+        "completed": completed,
+        "counts": counts,
+        # Finished members count as 100%, running ones without progress as 0%
+        "percent": round((100 * completed + sum(entry["percent"] for entry in progress)) / total, 1) if total else 100.0,
+        "eta_seconds": max(etas) if etas else None,
+    }), 200
+
+
+@tasks_routes.route("/progress", methods=["POST"])
+@limiter.limit("30/minute")
+def get_tasks_progress():
+    """
+    State and progress of many tasks in two round trips, for dashboards.
+    Example JSON payload:
+    { "task_ids": ["...", "..."] }
+    """
+    data = request.get_json(silent=True)
+    task_ids = data.get("task_ids") if isinstance(data, dict) else None
+    if not isinstance(task_ids, list) or not task_ids or not all(isinstance(i, str) for i in task_ids):
+        return jsonify({"error": "task_ids must be a non-empty list of task ids"}), 400
+    if len(task_ids) > current_app.config["BATCH_MAX_TASKS"]:
+        return jsonify({
+            "error": f"At most {current_app.config['BATCH_MAX_TASKS']} task ids per request"
+        }), 400
+
+    metas = celery.backend.get_many_meta(task_ids)
+    running = [task_id for task_id, meta in zip(task_ids, metas) if meta["status"] not in states.READY_STATES]
+    progress = read_progress(celery.backend.client, running)
+    return jsonify({
+        "tasks": {
+            task_id: {"state": meta["status"], "progress": progress.get(task_id)}
+            for task_id, meta in zip(task_ids, metas)
+        },
+    }), 200
+
+
+def fetch_status(task_id):
+    meta = celery.backend.get_task_meta(task_id)
+    if meta["status"] in states.READY_STATES:
+        return meta
+    # Copied: the backend may hand out its own cached dict
+    return {**meta, "progress": read_progress(celery.backend.client, [task_id])[task_id]}
+
+
+def status_cache():
+    """Per-worker TaskStatusCache, created on first use."""
+    cache = current_app.extensions.get("task_status_cache")
+    if cache is None:
+        cache = current_app.extensions["task_status_cache"] = TaskStatusCache(
+            fetch_status,
+            maxsize=current_app.config["TASK_STATUS_CACHE_SIZE"],
+            maxbytes=current_app.config["TASK_STATUS_CACHE_BYTES"],
+            coalesce_window=current_app.config["TASK_STATUS_COALESCE_WINDOW"],
+        )
+    return cache
+
+
 @tasks_routes.route("/status/<task_id>", methods=["GET"])
 @limiter.limit("30/minute")
 def get_task_status(task_id):
-    result = celery.AsyncResult(task_id)
+    # One (cached or shared) backend read for the whole response
+    meta = status_cache().get(task_id)
+    state = meta["status"]
     response = {
         "task_id": task_id,
-        "state": result.state,
+        "state": state,
     }
 
-    if result.state == "PENDING":
+    if state == "PENDING":
         response["message"] = "Task is pending or unknown"
-    elif result.state == "STARTED":
+    elif state == "STARTED":
         response["message"] = "Task has started"
-    elif result.state == "SUCCESS":
-        response["result"] = result.result
-    elif result.state == "FAILURE":
-        response["error"] = str(result.result)
-    elif result.state == "REVOKED":
+    elif state == "RETRY":
+        response["message"] = "Task is scheduled to resume"
+    elif state == "SUCCESS":
+        response["result"] = meta["result"]
+    elif state == "FAILURE":
+        response["error"] = str(meta["result"])
+    elif state == "REVOKED":
         response["message"] = "Task was revoked"
+    if meta.get("progress"):
+        response["progress"] = meta["progress"]
 
     return jsonify(response), 200
 
 
+# Inspect broadcasts draw on the broker connection pool (broker_pool_limit)
+# and, once it is exhausted, wait for a connection that never comes back:
+# concurrent broadcasts are kept below the pool size
+BROADCAST_SLOTS = threading.BoundedSemaphore(max(1, (celery.conf.broker_pool_limit or 10) - 1))
+
+
 # Status route for checking The request status
 @tasks_routes.route("/GetPendingRequests", methods=["GET"])
 @require_api_key
 # Function to inspect and gather tasks that are not successful
-def GetPendingRequests():
-    # Inspect the workers
-    inspect = celery.control.inspect()
+async def GetPendingRequests():
+    # The three inspect broadcasts (blocking kombu calls, each waiting up to
+    # a second for replies) run side by side instead of one after another
+    def inspect(method):
+        with BROADCAST_SLOTS:
+            return getattr(celery.control.inspect(), method)() or {}
 
-    # Get all active, scheduled, and reserved tasks
-    active_tasks = inspect.active() or {}
-    scheduled_tasks = inspect.scheduled() or {}
-    reserved_tasks = inspect.reserved() or {}
+    active_tasks, scheduled_tasks, reserved_tasks = await asyncio.gather(
+        *(asyncio.to_thread(inspect, method) for method in ("active", "scheduled", "reserved"))
+    )
 
+    found = []
+    for tasks, state_name in [
+        (active_tasks, "active"),
+        (scheduled_tasks, "scheduled"),
+        (reserved_tasks, "reserved"),
+    ]:
+        for worker, worker_tasks in tasks.items():
+            for task in worker_tasks:
+                # Scheduled entries wrap the task request together with its ETA
+                found.append((task.get("request", task)["id"], worker, state_name))
+    if not found:
+        return jsonify({"response": []}), 200
+
+    # States of every task in one MGET rather than one read per task
+    backend = celery.backend
+    values = await get_async_redis(backend.url).mget(
+        [backend.get_key_for_task(task_id) for task_id, _, _ in found]
+    )
     pending_tasks = []
+    for (task_id, worker, state_name), value in zip(found, values):
+        decoded = backend.decode(value) if value else None
+        state = decoded["status"] if decoded else states.PENDING
+        if state != "SUCCESS":  # Check if the task is not successful
+            pending_tasks.append(
+                {
+                    "task_id": task_id,
+                    "state": state,
+                    "worker": worker,
+                    "type": state_name,
+                }
+            )
+    return jsonify({"response": pending_tasks}), 200
 
-    # Function to check tasks in any state (active, scheduled, reserved)
-    def check_tasks(tasks, state_name):
+
+def inspect_worker_tasks():
+    # (worker, type, request) for every active, scheduled and reserved task
+    inspect = celery.control.inspect()
+    for state_name, tasks in [
+        ("active", inspect.active() or {}),
+        ("scheduled", inspect.scheduled() or {}),
+        ("reserved", inspect.reserved() or {}),
+    ]:
         for worker, worker_tasks in tasks.items():
             for task in worker_tasks:
-                task_id = task["id"]
-                result = celery.AsyncResult(task_id)
-                if result.state != "SUCCESS":  # Check if the task is not successful
-                    pending_tasks.append(
-                        {
-                            "task_id": task_id,
-                            "state": result.state,
-                            "worker": worker,
-                            "type": state_name,
-                        }
-                    )
-
-    # Check active, scheduled, and reserved tasks
-    check_tasks(active_tasks, "active")
-    check_tasks(scheduled_tasks, "scheduled")
-    check_tasks(reserved_tasks, "reserved")
-    return jsonify({"response": pending_tasks}), 200
+                # Scheduled entries wrap the task request together with its ETA
+                yield worker, state_name, task.get("request", task)
+
+
+def broker_queue_keys():
+    # Redis lists holding the waiting messages of every queue, including
+    # kombu's separate lists per priority step
+    queues = {celery.conf.task_default_queue} | {queue.name for queue in celery.conf.task_queues or []}
+    return [f"{queue}\x06\x16{step}" if step else queue for queue in sorted(queues) for step in (0, 3, 6, 9)]
+
+
+# One pass over the waiting messages of KEYS, from the tail where workers
+# pop them, scanning at most ARGV[4] messages in all. Messages whose id is a
+# key of the ARGV[1] JSON object or whose task is ARGV[2] match; with ARGV[3]
+# set they are dropped by rewriting the scanned part of the list. Returns
+# {purged, scanned, truncated, matched ids}.
+SELECT_MESSAGES = """
+local ids = cjson.decode(ARGV[1])
+local name, purge, budget = ARGV[2], ARGV[3] == "1", tonumber(ARGV[4])
+local matched, purged, scanned, truncated = {}, 0, 0, 0
+for _, key in ipairs(KEYS) do
+    local length = redis.call("LLEN", key)
+    local count = math.min(length, budget - scanned)
+    if count < length then
+        truncated = 1
+    end
+    if count > 0 then
+        local kept = {}
+        for _, raw in ipairs(redis.call("LRANGE", key, -count, -1)) do
+            local ok, message = pcall(cjson.decode, raw)
+            local headers = ok and type(message) == "table" and message.headers
+            if type(headers) == "table" and (ids[headers.id] or (name ~= "" and headers.task == name)) then
+                if type(headers.id) == "string" then
+                    matched[#matched + 1] = headers.id
+                end
+            else
+                kept[#kept + 1] = raw
+            end
+        end
+        scanned = scanned + count
+        if purge and #kept < count then
+            redis.call("LTRIM", key, 0, -count - 1)
+            for i = 1, #kept, 1000 do
+                redis.call("RPUSH", key, unpack(kept, i, math.min(i + 999, #kept)))
+            end
+            purged = purged + count - #kept
+        end
+    end
+end
+return {purged, scanned, truncated, matched}
+"""
+
+
+def select_messages(client, task_ids, name, purge, limit):
+    # (matched ids, purged, truncated) for the messages waiting in the broker
+    script = current_app.extensions.get("select_messages")
+    if script is None:
+        script = current_app.extensions["select_messages"] = client.register_script(SELECT_MESSAGES)
+    purged, _, truncated, matched = script(
+        keys=broker_queue_keys(),
+        args=[json.dumps(dict.fromkeys(task_ids, True)), name or "", int(purge), limit],
+        client=client,
+    )
+    return [task_id.decode("utf-8") for task_id in matched], purged, bool(truncated)
+
+
+@tasks_routes.route("/revoke/<task_id>", methods=["POST"])
+@require_api_key
+@limiter.limit("10/minute")
+def revoke_task(task_id):
+    terminate = request.args.get("terminate", "").lower() in ["true", "1"]
+    celery.control.revoke(task_id, terminate=terminate)
+    return jsonify({"revoked": [task_id], "terminate": terminate}), 200
+
+
+@tasks_routes.route("/revoke", methods=["POST"])
+@require_api_key
+@limiter.limit("10/minute")
+def revoke_tasks():
+    """
+    Revoke tasks by id, by task name and/or by batch group in one broadcast.
+    With "purge", messages of those tasks still waiting in the broker are
+    deleted too; "purge" without any selector drains every queue.
+    Example JSON payload:
+    { "task_ids": ["..."], "name": "v1.tasks.routes.background_task",
+      "group_id": "...", "terminate": false, "purge": false }
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid input, please provide a JSON object"}), 400
+
+    task_ids = data.get("task_ids", [])
+    if not isinstance(task_ids, list) or not all(isinstance(i, str) for i in task_ids):
+        return jsonify({"error": "task_ids must be a list of task ids"}), 400
+    task_ids = set(task_ids)
+
+    if data.get("group_id"):
+        result = celery.GroupResult.restore(data["group_id"])
+        if result is None:
+            return jsonify({"error": "Group not found"}), 404
+        task_ids.update(child.id for child in result.results)
+
+    name = data.get("name")
+    selected = bool(task_ids or name)
+    if name:
+        # Tasks handed to a worker, then those still waiting in the broker
+        task_ids.update(
+            task["id"]
+            for _, _, task in inspect_worker_tasks()
+            if task.get("name") == name
+        )
+
+    purge = bool(data.get("purge", False))
+    terminate = bool(data.get("terminate", False))
+    response = {"terminate": terminate}
+    if selected:
+        # Messages still waiting in the broker, filtered (and with purge, only
+        # the selected ones deleted) by Redis in one pass over at most
+        # REVOKE_SCAN_LIMIT of them
+        matched, purged, truncated = select_messages(
+            get_broker_redis(), task_ids, name, purge, current_app.config["REVOKE_SCAN_LIMIT"]
+        )
+        task_ids.update(matched)
+        response["truncated"] = truncated
+        if purge:
+            response["purged"] = purged
+    elif purge:
+        # No selector: discards every message waiting in the broker queues
+        response["purged"] = celery.control.purge()
+
+    response["revoked"] = sorted(task_ids)
+    if task_ids:
+        # A single broadcast covers every id; workers drop reserved and
+        # scheduled copies as well as any message that arrives later
+        celery.control.revoke(list(task_ids), terminate=terminate)
+
+    return jsonify(response), 200
@@ -1,6 +1,13 @@
-from common.utils.limiter import limiter
-from flask import Blueprint, jsonify, request
+from common.utils.limiter import consume, limiter
+from flask import Blueprint, abort, jsonify, request
 from common.utils.common_utils import require_api_key
+from common.utils.streaming import (
+    InvalidLine,
+    batched,
+    is_streaming_request,
+    iter_ndjson,
+    ndjson_response,
+)
 
 
 from .scripts import utils
@@ -22,6 +29,33 @@ def GeneratePassphrase():
     return jsonify({"response": password}), 200
 
 
+@tools_routes.route("/Generate", methods=["GET"])
+@limiter.limit("20/minute")
+def Generate():
+    """
+    Generate a credential from a named policy.
+    Example: /v1/tools/Generate?policy=password
+    Without a known policy, the available ones are listed with their entropy.
+    """
+    generator = utils.get_generator()
+    policy = request.args.get("policy", "")
+    if policy not in generator.policies:
+        return jsonify({
+            "error": "Unknown or missing policy",
+            "policies": generator.describe(),
+        }), 400
+    return jsonify({
+        "response": generator.generate(policy),
+        "policy": policy,
+        "entropy_bits": generator.policies[policy].describe()["entropy_bits"],
+    }), 200
+
+
+# Batches are charged per element on top of the per-request limit
+ELEMENT_LIMIT = "10000/minute"
+ADD_CHUNK_SIZE = 4096
+
+
 @tools_routes.route('/add', methods=['POST'])
 @require_api_key
 @limiter.limit("5/minute")
@@ -29,9 +63,20 @@ def add_numbers():
     """
     Add two numbers sent in the JSON payload.
     Example JSON payload: { "num1": 5, "num2": 3 }
+    Batches: { "num1": [1, 2], "num2": [3, 4] }, { "pairs": [[1, 3], [2, 4]] }
+    or an application/x-ndjson body with one [a, b] pair per line, which
+    is answered with one NDJSON result line per input line.
     """
+    if is_streaming_request():
+        return ndjson_response(stream_add_results(iter_ndjson(request.stream)))
+
     data = request.get_json()  # Parse JSON payload
 
+    if isinstance(data, dict) and (
+        "pairs" in data or isinstance(data.get("num1"), list) or isinstance(data.get("num2"), list)
+    ):
+        return add_number_arrays(data)
+
     # Validate input
     if not data or 'num1' not in data or 'num2' not in data:
         return jsonify({"error": "Invalid input, please provide num1 and num2"}), 400
@@ -39,10 +84,47 @@ def add_numbers():
     try:
         num1 = float(data['num1'])
         num2 = float(data['num2'])
-    except ValueError:
+    except (TypeError, ValueError):
         return jsonify({"error": "Invalid numbers provided"}), 400
 
     # Perform addition
     result = num1 + num2
 
-    return jsonify({"num1": num1, "num2": num2, "result": result}), 200
\ No newline at end of file
+    return jsonify({"num1": num1, "num2": num2, "result": result}), 200
+
+
+def add_number_arrays(data):
+    if "pairs" in data:
+        if not isinstance(data["pairs"], list):
+            return jsonify({"error": "Invalid input, pairs must be a list"}), 400
+        num1, num2 = utils.split_pairs(data["pairs"])
+    else:
+        num1, num2 = data.get("num1"), data.get("num2")
+        if not isinstance(num1, list) or not isinstance(num2, list) or len(num1) != len(num2):
+            return jsonify({"error": "Invalid input, num1 and num2 must be lists of equal length"}), 400
+
+    if not consume(ELEMENT_LIMIT, max(len(num1), 1), "tools.add_numbers"):
+        abort(429)
+    results, errors = utils.add_arrays(num1, num2)
+    return jsonify({"result": results, "errors": errors}), 200
+
+
+def stream_add_results(items):
+    # Generator handler: one vectorized pass per chunk, so memory stays flat
+    offset = 0
+    for chunk in batched(items, ADD_CHUNK_SIZE):
+        if not consume(ELEMENT_LIMIT, len(chunk), "tools.add_numbers"):
+            yield {"error": "You have exceeded your rate-limit. Please try again later."}
+            return
+
+        pairs = [None if isinstance(item, InvalidLine) else item for item in chunk]
+        results, errors = utils.add_arrays(*utils.split_pairs(pairs), offset=offset)
+        errors = {error["index"]: error["error"] for error in errors}
+        for index, (item, result) in enumerate(zip(chunk, results), start=offset):
+            if isinstance(item, InvalidLine):
+                yield {"index": index, "result": None, "error": item.error}
+            elif index in errors:
+                yield {"index": index, "result": None, "error": errors[index]}
+            else:
+                yield {"index": index, "result": result}
+        offset += len(chunk)
@@ -0,0 +1,167 @@
+import math
+import os
+import string
+import threading
+
+SYMBOLS = "!$#%&*+-=?@_"
+BASE62 = string.digits + string.ascii_letters
+
+
+class RandomSource:
+    """
+    Buffered CSPRNG: reads `buffer_size` bytes from os.urandom at a time
+    and hands them out in slices. Thread-safe; the buffer is discarded in
+    forked children so two workers never hand out the same bytes.
+    """
+
+    def __init__(self, buffer_size=4096, randbytes=os.urandom):
+        self.buffer_size = buffer_size
+        self.randbytes = randbytes
+        self._buffer = b""
+        self._offset = 0
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._discard)
+
+    def _discard(self):
+        self._buffer, self._offset = b"", 0
+
+    def read(self, n):
+        with self._lock:
+            if len(self._buffer) - self._offset < n:
+                self._buffer = self._buffer[self._offset:] + self.randbytes(max(self.buffer_size, n))
+                self._offset = 0
+            data = self._buffer[self._offset:self._offset + n]
+            self._offset += n
+            return data
+
+    def below(self, n, count=1):
+        """`count` integers uniform in [0, n), by rejection sampling (no modulo bias)."""
+        width = max(1, math.ceil(math.log2(n) / 8)) if n > 1 else 1
+        space = 256 ** width
+        limit = space - space % n
+        values = []
+        while len(values) < count:
+            data = self.read(width * (count - len(values)))
+            for start in range(0, len(data), width):
+                value = int.from_bytes(data[start:start + width], "big")
+                if value < limit:
+                    values.append(value % n)
+        return values
+
+
+class Chars:
+    """`length` characters drawn from `alphabet` (at most 256, single-byte characters)."""
+
+    def __init__(self, alphabet, length=1):
+        alphabet = "".join(dict.fromkeys(alphabet))  # unique, order kept
+        if not 1 < len(alphabet) <= 256 or any(ord(char) > 255 for char in alphabet):
+            raise ValueError("alphabet must have 2 to 256 distinct single-byte characters")
+        self.alphabet = alphabet
+        self.length = length
+        n = len(alphabet)
+        self.limit = 256 - 256 % n
+        # Random byte -> character in one bytes.translate() call; bytes at or
+        # above `limit` would bias the result and are deleted instead
+        self.table = bytes(ord(alphabet[byte % n]) if byte < self.limit else 0 for byte in range(256))
+        self.rejected = bytes(range(self.limit, 256))
+        self.entropy_bits = length * math.log2(n)
+
+    def generate(self, source):
+        chars = b""
+        while len(chars) < self.length:
+            missing = self.length - len(chars)
+            # Enough bytes to cover the expected rejections in one read
+            chars += source.read(missing * 256 // self.limit + 2).translate(self.table, self.rejected)
+        return chars[:self.length].decode("latin-1")
+
+
+class Words:
+    """
+    `count` words joined by `separator`; more words are added while the
+    result is shorter than `min_length` (entropy counts `count` only).
+    """
+
+    def __init__(self, words, count=3, separator="-", min_length=0):
+        words = tuple(dict.fromkeys(words))  # unique, order kept
+        if len(words) < 2:
+            raise ValueError("The word list must contain at least 2 distinct words")
+        self.words = words
+        self.count = count
+        self.separator = separator
+        self.min_length = min_length
+        self.entropy_bits = count * math.log2(len(words))
+
+    def generate(self, source):
+        chosen = [self.words[index] for index in source.below(len(self.words), self.count)]
+        passphrase = self.separator.join(chosen)
+        while len(passphrase) < self.min_length:
+            passphrase += self.separator + self.words[source.below(len(self.words))[0]]
+        return passphrase
+
+
+class Literal:
+    def __init__(self, text):
+        self.text = text
+        self.entropy_bits = 0.0
+
+    def generate(self, source):
+        return self.text
+
+
+class Policy:
+    """A credential shape: segments generated in order and concatenated."""
+
+    def __init__(self, name, segments, description=""):
+        self.name = name
+        self.segments = segments
+        self.description = description
+        self.entropy_bits = sum(segment.entropy_bits for segment in segments)
+
+    def generate(self, source):
+        return "".join(segment.generate(source) for segment in self.segments)
+
+    def describe(self):
+        return {"description": self.description, "entropy_bits": round(self.entropy_bits, 1)}
+
+
+def build_policies(words):
+    """The named policies, compiled once per word list."""
+    return {
+        policy.name: policy
+        for policy in [
+            Policy(
+                "passphrase",
+                [
+                    Words(words, count=3, separator="-", min_length=12),
+                    Chars(string.ascii_uppercase),
+                    Chars(string.digits, 2),
+                    Chars(SYMBOLS),
+                ],
+                "Three words, an uppercase letter, two digits and a symbol",
+            ),
+            Policy(
+                "password",
+                [Chars(string.ascii_letters + string.digits + SYMBOLS, 20)],
+                "20 letters, digits and symbols",
+            ),
+            Policy("pin", [Chars(string.digits, 6)], "6 digits"),
+            Policy(
+                "api_token",
+                [Literal("cx_"), Chars(BASE62, 40)],
+                "cx_ followed by 40 base62 characters",
+            ),
+        ]
+    }
+
+
+class CredentialGenerator:
+    def __init__(self, words, source=None):
+        self.source = source or RandomSource()
+        self.policies = build_policies(words)
+
+    def generate(self, policy):
+        # KeyError for unknown policies
+        return self.policies[policy].generate(self.source)
+
+    def describe(self):
+        return {name: policy.describe() for name, policy in self.policies.items()}
@@ -1,8 +1,35 @@
 import secrets
 import string
+from functools import lru_cache
+
 from flask import current_app
 
 
+@lru_cache(maxsize=None)
+def load_words(path):
+    # One word per line, lines starting with "#" are category comments
+    with open(path, encoding="utf-8") as f:
+        return tuple(
+            line.strip() for line in f if line.strip() and not line.startswith("#")
+        )
+
+
+def get_words_list():
+    # An explicit WORDS_LIST in the config takes precedence over the file
+    return current_app.config.get("WORDS_LIST") or load_words(current_app.config["WORDS_FILE"])
+
+
+def get_generator():
+    """CredentialGenerator for the current word list, compiled on first use."""
+    from .generator import CredentialGenerator
+
+    words = get_words_list()
+    cached = current_app.extensions.get("credential_generator")
+    if cached is None or cached[0] is not words:
+        cached = current_app.extensions["credential_generator"] = (words, CredentialGenerator(words))
+    return cached[1]
+
+
 def generate_passphrase(num_words=3, separator="-", min_length=12):
     # Ensure password meets minimum length
     if num_words < 2:
@@ -11,14 +38,15 @@ def generate_passphrase(num_words=3, separator="-", min_length=12):
         )
 
     # Select random words from the word list
-    words = [secrets.choice(current_app.config['WORDS_LIST']) for _ in range(num_words)]
+    words_list = get_words_list()
+    words = [secrets.choice(words_list) for _ in range(num_words)]
 
     # Join words with a separator (like '-' or another character)
     passphrase = separator.join(words)
 
     # If passphrase is too short, add more complexity
     while len(passphrase) < min_length:
-        passphrase += separator + secrets.choice(current_app.config['WORDS_LIST'])
+        passphrase += separator + secrets.choice(words_list)
 
     # Add complexity: one uppercase letter, one digit, one special character
     passphrase += secrets.choice(string.ascii_uppercase)  # Add an uppercase letter
@@ -26,4 +54,57 @@ def generate_passphrase(num_words=3, separator="-", min_length=12):
     passphrase += secrets.choice(string.digits)  # Add a digit
     passphrase += secrets.choice("!$#%&*+-=?@_")  # Add a special character
 
-    return passphrase
\ No newline at end of file
+    return passphrase
+
+
+def to_float_array(values):
+    """
+    Convert a list of JSON values to a float64 array in one pass.
+    Returns the array and a mask of the elements that aren't finite numbers.
+    """
+    import numpy as np  # Deferred so app startup doesn't pay for it
+
+    try:
+        array = np.fromiter(values, dtype=np.float64, count=len(values))
+    except (TypeError, ValueError):
+        # Slow path, only taken when some element can't be converted
+        array = np.empty(len(values), dtype=np.float64)
+        for index, value in enumerate(values):
+            try:
+                array[index] = float(value)
+            except (TypeError, ValueError):
+                array[index] = np.nan
+    return array, ~np.isfinite(array)
+
+
+def add_arrays(num1, num2, offset=0):
+    """
+    Add two equally long lists element-wise.
+    Returns the results (None where an element is invalid) and the errors.
+    """
+    import numpy as np
+
+    a, invalid_a = to_float_array(num1)
+    b, invalid_b = to_float_array(num2)
+    invalid = invalid_a | invalid_b
+
+    results = (a + b).tolist()
+    errors = []
+    for index in np.flatnonzero(invalid).tolist():
+        results[index] = None
+        errors.append({"index": offset + index, "error": "Invalid numbers provided"})
+    return results, errors
+
+
+def split_pairs(pairs):
+    # [[a, b], ...] or [{"num1": a, "num2": b}, ...] into two lists
+    num1, num2 = [], []
+    for pair in pairs:
+        if isinstance(pair, dict):
+            pair = (pair.get("num1"), pair.get("num2"))
+        elif not isinstance(pair, (list, tuple)) or len(pair) != 2:
+            pair = (None, None)
+        num1.append(pair[0])
+        num2.append(pair[1])
+    return num1, num2
+